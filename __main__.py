@@ -0,0 +1,3 @@
+from ai_course.cli import main  # Lightweight: the subcommands import what they need.
+
+raise SystemExit(main())
@@ -0,0 +1,128 @@
+"""
+Batch backtest of many trading rules on one long (Ticker, Date) feature frame.
+
+`compute_strat_perf` evaluates one strategy per call and writes Position and return
+columns into the shared frame. Here the feature columns the rules read are unstacked
+once into wide date x ticker arrays, every rule's positions are stacked into one
+strategy x date x ticker tensor, and all daily returns come out of a single reduction
+against the forward returns. The inputs are never modified.
+
+    result = backtest.run_strategies(
+        total_returns,
+        {"RSI<30": signals.below("RSI", 30), "RSI<20": signals.below("RSI", 20)},
+    )
+    print(result.comparison)
+
+Each strategy's daily return is the mean of position x forward return over all rows
+of that date, as in `compute_strat_perf` without a weighting; the benchmark is the
+plain mean of the forward return, as in `compute_BM_perf`.
+"""
+
+from dataclasses import dataclass  # Lightweight container for the structured result.
+
+import numpy as np  # NumPy holds the position tensor and does the reduction.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course import metrics, signals
+from ai_course.price_matrix import wide_codes  # Long index -> wide array coordinates.
+
+BENCHMARK = "S&P500"  # Column name used by compute_BM_perf.
+
+
+@dataclass
+class BatchResult:
+    """Performance of every strategy of a batch, next to the benchmark."""
+
+    report: metrics.PerformanceReport  # Daily, cumulative and calendar returns.
+    # Strategy x CAGR, Sharpe, Volatility, Max Drawdown, Exposure (%), Invested days (%).
+    comparison: pd.DataFrame
+
+
+def _strategy_rules(strategies) -> dict:
+    """{name: Rule} from a mapping or a sequence of rules (named by their repr)."""
+    if not isinstance(strategies, dict):
+        strategies = {repr(rule): rule for rule in strategies}
+    for name, rule in strategies.items():
+        if not isinstance(rule, signals.Rule):
+            raise TypeError(f"Strategy {name!r} is not a signals.Rule: {rule!r}")
+    if not strategies:
+        raise ValueError("run_strategies needs at least one strategy")
+    return strategies
+
+
+def _unstack(total_returns: pd.DataFrame, columns, date_codes, ticker_codes, shape):
+    """Wide date x ticker arrays of `columns`; NaN where the long frame has no row."""
+    wide = {}
+    for column in columns:
+        values = total_returns[column].to_numpy(dtype="float64")
+        array = np.full(shape, np.nan)
+        array[date_codes, ticker_codes] = values
+        wide[column] = array
+    return wide
+
+
+def run_strategies(
+    total_returns: pd.DataFrame,
+    strategies,
+    target: str = "F_1_d_returns",
+    benchmark: bool = True,
+    universe=None,
+) -> BatchResult:
+    """
+    Evaluate many vectorised rules in one pass.
+
+    Input:  long (Ticker, Date) feature frame (e.g. computing_returns plus RSI),
+            {name: signals.Rule} or a list of rules, the forward-return column,
+            whether to add the benchmark, and an optional universe.Membership that
+            zeroes positions of tickers outside the index on that date (and limits
+            the benchmark to the members)
+    Output: BatchResult; the daily returns are named "<name>_Return"
+
+    The position tensor holds one byte per date, ticker and strategy (about 3 MB per
+    strategy for 25 years of the S&P 500).
+    """
+    strategies = _strategy_rules(strategies)
+    date_codes, ticker_codes, dates, tickers = wide_codes(total_returns.index)
+    shape = (len(dates), len(tickers))
+    columns = set().union(*(rule.columns() for rule in strategies.values()))
+    wide = _unstack(
+        total_returns, columns | {target}, date_codes, ticker_codes, shape
+    )  # Each feature is unstacked once, however many rules read it.
+
+    forward = wide[target]
+    present = ~np.isnan(forward)
+    counts = present.sum(axis=1)  # Rows per date, the divisor of the groupby mean.
+    forward = np.where(present, forward, 0.0)
+
+    # Positions of every strategy, stored strategy-major so that each rule writes one
+    # contiguous date x ticker block; rows missing from the frame never fire.
+    positions = np.empty((len(strategies),) + shape, dtype=bool)
+    for block, rule in zip(positions, strategies.values()):
+        np.logical_and(rule.evaluate(wide), present, out=block)
+    member = present
+    if universe is not None:
+        member = present & universe.mask(dates, tickers)
+        positions &= member
+    positions = positions.view(np.int8)  # Buy = 1, no position = 0.
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        daily = np.einsum("sdt,dt->ds", positions, forward) / counts[:, None]
+        held = positions.sum(axis=2, dtype=np.int64).T / counts[:, None]
+    names = [f"{name}_Return" for name in strategies]
+    daily = pd.DataFrame(daily, index=dates, columns=names)
+    if benchmark:
+        # Over index members only, as compute_BM_perf(universe=...).
+        sums = np.where(member, forward, 0.0).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            daily.insert(0, BENCHMARK, sums / member.sum(axis=1))
+    daily = daily[counts > 0]
+
+    report = metrics.compute_metrics(daily)
+    held = pd.DataFrame(held[counts > 0], index=daily.index, columns=names)
+    comparison = report.summary.assign(
+        Exposure=held.mean() * 100,  # Average share of the universe held.
+        **{"Invested days": (held > 0).mean() * 100},
+    )
+    if benchmark:
+        comparison.loc[BENCHMARK, ["Exposure", "Invested days"]] = 100.0
+    return BatchResult(report=report, comparison=comparison.rename_axis("Strategy"))
@@ -0,0 +1,198 @@
+"""
+Benchmark suite for the funct_lib pipeline stages on synthetic prices.
+
+Usage:
+    python -m ai_course.benchmark --scales 50 500 3000 --output bench.json
+    python -m ai_course.benchmark --baseline bench.json   # compare against a saved run
+"""
+
+import argparse  # argparse (stdlib) parses the command-line options.
+import contextlib  # redirect_stdout (stdlib) silences the stages' progress prints.
+import io  # io.StringIO (stdlib) swallows the redirected output.
+import json  # json (stdlib) stores results and baselines.
+import platform  # platform (stdlib) records the machine a result was produced on.
+import time  # time.perf_counter (stdlib) is the timer.
+import tracemalloc  # tracemalloc (stdlib) measures peak memory, NumPy arrays included.
+
+import numpy as np  # Recorded in the result metadata.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course import chunked, indicators
+from ai_course import funct_lib as fl
+from ai_course.synthetic import synthetic_prices
+
+DEFAULT_SCALES = (50, 500, 3000)  # Number of tickers per benchmark scale.
+DEFAULT_YEARS = 25  # Length of the synthetic history.
+DEFAULT_TOLERANCE = 0.25  # Relative slowdown or memory growth flagged as a regression.
+MIN_REGRESSION_SECONDS = 0.05  # Noise floor: smaller absolute slowdowns are ignored.
+
+
+def _stages(prices):
+    """
+    Yield (name, setup, run) for every benchmarked stage.
+
+    `setup()` prepares the stage's input (not measured) and `run(input)` is measured.
+    """
+    momentums = [1]
+
+    def returns():
+        return fl.computing_returns(prices, momentums)
+
+    def with_rsi():
+        total_returns = returns()
+        total_returns["RSI"] = indicators.compute_rsi(total_returns)
+        return total_returns
+
+    def strategy_inputs():
+        total_returns = with_rsi()
+        cum_returns, calendar_returns = fl.compute_BM_perf(total_returns, plot=False)
+        return total_returns, cum_returns, calendar_returns
+
+    yield "_filter_dense_tickers", lambda: prices, fl._filter_dense_tickers
+    yield (
+        "computing_returns",
+        lambda: prices,
+        lambda p: fl.computing_returns(p, momentums),
+    )
+    yield (
+        "calculate_rsi (groupby)",
+        returns,
+        lambda tr: tr.groupby("Ticker")[["1_d_returns"]].transform(fl.calculate_rsi),
+    )
+    yield "compute_rsi (vectorised)", returns, indicators.compute_rsi
+    yield "compute_BM_perf", returns, lambda tr: fl.compute_BM_perf(tr, plot=False)
+    yield (
+        "compute_strat_perf",
+        strategy_inputs,
+        lambda args: fl.compute_strat_perf(
+            args[0], args[1].copy(), args[2].copy(), fl.RSI_BUY_RULE, plot=False
+        ),
+    )
+    yield (
+        "chunked.compute_performance",
+        lambda: prices,
+        lambda p: chunked.compute_performance(p, fl.RSI_BUY_RULE, momentums),
+    )
+
+
+def _measure(setup, run, repeat: int):
+    """Best wall time over `repeat` runs, then one traced run for peak memory (MB)."""
+    timings = []
+    for _ in range(repeat):
+        stage_input = setup()
+        start = time.perf_counter()
+        run(stage_input)
+        timings.append(time.perf_counter() - start)
+
+    stage_input = setup()
+    tracemalloc.start()
+    try:
+        run(stage_input)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak / 2**20
+
+
+def run_benchmarks(
+    scales=DEFAULT_SCALES,
+    n_years=DEFAULT_YEARS,
+    missing_ratio=0.01,
+    repeat: int = 1,
+    stages=None,
+    seed: int = 0,
+) -> dict:
+    """
+    Time every stage at every scale.
+
+    Input:  ticker counts, history length, missing-data ratio, repetitions, an optional
+            subset of stage names and the generator seed
+    Output: {"meta": {...}, "results": [{stage, n_tickers, n_years, seconds, peak_mb}]}
+    """
+    results = []
+    for n_tickers in scales:
+        prices = synthetic_prices(n_tickers, n_years, missing_ratio, seed=seed)
+        for name, setup, run in _stages(prices):
+            if stages and name not in stages:
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds, peak_mb = _measure(setup, run, repeat)
+            print(
+                f"{name:<28} {n_tickers:>5} tickers  {seconds:9.3f} s  {peak_mb:9.1f} MB"
+            )
+            results.append(
+                {
+                    "stage": name,
+                    "n_tickers": n_tickers,
+                    "n_years": n_years,
+                    "seconds": seconds,
+                    "peak_mb": peak_mb,
+                }
+            )
+    meta = {
+        "timestamp": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "missing_ratio": missing_ratio,
+        "seed": seed,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(
+    current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE
+) -> pd.DataFrame:
+    """
+    Compare two benchmark runs stage by stage.
+
+    Output: one row per (stage, n_tickers) present in both runs with time and memory
+            ratios (current / baseline) and a `regression` flag when either ratio
+            exceeds 1 + tolerance (slowdowns under MIN_REGRESSION_SECONDS are noise)
+    """
+    keys = ["stage", "n_tickers", "n_years"]
+    merged = pd.DataFrame(current["results"]).merge(
+        pd.DataFrame(baseline["results"]), on=keys, suffixes=("", "_baseline")
+    )
+    merged["time_ratio"] = merged["seconds"] / merged["seconds_baseline"]
+    merged["memory_ratio"] = merged["peak_mb"] / merged["peak_mb_baseline"]
+    slower = (merged["time_ratio"] > 1 + tolerance) & (
+        merged["seconds"] - merged["seconds_baseline"] > MIN_REGRESSION_SECONDS
+    )
+    merged["regression"] = slower | (merged["memory_ratio"] > 1 + tolerance)
+    return merged[
+        keys + ["seconds", "time_ratio", "peak_mb", "memory_ratio", "regression"]
+    ]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES))
+    parser.add_argument("--years", type=float, default=DEFAULT_YEARS)
+    parser.add_argument("--missing-ratio", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--stages", nargs="+", help="Only run these stage names.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="Saved result file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(
+        args.scales, args.years, args.missing_ratio, args.repeat, args.stages, args.seed
+    )
+    with open(args.output, "w") as handle:
+        json.dump(current, handle, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            comparison = compare(current, json.load(handle), args.tolerance)
+        print(comparison.to_string(index=False))
+        return 1 if comparison["regression"].any() else 0  # Non-zero exit for CI.
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
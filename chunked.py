@@ -0,0 +1,244 @@
+"""
+Out-of-core execution of the return / RSI / strategy pipeline.
+
+Per-ticker work (momentum, forward returns, RSI, positions) runs on blocks of
+`chunk_size` tickers; cross-sectional aggregates (the equal-weight benchmark) run on
+blocks of `chunk_days` dates with just enough neighbouring rows to compute the
+returns. Only one block is in memory at a time and partial results (per-date sums and
+counts) are combined at the end, so peak memory depends on the chunk sizes, not on the
+size of the universe or the history. Sources are price stores (see price_store.py;
+the npy backend memory-maps its file) or in-memory DataFrames / PriceMatrix objects.
+"""
+
+import numpy as np  # NumPy does the per-block arithmetic and partial sums.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course import features, indicators, metrics, signals
+from ai_course.price_matrix import PriceMatrix  # Wide date x ticker container.
+from ai_course.price_store import PriceStore  # On-disk sources stream their blocks.
+
+DEFAULT_CHUNK_TICKERS = 250  # Tickers per block for per-ticker work.
+DEFAULT_CHUNK_DAYS = 1000  # Dates per block for cross-sectional work.
+
+
+class _MatrixSource:
+    """In-memory prices exposed through the PriceStore reading interface."""
+
+    def __init__(self, prices):
+        if not isinstance(prices, PriceMatrix):
+            prices = PriceMatrix.from_frame(prices, dtype="float64")
+        self.prices = prices
+
+    def tickers(self) -> list[str]:
+        return list(self.prices.tickers)
+
+    def load_matrix(self, tickers=None, start_date=None, end_date=None) -> PriceMatrix:
+        return self.prices.slice(start_date, end_date, tickers)
+
+
+def _source(source):
+    return source if isinstance(source, PriceStore) else _MatrixSource(source)
+
+
+def ticker_partitions(
+    source,
+    chunk_size=DEFAULT_CHUNK_TICKERS,
+    tickers=None,
+    start_date=None,
+    end_date=None,
+):
+    """Yield the prices as PriceMatrix blocks of at most `chunk_size` tickers."""
+    source = _source(source)
+    tickers = source.tickers() if tickers is None else list(tickers)
+    for first in range(0, len(tickers), chunk_size):
+        yield source.load_matrix(
+            tickers[first : first + chunk_size], start_date, end_date
+        )
+
+
+def date_partitions(
+    source,
+    chunk_days=DEFAULT_CHUNK_DAYS,
+    lookback: int = 0,
+    lookahead: int = 0,
+    tickers=None,
+    start_date=None,
+    end_date=None,
+):
+    """
+    Yield (block, core) pairs covering the history in blocks of `chunk_days` dates.
+
+    Each block carries `lookback` extra rows before and `lookahead` rows after its core
+    rows, so trailing and forward returns of the core rows can be computed within the
+    block; `core` is the positional slice of those rows inside the block.
+    """
+    source = _source(source)
+    # Loading no tickers only reads the date index.
+    dates = source.load_matrix([], start_date, end_date).dates
+    for first in range(0, len(dates), chunk_days):
+        stop = min(first + chunk_days, len(dates))
+        lower = max(first - lookback, 0)
+        upper = min(stop + lookahead, len(dates))
+        block = source.load_matrix(
+            tickers,
+            dates[lower],
+            dates[upper] if upper < len(dates) else end_date,
+        )
+        yield block, slice(first - lower, stop - lower)
+
+
+def iter_total_returns(
+    source,
+    list_of_momentums,
+    forecast_horizons=(1,),
+    rsi_column: str = "1_d_returns",
+    rsi_window: int = indicators.RSI_WINDOW,
+    chunk_size=DEFAULT_CHUNK_TICKERS,
+    tickers=None,
+):
+    """
+    Yield the long (Ticker, Date) feature frame of `computing_returns` one ticker block
+    at a time, with the RSI of `rsi_column` added (None to skip it).
+
+    Concatenating the blocks gives the same rows as `computing_returns` followed by
+    `indicators.compute_rsi`; callers that only aggregate should reduce each block.
+    """
+    for block in ticker_partitions(source, chunk_size, tickers):
+        wide, _ = features.kept_features(
+            block.values.astype("float64", copy=False),
+            list_of_momentums,
+            forecast_horizons,
+        )
+        if rsi_column is not None:
+            wide["RSI"] = indicators.rsi_matrix(wide[rsi_column], [rsi_window])[
+                rsi_window
+            ]
+        # Rows are dropped on the feature columns only; missing RSI stays NaN.
+        yield features.stack_features(
+            wide, block.dates, block.tickers, dropna=False
+        ).dropna(subset=[name for name in wide if name != "RSI"])
+
+
+def dense_tickers(
+    source, min_observations: int, chunk_size=DEFAULT_CHUNK_TICKERS
+) -> list[str]:
+    """Tickers with at least `min_observations` prices (see `_filter_dense_tickers`)."""
+    kept = []
+    for block in ticker_partitions(source, chunk_size):
+        counts = block.count()
+        kept += counts.index[counts.to_numpy() >= min_observations].tolist()
+    return kept
+
+
+def benchmark_daily_returns(
+    source,
+    list_of_momentums=(1,),
+    chunk_days=DEFAULT_CHUNK_DAYS,
+    tickers=None,
+    start_date=None,
+    end_date=None,
+) -> pd.Series:
+    """
+    Equal-weight benchmark of `compute_BM_perf`, computed block of dates by block.
+
+    Each date averages the 1-day forward return over the tickers that have every
+    feature `computing_returns` would build for `list_of_momentums`.
+
+    Output: Series "S&P500" of daily returns (dates without any ticker are dropped)
+    """
+    forward = features.forward_name(1)
+    parts = []
+    for block, core in date_partitions(
+        source,
+        chunk_days,
+        lookback=max(list_of_momentums),
+        lookahead=1,
+        tickers=tickers,
+        start_date=start_date,
+        end_date=end_date,
+    ):
+        wide, kept = features.kept_features(
+            block.values.astype("float64", copy=False), list_of_momentums, (1,)
+        )
+        counts = kept[core].sum(axis=1)
+        sums = np.nansum(wide[forward][core], axis=1)
+        with np.errstate(invalid="ignore"):
+            parts.append(pd.Series(sums / counts, index=block.dates[core]))
+    daily = pd.concat(parts) if parts else pd.Series(dtype="float64")
+    return daily.dropna().rename("S&P500").rename_axis("Date")
+
+
+def strategy_daily_returns(
+    source,
+    trading_rule: signals.Rule,
+    list_of_momentums=(1,),
+    rsi_column: str = "1_d_returns",
+    rsi_window: int = indicators.RSI_WINDOW,
+    model_name: str = "RSI",
+    chunk_size=DEFAULT_CHUNK_TICKERS,
+    tickers=None,
+) -> pd.Series:
+    """
+    Daily returns of `compute_strat_perf` for a vectorised rule, block of tickers by block.
+
+    Each ticker block contributes per-date sums of the position-weighted forward
+    returns and per-date row counts; the strategy return is their ratio once all
+    blocks are in. The rule sees the wide feature arrays plus "RSI".
+
+    Output: Series "<model_name>_Return" of daily returns
+    """
+    forward = features.forward_name(1)
+    sums = counts = None
+    dates = None
+    for block in ticker_partitions(source, chunk_size, tickers):
+        wide, kept = features.kept_features(
+            block.values.astype("float64", copy=False), list_of_momentums, (1,)
+        )
+        wide["RSI"] = indicators.rsi_matrix(wide[rsi_column], [rsi_window])[rsi_window]
+        positions = trading_rule.positions(wide)
+        block_sums = np.nansum(wide[forward] * positions, axis=1)
+        block_counts = kept.sum(axis=1)
+        if sums is None:
+            sums, counts, dates = block_sums, block_counts, block.dates
+        else:
+            sums, counts = sums + block_sums, counts + block_counts
+    if dates is None:
+        return pd.Series(dtype="float64", name=f"{model_name}_Return")
+    with np.errstate(invalid="ignore"):
+        daily = pd.Series(sums / counts, index=dates, name=f"{model_name}_Return")
+    return daily.dropna()
+
+
+def compute_performance(
+    source,
+    trading_rule: signals.Rule,
+    list_of_momentums=(1,),
+    model_name: str = "RSI",
+    chunk_size=DEFAULT_CHUNK_TICKERS,
+    chunk_days=DEFAULT_CHUNK_DAYS,
+    tickers=None,
+) -> metrics.PerformanceReport:
+    """
+    Benchmark and strategy performance without loading the universe at once.
+
+    Input:  price store or in-memory prices, a signals.Rule, the momentum windows and
+            block sizes; `tickers` restricts the universe (e.g. to `dense_tickers`)
+    Output: PerformanceReport with "S&P500" and "<model_name>_Return" columns
+    """
+    daily = pd.concat(
+        [
+            benchmark_daily_returns(
+                source, list_of_momentums, chunk_days, tickers=tickers
+            ),
+            strategy_daily_returns(
+                source,
+                trading_rule,
+                list_of_momentums,
+                model_name=model_name,
+                chunk_size=chunk_size,
+                tickers=tickers,
+            ),
+        ],
+        axis=1,
+    )
+    return metrics.compute_metrics(daily)
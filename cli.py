@@ -0,0 +1,332 @@
+"""
+Command-line entry point for the S&P 500 RSI pipeline.
+
+Usage:
+    python -m ai_course load --config run.toml
+    python -m ai_course features --config run.toml --output features.parquet
+    python -m ai_course backtest --config run.toml --set backtest.weighting=equal
+    python -m ai_course sweep --config run.json --profile
+    python -m ai_course serve --config run.toml --set server.port=8765
+
+The config file (TOML or JSON) has the sections of DEFAULT_CONFIG; missing keys keep
+their defaults. This module imports only the standard library at start-up: pandas and
+the pipeline modules are imported by the subcommand that runs, and the HTTP stack and
+matplotlib only when prices have to be downloaded or a chart is drawn.
+"""
+
+import argparse  # argparse (stdlib) parses the command line.
+import contextlib  # contextlib.ExitStack (stdlib) opens the report renderer on demand.
+import copy  # copy.deepcopy (stdlib) keeps DEFAULT_CONFIG untouched by overrides.
+import json  # json (stdlib) reads JSON configs and --set values.
+import logging  # logging (stdlib) shows download and cache progress with --verbose.
+import time  # time.perf_counter (stdlib) reports the run time.
+import tomllib  # tomllib (stdlib) reads TOML configs.
+from pathlib import Path  # pathlib.Path (stdlib) gives cross-platform filesystem paths.
+
+DEFAULT_CONFIG = {
+    "data": {
+        "start_date": "2000-01-01",
+        "end_date": "2025-10-21",
+        # Optional: "tickers" (list), "backend" ("npy", "parquet" or "csv"),
+        # "synthetic_tickers" (use synthetic prices of that many tickers, offline),
+        # "membership_file" (point-in-time index membership CSV, see universe.py).
+        "compact": False,
+        "clean": False,  # Validate and clean the prices once (see data_quality.py).
+    },
+    "features": {
+        "momentums": [1],
+        "forecast_horizons": [1],
+        "rsi_window": 14,
+        "cache": True,  # Reuse features from the on-disk feature cache.
+    },
+    "backtest": {
+        "buy_threshold": 30,  # Buy where RSI < buy_threshold.
+        # "mean" (average over all tickers), "equal" or "signal" (held names only).
+        "weighting": "mean",
+        # Optional: "max_weight" caps each name for "equal" and "signal".
+        "cost_bps": 0.0,
+        "plot": False,
+        # Optional: "report_dir" writes PNG/HTML reports there (see report.py).
+    },
+    "sweep": {
+        "rsi_windows": [7, 14, 21],
+        "buy_thresholds": [20, 30, 40],
+        "momentum_windows": [1],
+        "rank_by": "Sharpe",
+        # Optional: "max_workers".
+    },
+    "server": {
+        "host": "127.0.0.1",
+        "port": 8765,
+        "refresh_interval": None,  # Seconds between reloads of the prices (see server.py).
+    },
+}
+
+logger = logging.getLogger(__name__)
+
+
+def load_config(path=None, overrides=()) -> dict:
+    """
+    DEFAULT_CONFIG merged with a TOML or JSON file and `section.key=value` overrides.
+
+    Override values are parsed as JSON when possible (numbers, lists, true/false),
+    otherwise kept as strings.
+    """
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if path is not None:
+        path = Path(path)
+        with open(path, "rb") as handle:
+            loaded = (
+                json.load(handle) if path.suffix == ".json" else tomllib.load(handle)
+            )
+        for section, values in loaded.items():
+            if section not in config:
+                raise ValueError(
+                    f"Unknown config section {section!r}; expected one of {list(config)}"
+                )
+            config[section].update(values)
+    for override in overrides:
+        key, _, value = override.partition("=")
+        section, _, name = key.partition(".")
+        if section not in config or not name:
+            raise ValueError(
+                f"Override {override!r} is not of the form section.key=value"
+            )
+        try:
+            config[section][name] = json.loads(value)
+        except json.JSONDecodeError:
+            config[section][name] = value
+    return config
+
+
+def _membership(config):
+    """The universe.Membership of data.membership_file, or None."""
+    path = config["data"].get("membership_file")
+    if not path:
+        return None
+    from ai_course import universe
+
+    return universe.load_membership(path)
+
+
+def _load_prices(config):
+    data = config["data"]
+    if data.get("synthetic_tickers"):
+        from ai_course.synthetic import synthetic_prices
+
+        prices = synthetic_prices(
+            n_tickers=data["synthetic_tickers"],
+            dtype="float32" if data["compact"] else "float64",
+        )
+        prices = prices.loc[data["start_date"] : data["end_date"]]
+        if data["clean"]:
+            from ai_course import data_quality
+
+            prices = data_quality.clean_prices(prices).prices
+        return prices
+
+    from ai_course import funct_lib as fl
+
+    options = {"backend": data["backend"]} if "backend" in data else {}
+    membership = _membership(config)  # Former members are loaded too.
+    return fl.create_sp500_historical_prices(
+        data["start_date"],
+        data["end_date"],
+        tickers=data.get("tickers") or (membership and membership.tickers()),
+        compact=data["compact"],
+        clean=data["clean"],
+        **options,
+    )
+
+
+def _total_returns(config, prices):
+    """Features of `computing_returns` plus the RSI, through the feature cache if enabled."""
+    from ai_course import funct_lib as fl
+    from ai_course import indicators
+
+    settings = config["features"]
+    cache = None
+    if settings["cache"]:
+        from ai_course.feature_cache import FeatureCache
+
+        cache = FeatureCache()
+    total_returns = fl.computing_returns(
+        prices,
+        settings["momentums"],
+        settings["forecast_horizons"],
+        cache=cache,
+        compact=config["data"]["compact"],
+        universe=_membership(config),
+    )
+    total_returns["RSI"] = indicators.compute_rsi(
+        total_returns, windows=settings["rsi_window"], cache=cache
+    )
+    return total_returns
+
+
+def _weighting(settings):
+    """The portfolio.Weighting of the backtest settings, or None for the plain mean."""
+    name = settings["weighting"]
+    if name == "mean":
+        return None
+    from ai_course import portfolio
+
+    if name == "equal":
+        weighting = portfolio.equal_weight()
+    elif name == "signal":
+        weighting = portfolio.signal_weight("RSI", settings["buy_threshold"])
+    else:
+        raise ValueError(
+            f"Unknown weighting {name!r}; expected 'mean', 'equal' or 'signal'"
+        )
+    if settings.get("max_weight"):
+        weighting = portfolio.capped(weighting, settings["max_weight"])
+    return weighting
+
+
+def _write(frame, output) -> None:
+    """Write a DataFrame to .parquet or .csv, chosen by the file suffix."""
+    if Path(output).suffix == ".parquet":
+        frame.to_parquet(output)
+    else:
+        frame.to_csv(output)
+    print(f"Written to {output}")
+
+
+def run_load(config, output=None) -> None:
+    prices = _load_prices(config)
+    print(
+        f"{prices.shape[1]} tickers, {len(prices)} dates "
+        f"({prices.index[0]:%Y-%m-%d} to {prices.index[-1]:%Y-%m-%d})"
+    )
+    if output:
+        _write(prices, output)
+
+
+def run_features(config, output=None) -> None:
+    total_returns = _total_returns(config, _load_prices(config))
+    print(total_returns.describe().T.to_string())
+    if output:
+        _write(total_returns, output)
+
+
+def run_backtest(config, output=None) -> None:
+    from ai_course import funct_lib as fl
+    from ai_course import signals
+
+    settings = config["backtest"]
+    total_returns = _total_returns(config, _load_prices(config))
+    with contextlib.ExitStack() as stack:
+        renderer = None
+        if settings.get("report_dir"):
+            from ai_course.report import ReportRenderer
+
+            # Charts are rendered to files by worker processes; leaving waits for them.
+            renderer = stack.enter_context(ReportRenderer(settings["report_dir"]))
+        cum_returns, calendar_returns = fl.compute_BM_perf(
+            total_returns, plot=settings["plot"], renderer=renderer
+        )
+        cum_returns, calendar_returns = fl.compute_strat_perf(
+            total_returns,
+            cum_returns,
+            calendar_returns,
+            signals.below("RSI", settings["buy_threshold"]),
+            plot=settings["plot"],
+            compact=config["data"]["compact"],
+            weighting=_weighting(settings),
+            cost_bps=settings["cost_bps"],
+            renderer=renderer,
+        )
+        print(calendar_returns.round(2).to_string())
+    if output:
+        _write(cum_returns, output)
+
+
+def run_sweep(config, output=None) -> None:
+    from ai_course import sweep
+
+    settings = config["sweep"]
+    table = sweep.run_sweep(
+        _load_prices(config),
+        settings["rsi_windows"],
+        settings["buy_thresholds"],
+        settings["momentum_windows"],
+        max_workers=settings.get("max_workers"),
+        rank_by=settings["rank_by"],
+    )
+    print(table.to_string(index=False))
+    if output:
+        _write(table, output)
+
+
+def run_serve(config, output=None) -> None:
+    import asyncio
+
+    from ai_course.server import QueryServer
+
+    settings = config["server"]
+    query_server = QueryServer(
+        lambda: _load_prices(config),
+        config["features"]["momentums"],
+        config["features"]["rsi_window"],
+        refresh_interval=settings["refresh_interval"],
+        universe=_membership(config),
+    )
+    try:
+        asyncio.run(query_server.serve(settings["host"], settings["port"]))
+    except KeyboardInterrupt:
+        pass
+
+
+COMMANDS = {
+    "load": (run_load, "Load (and cache) the historical prices."),
+    "features": (run_features, "Compute return features and the RSI."),
+    "backtest": (run_backtest, "Benchmark and RSI strategy performance."),
+    "sweep": (run_sweep, "Evaluate the RSI strategy over a parameter grid."),
+    "serve": (run_serve, "Answer feature and metric queries over local HTTP."),
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m ai_course", description=__doc__.splitlines()[1]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--config", help="TOML or JSON config file.")
+        command.add_argument(
+            "--set",
+            action="append",
+            default=[],
+            metavar="SECTION.KEY=VALUE",
+            help="Override one config value (repeatable).",
+        )
+        command.add_argument("--output", help="Write the result to .csv or .parquet.")
+        command.add_argument(
+            "--profile", action="store_true", help="Print per-stage timings."
+        )
+        command.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(name)s %(message)s",
+    )
+
+    config = load_config(args.config, args.set)
+    run, _ = COMMANDS[args.command]
+    start = time.perf_counter()
+    if args.profile:
+        from ai_course import profiling
+
+        with profiling.profile() as profiler:
+            run(config, args.output)
+        print(profiler.summary().to_string())
+    else:
+        run(config, args.output)
+    logger.info("%s finished in %.2f s", args.command, time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,268 @@
+"""
+Validation and cleaning of the date x ticker close-price matrix.
+
+All checks run once over the whole wide array, in float64, with no per-ticker Python
+loop. Consecutive observations are compared across missing days, so a gap never hides
+a jump:
+
+- non-positive prices are removed;
+- bad prints, a jump of at least BAD_PRINT_RETURN that the next observation reverses
+  to within REVERSAL_TOLERANCE, are removed;
+- split-like jumps, a persistent move matching a common split ratio, are flagged;
+  with `adjust_splits` the history before them is rescaled (off by default: adjusted
+  close prices should not contain any, and a genuine -50% day looks the same);
+- other moves beyond EXTREME_RETURN are flagged but kept, since they can be genuine;
+- stale runs of STALE_DAYS or more identical prices keep their first price only, so
+  frozen quotes do not feed zero returns into the RSI and the benchmark;
+- missing days between a ticker's first and last price are counted as gaps.
+
+The result holds the cleaned prices and a per-ticker report. With a
+feature_cache.FeatureCache both are stored keyed on the raw prices and thresholds,
+so later runs on unchanged prices skip the work.
+"""
+
+from dataclasses import dataclass  # Lightweight container for the structured result.
+
+import numpy as np  # NumPy runs every check on the wide array at once.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course.price_matrix import PriceMatrix  # Wide date x ticker container.
+
+BAD_PRINT_RETURN = 0.25  # Smallest jump (log terms: +28% / -22%) tested for reversal.
+REVERSAL_TOLERANCE = 0.05  # Jump and next move cancel to within 5% (log terms).
+SPLIT_RATIOS = (1.5, 2, 3, 4, 5, 8, 10, 15, 20)  # Split (and reverse-split) ratios.
+SPLIT_TOLERANCE = 0.05  # Largest log distance of a jump from a split ratio.
+EXTREME_RETURN = 0.4  # Daily moves beyond +-40% are flagged.
+STALE_DAYS = 5  # Identical consecutive prices that make a stale run.
+
+REPORT_COLUMNS = [
+    "observations",
+    "first_date",
+    "last_date",
+    "missing_days",
+    "longest_gap",
+    "non_positive",
+    "bad_prints",
+    "split_jumps",
+    "extreme_returns",
+    "stale_days",
+]
+
+
+@dataclass
+class QualityResult:
+    """Cleaned prices (same type as the input) and a ticker x REPORT_COLUMNS table."""
+
+    prices: object
+    report: pd.DataFrame
+
+
+def _previous_rows(valid: np.ndarray) -> np.ndarray:
+    """Row of the previous valid observation in the same column (-1 if none)."""
+    rows = np.arange(len(valid))[:, None]
+    last = np.where(valid, rows, -1)
+    np.maximum.accumulate(last, axis=0, out=last)
+    previous = np.full_like(last, -1)
+    previous[1:] = last[:-1]
+    return previous
+
+
+def _next_rows(valid: np.ndarray) -> np.ndarray:
+    """Row of the next valid observation in the same column (len(valid) if none)."""
+    n = len(valid)
+    rows = np.arange(n)[:, None]
+    following = np.where(valid, rows, n)[::-1]
+    np.minimum.accumulate(following, axis=0, out=following)
+    following = following[::-1]
+    upcoming = np.full_like(following, n)
+    upcoming[:-1] = following[1:]
+    return upcoming
+
+
+def _log_returns(values: np.ndarray, valid: np.ndarray):
+    """Log return of every valid price against the previous valid one (NaN if none)."""
+    previous = _previous_rows(valid)
+    columns = np.arange(values.shape[1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.log(values / values[np.maximum(previous, 0), columns])
+    return np.where(valid & (previous >= 0), returns, np.nan), previous
+
+
+def _stale_repeats(values: np.ndarray, valid: np.ndarray, previous, min_days: int):
+    """Mask of repeated prices that belong to a run of at least `min_days` equal prices."""
+    columns = np.arange(values.shape[1])
+    earlier = values[np.maximum(previous, 0), columns]
+    repeat = valid & (previous >= 0) & (values == earlier)
+    # Repeats so far in the current run: the running count minus its value at the
+    # last valid price that differed from its predecessor.
+    count = np.cumsum(repeat, axis=0)
+    reset = np.where(valid & ~repeat, count, 0)
+    np.maximum.accumulate(reset, axis=0, out=reset)
+    length = count - reset
+    # Carry each run's final length back over the whole run: a run ends at a repeat
+    # whose next valid price is not a repeat.
+    n = len(values)
+    padded = np.vstack([repeat, np.zeros((1, len(columns)), bool)])
+    run_end = repeat & ~padded[_next_rows(valid), columns]
+    ends = np.where(run_end, np.arange(n)[:, None], n)[::-1]
+    np.minimum.accumulate(ends, axis=0, out=ends)
+    lengths = np.vstack([length, np.zeros((1, len(columns)), length.dtype)])
+    total = lengths[ends[::-1], columns]
+    return repeat & (total >= min_days - 1)
+
+
+def _split_factors(returns: np.ndarray, tolerance: float) -> np.ndarray:
+    """Snapped split ratio (new / old price) of every split-like move, else NaN."""
+    factors = np.full(returns.shape, np.nan)
+    log_ratios = np.log(SPLIT_RATIOS)
+    with np.errstate(invalid="ignore"):
+        # Only the few large moves are compared with every ratio.
+        (candidates,) = np.nonzero(
+            np.abs(returns).reshape(-1) > log_ratios.min() - tolerance
+        )
+    moves = returns.reshape(-1)[candidates]
+    distance = np.abs(np.abs(moves)[:, None] - log_ratios)
+    nearest = distance.argmin(axis=1)
+    near = distance[np.arange(len(moves)), nearest] < tolerance
+    factors.reshape(-1)[candidates[near]] = np.exp(
+        np.sign(moves[near]) * log_ratios[nearest[near]]
+    )
+    return factors
+
+
+def _gap_stats(valid: np.ndarray, previous: np.ndarray):
+    """Missing days between the first and last price, and the longest such gap."""
+    rows = np.arange(len(valid))[:, None]
+    gaps = np.where(valid & (previous >= 0), rows - previous - 1, 0)
+    return gaps.sum(axis=0), gaps.max(axis=0, initial=0)
+
+
+def validate(
+    values: np.ndarray,
+    adjust_splits: bool = False,
+    bad_print_return: float = BAD_PRINT_RETURN,
+    reversal_tolerance: float = REVERSAL_TOLERANCE,
+    split_tolerance: float = SPLIT_TOLERANCE,
+    extreme_return: float = EXTREME_RETURN,
+    stale_days: int = STALE_DAYS,
+):
+    """
+    Clean a date x ticker price array.
+
+    Output: (cleaned float64 array, dict of per-ticker counts and gap statistics)
+    """
+    values = np.array(values, dtype="float64")  # Working copy; the input is untouched.
+    counts = {}
+
+    non_positive = values <= 0
+    values[non_positive] = np.nan
+    counts["non_positive"] = non_positive.sum(axis=0)
+
+    valid = ~np.isnan(values)
+    returns, previous = _log_returns(values, valid)
+    counts["missing_days"], counts["longest_gap"] = _gap_stats(valid, previous)
+
+    # A bad print jumps away and straight back: the next move cancels this one.
+    upcoming = _next_rows(valid)
+    columns = np.arange(values.shape[1])
+    next_returns = np.vstack([returns, np.full((1, len(columns)), np.nan)])[
+        upcoming, columns
+    ]
+    bad_print = (np.abs(returns) >= bad_print_return) & (
+        np.abs(returns + next_returns) < reversal_tolerance
+    )
+    values[bad_print] = np.nan
+    counts["bad_prints"] = bad_print.sum(axis=0)
+
+    valid = ~np.isnan(values)
+    returns, previous = _log_returns(values, valid)
+    split_factors = _split_factors(returns, split_tolerance)
+    split = ~np.isnan(split_factors)
+    counts["split_jumps"] = split.sum(axis=0)
+    if adjust_splits and split.any():
+        # Prices before a split are scaled by the product of all later split factors.
+        later = np.where(split, split_factors, 1.0)[::-1].cumprod(axis=0)[::-1]
+        scale = np.vstack([later[1:], np.ones((1, len(columns)))])
+        values *= scale
+    with np.errstate(invalid="ignore"):
+        counts["extreme_returns"] = (
+            (np.abs(np.expm1(returns)) > extreme_return) & ~split
+        ).sum(axis=0)
+
+    stale = _stale_repeats(values, valid, previous, stale_days)
+    values[stale] = np.nan
+    counts["stale_days"] = stale.sum(axis=0)
+    return values, counts
+
+
+def _report(values: np.ndarray, dates, tickers, counts) -> pd.DataFrame:
+    valid = ~np.isnan(values)
+    present = valid.any(axis=0)
+    first = np.where(present, valid.argmax(axis=0), 0)
+    last = np.where(present, len(valid) - 1 - valid[::-1].argmax(axis=0), 0)
+    dates = pd.DatetimeIndex(dates)
+    report = pd.DataFrame(
+        {
+            "observations": valid.sum(axis=0),
+            "first_date": dates[first].where(present) if len(dates) else pd.NaT,
+            "last_date": dates[last].where(present) if len(dates) else pd.NaT,
+            **counts,
+        },
+        index=pd.Index(tickers, name="Ticker"),
+    )
+    return report[REPORT_COLUMNS]
+
+
+def _clean(prices, **thresholds) -> QualityResult:
+    matrix = (
+        prices
+        if isinstance(prices, PriceMatrix)
+        else PriceMatrix.from_frame(prices, dtype="float64")
+    )
+    values, counts = validate(matrix.values, **thresholds)
+    report = _report(values, matrix.dates, matrix.tickers, counts)
+    cleaned = PriceMatrix(
+        values.astype(matrix.values.dtype, copy=False),
+        matrix.dates,
+        matrix.tickers,
+        matrix.name,
+    )
+    return QualityResult(
+        prices=cleaned if isinstance(prices, PriceMatrix) else cleaned.to_frame(),
+        report=report,
+    )
+
+
+def clean_prices(prices, cache=None, **thresholds) -> QualityResult:
+    """
+    Validate and clean a date x ticker price DataFrame or PriceMatrix.
+
+    Input:  prices, an optional feature_cache.FeatureCache and threshold overrides
+            (see `validate`: adjust_splits, bad_print_return, reversal_tolerance,
+            split_tolerance, extreme_return, stale_days)
+    Output: QualityResult with prices of the input's type and dtype and the per-ticker
+            report; from the cache when the same prices were cleaned before
+    """
+    if cache is None:
+        return _clean(prices, **thresholds)
+
+    keys = {
+        part: cache.key(f"clean_prices_{part}", prices, thresholds)
+        for part in ("prices", "report")
+    }
+    cached = {part: cache.get(key) for part, key in keys.items()}
+    if cached["prices"] is None or cached["report"] is None:
+        result = _clean(prices, **thresholds)
+        frame = (
+            result.prices.to_frame()
+            if isinstance(result.prices, PriceMatrix)
+            else result.prices
+        )
+        cache.put(keys["prices"], frame)
+        cache.put(keys["report"], result.report)
+        return result
+
+    cleaned = cached["prices"]
+    if isinstance(prices, PriceMatrix):
+        cleaned = PriceMatrix.from_frame(cleaned)
+    return QualityResult(prices=cleaned, report=cached["report"])
@@ -1,10 +1,15 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 from ai_course import funct_lib as fl
+from ai_course import factor_analysis
+from ai_course import indicators
+from ai_course.feature_cache import FeatureCache
 
 historical_prices = fl.create_sp500_historical_prices()
 list_of_momentums = [1]
-total_returns = fl.computing_returns(historical_prices, list_of_momentums)
+feature_cache = FeatureCache()  # Reuse features across runs while prices are unchanged.
+total_returns = fl.computing_returns(
+    historical_prices, list_of_momentums, cache=feature_cache
+)
 
 returns = total_returns[
     "1_d_returns"
@@ -15,8 +20,8 @@ returns = returns[
 
 # window = 2
 
-total_returns["RSI"] = total_returns.groupby("Ticker")[["1_d_returns"]].transform(
-    fl.calculate_rsi
+total_returns["RSI"] = indicators.compute_rsi(
+    total_returns, column="1_d_returns", cache=feature_cache
 )
 
 # Plot
@@ -34,15 +39,14 @@ plt.grid(True)  # Enable grid lines for better readability.
 
 plt.show()
 
-scatter_plot = total_returns.plot.scatter(
+scatter_plot = total_returns.plot.hexbin(
     x="RSI",
     y="F_1_d_returns",
     ax=plt.gca(),
-    alpha=0.5,
-    s=0.01,
-    color="blue",
-    edgecolor="black",
-)
+    gridsize=200,
+    bins="log",
+    mincnt=1,
+)  # Binned density: millions of points drawn as 200 x 200 hexagons with log counts.
 
 # Customize the plot with title and labels
 plt.title(
@@ -58,6 +62,16 @@ plt.show()
 
 total_returns[["RSI", "F_1_d_returns"]].corr().style.background_gradient()
 
+# Per-date rank IC: how well RSI orders the next day's returns across tickers, over time
+information_coefficients = factor_analysis.information_coefficients(
+    total_returns, ["RSI", "1_d_returns"]
+)
+print(factor_analysis.ic_summary(information_coefficients))
+factor_analysis.rolling_ic(information_coefficients)["mean"].plot(
+    title="Rolling 1-year mean rank IC"
+)
+plt.show()
+
 feature = "RSI"
 target = "F_1_d_returns"
 
@@ -69,9 +83,9 @@ bin_boundaries = [
     100,
 ]  # Example: Oversold (<30), Neutral (30-70), Overbought (>70)
 
-total_returns["Quantiles"] = total_returns.groupby(level="Date")[feature].transform(
-    lambda x: pd.cut(x, bins=bin_boundaries, labels=False, include_lowest=True)
-)
+total_returns["Quantiles"] = factor_analysis.assign_buckets(
+    total_returns, feature, boundaries=bin_boundaries
+)  # Per-date buckets on the wide array, same labels as pd.cut(..., labels=False).
 
 quantiles_plot = (
     total_returns.groupby("Quantiles")[[target]].mean().plot(kind="bar", legend=True)
@@ -86,3 +100,9 @@ plt.grid(True)  # Enable grid lines for better readability.
 plt.show()
 
 total_returns[total_returns["RSI"] < 30].describe()
+
+# Bucket means, counts and top-minus-bottom spreads for several features in one pass
+factor_report = factor_analysis.analyze_factors(
+    total_returns, ["RSI", "1_d_returns"], target, boundaries={"RSI": bin_boundaries}
+)
+print(factor_report.summary)
@@ -1,13 +1,18 @@
 from ai_course import funct_lib as fl
+from ai_course import indicators
+from ai_course.feature_cache import FeatureCache
 
 historical_prices = fl.create_sp500_historical_prices()
 list_of_momentums = [1]
-total_returns = fl.computing_returns(historical_prices, list_of_momentums)
+feature_cache = FeatureCache()  # Reuse features across runs while prices are unchanged.
+total_returns = fl.computing_returns(
+    historical_prices, list_of_momentums, cache=feature_cache
+)
 total_returns = total_returns.dropna()
 
 cum_returns, calendar_returns = fl.compute_BM_perf(total_returns)
 
-# Calculate RSI for eachticker separately and add to the DataFrame
-total_returns["RSI"] = total_returns.groupby("Ticker")[["1_d_returns"]].transform(
-    fl.calculate_rsi
+# Calculate RSI for all tickers at once (vectorised) and add to the DataFrame
+total_returns["RSI"] = indicators.compute_rsi(
+    total_returns, column="1_d_returns", cache=feature_cache
 )
@@ -0,0 +1,218 @@
+# random (stdlib) adds jitter to retry delays and drives the fake provider's failures.
+import random
+
+# threading.local (stdlib) keeps one pooled HTTP session per worker thread.
+import threading
+import time  # time.sleep (stdlib) implements backoff and simulated latency.
+from concurrent.futures import ThreadPoolExecutor  # Bounded pool for batch downloads.
+from dataclasses import dataclass, field  # Lightweight container for download results.
+
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course import price_store  # On-disk storage reused by the local provider.
+
+DEFAULT_BATCH_SIZE = 50  # Tickers per request; one bad symbol only affects its batch.
+DEFAULT_MAX_WORKERS = 4  # Concurrent batches; Yahoo throttles aggressive clients.
+DEFAULT_RETRIES = 3  # Attempts per batch before its tickers are reported as failed.
+DEFAULT_BACKOFF = 1.0  # Seconds before the first retry; doubles on every attempt.
+
+_http = threading.local()  # Per-thread storage for pooled sessions.
+
+
+def http_session():
+    """Return this thread's pooled `requests.Session` (created on first use)."""
+    if not hasattr(_http, "session"):
+        import requests  # Imported lazily so offline runs do not need the HTTP stack.
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        session.mount("https://", adapter)  # Keep-alive connections are reused.
+        _http.session = session
+    return _http.session
+
+
+class MarketDataProvider:
+    """Interface for close-price sources used by `download_prices`."""
+
+    def fetch_close(self, tickers, start_date: str, end_date: str) -> pd.DataFrame:
+        """Return a date x ticker DataFrame of close prices over [start_date, end_date)."""
+        raise NotImplementedError
+
+
+class YahooProvider(MarketDataProvider):
+    """Yahoo Finance via yfinance; each worker thread reuses its own HTTP session."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            # yfinance expects a curl_cffi session rather than a requests one.
+            from curl_cffi import requests as curl_requests
+
+            self._local.session = curl_requests.Session(impersonate="chrome")
+        return self._local.session
+
+    def fetch_close(self, tickers, start_date: str, end_date: str) -> pd.DataFrame:
+        import yfinance as yf  # Imported lazily; only needed when actually downloading.
+
+        prices = yf.download(
+            list(tickers),
+            start=start_date,
+            end=end_date,
+            progress=False,  # Concurrent batches would interleave progress bars.
+            threads=False,  # Concurrency is handled by download_prices' worker pool.
+            group_by="ticker",  # Column index is (ticker, field).
+            session=self._session(),
+        )
+        # yfinance does not raise on network or symbol errors: it logs them per ticker
+        # in yf.shared._ERRORS and returns empty columns. An outage must not look like
+        # a range without trading days, so it is raised for download_prices to retry.
+        # The dict is shared by concurrent calls; _fetch_batch also treats an empty
+        # answer for past weekdays as a failure in case another call reset it.
+        errors = {
+            ticker: reason
+            for ticker, reason in getattr(yf.shared, "_ERRORS", {}).items()
+            if ticker in {str(t).upper() for t in tickers}
+        }
+        if errors and len(errors) == len(tickers):
+            raise ConnectionError(f"yfinance failed for every ticker: {errors}")
+        if prices.empty:
+            return pd.DataFrame(columns=list(tickers), dtype=float)
+        # Keep only close prices and leave plain ticker symbols as column labels.
+        prices = prices.loc[:, prices.columns.get_level_values(1) == "Close"]
+        prices.columns = prices.columns.droplevel(1)
+        failed = [ticker for ticker in prices.columns if str(ticker).upper() in errors]
+        return prices.drop(columns=failed)  # Reported as "no data returned".
+
+
+class LocalProvider(MarketDataProvider):
+    """
+    Offline stand-in provider that serves prices from an on-disk price store.
+
+    `latency` (seconds per call) and `failure_rate` (probability that a call raises)
+    simulate a remote API so batching, retries and concurrency can be exercised and
+    benchmarked without network access. Tickers in `missing_tickers` never return data.
+    """
+
+    def __init__(
+        self,
+        path,
+        backend="npy",
+        latency=0.0,
+        failure_rate=0.0,
+        missing_tickers=(),
+        seed=0,
+    ):
+        self.store = price_store.BACKENDS[backend](path)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.missing_tickers = set(missing_tickers)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()  # random.Random is shared between worker threads.
+
+    @classmethod
+    def from_frame(cls, prices: pd.DataFrame, path, backend="npy", **kwargs):
+        """Write `prices` to a store at `path` and return a provider serving it."""
+        provider = cls(path, backend=backend, **kwargs)
+        provider.store.save(prices)
+        return provider
+
+    def fetch_close(self, tickers, start_date: str, end_date: str) -> pd.DataFrame:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            failed = self._random.random() < self.failure_rate
+        if failed:
+            raise ConnectionError("Simulated provider failure")
+        served = [ticker for ticker in tickers if ticker not in self.missing_tickers]
+        return self.store.load(tickers=served, start_date=start_date, end_date=end_date)
+
+
+@dataclass
+class DownloadResult:
+    """Close prices that were downloaded plus the reason for every ticker that was not."""
+
+    prices: pd.DataFrame
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def _expects_data(start_date, end_date) -> bool:
+    """Whether [start_date, end_date) holds a weekday before today, i.e. a closed bar."""
+    end = min(pd.Timestamp(end_date), pd.Timestamp.today().normalize())
+    return len(pd.bdate_range(start_date, end, inclusive="left")) > 0
+
+
+def _fetch_batch(provider, batch, start_date, end_date, retries, backoff):
+    """Fetch one batch with retries; returns (prices, {ticker: reason})."""
+    pending = list(batch)
+    received = []
+    failed = {}
+    for attempt in range(retries):
+        try:
+            prices = provider.fetch_close(pending, start_date, end_date)
+        except Exception as exc:  # Any provider error only affects this batch.
+            failed = {ticker: f"{type(exc).__name__}: {exc}" for ticker in pending}
+        else:
+            has_data = prices.notna().any() if len(prices) else pd.Series(dtype=bool)
+            ok = [t for t in pending if t in has_data.index and has_data[t]]
+            received.append(prices[ok])
+            failed = {t: "no data returned" for t in pending if t not in ok}
+            # An entirely empty answer to the whole batch is a legitimate empty range
+            # only when no past weekday falls in it (a weekend, or today before the
+            # close); otherwise it is an outage the provider did not raise. A
+            # partial answer points at per-ticker failures worth retrying.
+            if not ok and len(pending) == len(batch):
+                if not _expects_data(start_date, end_date):
+                    failed = {}
+            if not failed or not ok:
+                break
+            pending = list(failed)
+        if attempt + 1 < retries:
+            delay = backoff * 2**attempt
+            # Exponential backoff with jitter.
+            time.sleep(delay + random.uniform(0, delay / 2))
+    prices = pd.concat(received, axis=1) if received else pd.DataFrame(dtype=float)
+    return prices, failed
+
+
+def download_prices(
+    tickers,
+    start_date: str,
+    end_date: str,
+    provider: MarketDataProvider | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+) -> DownloadResult:
+    """
+    Download close prices for `tickers` in concurrent batches.
+
+    Input:  tickers, [start_date, end_date) and a provider (Yahoo Finance by default)
+    Output: DownloadResult with the merged date x ticker prices and per-ticker failures
+    """
+    provider = provider or YahooProvider()
+    tickers = list(dict.fromkeys(tickers))  # Drop duplicates while keeping the order.
+    batches = [tickers[i : i + batch_size] for i in range(0, len(tickers), batch_size)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(
+            pool.map(
+                lambda batch: _fetch_batch(
+                    provider, batch, start_date, end_date, retries, backoff
+                ),
+                batches,
+            )
+        )
+
+    frames = [prices for prices, _ in results if not prices.empty]
+    prices = (
+        pd.concat(frames, axis=1).sort_index() if frames else pd.DataFrame(dtype=float)
+    )
+    failed = {
+        ticker: reason
+        for _, batch_failed in results
+        for ticker, reason in batch_failed.items()
+    }
+    return DownloadResult(prices=prices, failed=failed)
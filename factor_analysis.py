@@ -0,0 +1,330 @@
+"""
+Cross-sectional analysis of features against forward returns.
+
+Every feature is scattered once onto the wide date x ticker grid and processed per
+date with whole-array operations: bucketing (rank-based quantiles or fixed
+boundaries) aggregated with `np.bincount`, and per-date Pearson / Spearman information
+coefficients. No Python code runs per date, and many features share one pass.
+"""
+
+from dataclasses import dataclass  # Lightweight container for the structured result.
+
+import numpy as np  # NumPy does the ranking, bucketing and bincount aggregation.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course.price_matrix import wide_codes  # Long <-> wide coordinates.
+
+DEFAULT_QUANTILES = 5  # Quintiles unless boundaries are given.
+MIN_IC_OBSERVATIONS = 10  # Fewer tickers on a date give a NaN IC.
+
+
+@dataclass
+class FactorReport:
+    """Bucket statistics for one or more features."""
+
+    # (feature, bucket) x [mean, count]: pooled mean target per bucket over all rows.
+    bucket_returns: pd.DataFrame
+    # Date x feature: top-bucket minus bottom-bucket mean target on each date.
+    daily_spread: pd.DataFrame
+    # Feature x [spread, mean daily spread, observations].
+    summary: pd.DataFrame
+
+
+def fixed_buckets(values: np.ndarray, boundaries) -> np.ndarray:
+    """
+    Bucket index for each value, like `pd.cut(values, boundaries, labels=False,
+    include_lowest=True)`: bucket i is (b[i], b[i+1]] and the first one also holds b[0].
+
+    Output: int array of the same shape, -1 for NaN or values outside the boundaries
+    """
+    boundaries = np.asarray(boundaries, dtype="float64")
+    buckets = np.searchsorted(boundaries, values, side="left") - 1
+    buckets[values == boundaries[0]] = 0  # include_lowest
+    outside = np.isnan(values) | (buckets < 0) | (buckets >= len(boundaries) - 1)
+    buckets[outside] = -1
+    return buckets
+
+
+def quantile_buckets(values: np.ndarray, n_quantiles: int = DEFAULT_QUANTILES):
+    """
+    Per-row (per-date) equal-count buckets of a date x ticker array, by rank.
+
+    Ties are split by position, like `rank(method="first")`, so every date has bucket
+    sizes that differ by at most one.
+
+    Output: int array of the same shape, -1 where the value is NaN
+    """
+    present = ~np.isnan(values)
+    # Missing values sort last, so the first `count` ranks of each row are the valid ones.
+    order = _sort_order(values, present, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(
+        ranks, order, np.broadcast_to(np.arange(values.shape[1]), values.shape), axis=1
+    )
+    counts = present.sum(axis=1, keepdims=True)
+    # Clipped: a genuine +inf may sort after the missing values of its row.
+    buckets = np.minimum(
+        (ranks * n_quantiles) // np.maximum(counts, 1), n_quantiles - 1
+    )
+    return np.where(present, buckets, -1)
+
+
+def _wide(series: pd.Series, date_codes, ticker_codes, shape) -> np.ndarray:
+    wide = np.full(shape, np.nan)
+    wide[date_codes, ticker_codes] = series.to_numpy(dtype="float64")
+    return wide
+
+
+def _buckets_for(values, boundaries, n_quantiles):
+    if boundaries is not None:
+        return fixed_buckets(values, boundaries), len(boundaries) - 1
+    return quantile_buckets(values, n_quantiles), n_quantiles
+
+
+def assign_buckets(
+    total_returns: pd.DataFrame,
+    feature: str,
+    boundaries=None,
+    n_quantiles: int = DEFAULT_QUANTILES,
+    compact: bool = False,
+) -> pd.Series:
+    """
+    Per-date bucket of `feature` for every row of a long (Ticker, Date) frame.
+
+    Vectorised replacement for
+    `groupby(level="Date")[feature].transform(lambda x: pd.cut(x, boundaries, ...))`;
+    without `boundaries` the buckets are per-date rank quantiles.
+
+    Output: float Series "Quantiles" aligned with `total_returns` (NaN when unbucketed);
+            with `compact`, int8 labels with -1 when unbucketed
+    """
+    date_codes, ticker_codes, dates, tickers = wide_codes(total_returns.index)
+    values = _wide(
+        total_returns[feature], date_codes, ticker_codes, (len(dates), len(tickers))
+    )
+    buckets, _ = _buckets_for(values, boundaries, n_quantiles)
+    if compact:
+        return pd.Series(
+            buckets[date_codes, ticker_codes].astype(np.int8),
+            index=total_returns.index,
+            name="Quantiles",
+        )
+    labels = buckets[date_codes, ticker_codes].astype("float64")
+    labels[labels < 0] = np.nan
+    return pd.Series(labels, index=total_returns.index, name="Quantiles")
+
+
+def analyze_factors(
+    total_returns: pd.DataFrame,
+    feature_columns,
+    target: str = "F_1_d_returns",
+    boundaries=None,
+    n_quantiles: int = DEFAULT_QUANTILES,
+) -> FactorReport:
+    """
+    Bucket every feature per date and relate the buckets to the target return.
+
+    Input:  long (Ticker, Date) frame, the feature columns to analyse, the target column
+            and either fixed `boundaries` (a list, or a dict of lists per feature) or the
+            number of rank quantiles
+    Output: FactorReport with pooled bucket means and counts, the daily top-minus-bottom
+            spread per feature and a per-feature summary
+    """
+    date_codes, ticker_codes, dates, tickers = wide_codes(total_returns.index)
+    shape = (len(dates), len(tickers))
+    target_values = _wide(total_returns[target], date_codes, ticker_codes, shape)
+    has_target = ~np.isnan(target_values)
+    target_filled = np.where(has_target, target_values, 0.0)
+    date_index = np.broadcast_to(np.arange(len(dates))[:, None], shape)
+
+    bucket_tables, spreads, summary = [], {}, {}
+    for feature in feature_columns:
+        feature_boundaries = (
+            boundaries.get(feature) if isinstance(boundaries, dict) else boundaries
+        )
+        values = _wide(total_returns[feature], date_codes, ticker_codes, shape)
+        buckets, n_buckets = _buckets_for(values, feature_boundaries, n_quantiles)
+        valid = (buckets >= 0) & has_target
+
+        # Pooled statistics per bucket.
+        sums = np.bincount(
+            buckets[valid], weights=target_filled[valid], minlength=n_buckets
+        )
+        counts = np.bincount(buckets[valid], minlength=n_buckets)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / counts
+        bucket_tables.append(
+            pd.DataFrame(
+                {"mean": means, "count": counts},
+                index=pd.MultiIndex.from_product(
+                    [[feature], range(n_buckets)], names=["feature", "bucket"]
+                ),
+            )
+        )
+
+        # Per-date statistics: one bincount over (date, bucket) cells.
+        cells = date_index[valid] * n_buckets + buckets[valid]
+        cell_sums = np.bincount(
+            cells, weights=target_filled[valid], minlength=len(dates) * n_buckets
+        ).reshape(len(dates), n_buckets)
+        cell_counts = np.bincount(cells, minlength=len(dates) * n_buckets).reshape(
+            len(dates), n_buckets
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            daily_means = cell_sums / cell_counts
+        spreads[feature] = daily_means[:, -1] - daily_means[:, 0]
+
+        summary[feature] = {
+            "spread": means[-1] - means[0],
+            "mean daily spread": np.nanmean(spreads[feature])
+            if np.isfinite(spreads[feature]).any()
+            else np.nan,
+            "observations": int(counts.sum()),
+        }
+
+    return FactorReport(
+        bucket_returns=pd.concat(bucket_tables),
+        daily_spread=pd.DataFrame(spreads, index=dates),
+        summary=pd.DataFrame.from_dict(summary, orient="index"),
+    )
+
+
+def _sort_order(values: np.ndarray, present: np.ndarray, kind=None) -> np.ndarray:
+    """
+    Per-row argsort with the missing values last. NaN is swapped for +inf because
+    NumPy's vectorised sort is several times faster on arrays without NaNs.
+    """
+    return np.argsort(np.where(present, values, np.inf), axis=1, kind=kind)
+
+
+def _centred_ranks(values: np.ndarray) -> np.ndarray:
+    """
+    Per-row ranks of a date x ticker array minus their row mean, ties sharing their
+    average rank like `rank(method="average")`; 0 where the value is missing.
+    """
+    present = ~np.isnan(values)
+    counts = present.sum(axis=1, keepdims=True)
+    # Tie order does not matter once tied ranks are averaged, so the faster sort is fine.
+    order = _sort_order(values, present)
+    ordered = np.take_along_axis(values, order, axis=1)
+    positions = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+
+    rank_at = positions + 1.0  # Rank of each sorted position when there are no ties.
+    tied = ordered[:, 1:] == ordered[:, :-1]
+    if tied.any():
+        # Runs of equal values: each position learns where its run starts and ends.
+        # The missing values after the first `count` positions form their own run.
+        starts_run = np.ones(values.shape, dtype=bool)
+        starts_run[:, 1:] = ~tied
+        starts_run |= positions == counts
+        ends_run = np.ones(values.shape, dtype=bool)
+        ends_run[:, :-1] = starts_run[:, 1:]
+        run_start = np.maximum.accumulate(np.where(starts_run, positions, 0), axis=1)
+        run_end = np.minimum.accumulate(
+            np.where(ends_run, positions, values.shape[1])[:, ::-1], axis=1
+        )[:, ::-1]
+        rank_at = (run_start + run_end) / 2 + 1
+
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, rank_at, axis=1)
+    # Average ranks keep the sum of 1..count, so every row's mean rank is (count + 1) / 2.
+    return np.where(present, ranks - (counts + 1) / 2, 0.0)
+
+
+def _centred(values: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """Values minus their row mean over the `present` columns; 0 elsewhere."""
+    filled = np.where(present, values, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = filled.sum(axis=1, keepdims=True) / present.sum(axis=1, keepdims=True)
+    return np.where(present, filled - means, 0.0)
+
+
+def _row_correlation(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Pearson correlation of every row pair of centred arrays (0 = not observed)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Row-wise dot products without temporaries.
+        return np.einsum("ij,ij->i", x, y) / np.sqrt(
+            np.einsum("ij,ij->i", x, x) * np.einsum("ij,ij->i", y, y)
+        )
+
+
+def information_coefficients(
+    total_returns: pd.DataFrame,
+    feature_columns,
+    target: str = "F_1_d_returns",
+    method: str = "spearman",
+    min_observations: int = MIN_IC_OBSERVATIONS,
+) -> pd.DataFrame:
+    """
+    Per-date information coefficient of every feature against the target return.
+
+    Each date correlates the feature with the target across the tickers that have
+    both. "spearman" (rank IC) ranks both once per date on the wide array, with ties
+    averaged; "pearson" uses the raw values.
+
+    Input:  long (Ticker, Date) frame, feature columns, target column, method and the
+            minimum number of tickers per date
+    Output: date x feature DataFrame of ICs
+    """
+    if method not in ("spearman", "pearson"):
+        raise ValueError(
+            f"Unknown IC method {method!r}; expected 'spearman' or 'pearson'"
+        )
+    date_codes, ticker_codes, dates, tickers = wide_codes(total_returns.index)
+    shape = (len(dates), len(tickers))
+    target_values = _wide(total_returns[target], date_codes, ticker_codes, shape)
+
+    ics, centred_target, target_mask = {}, None, None
+    for feature in feature_columns:
+        values = _wide(total_returns[feature], date_codes, ticker_codes, shape)
+        mask = ~np.isnan(values) & ~np.isnan(target_values)
+        # Both sides are taken over the same tickers; the target's side is reused for
+        # every feature with the same coverage.
+        if target_mask is None or not np.array_equal(mask, target_mask):
+            target_mask = mask
+            centred_target = (
+                _centred_ranks(np.where(mask, target_values, np.nan))
+                if method == "spearman"
+                else _centred(target_values, mask)
+            )
+        centred_feature = (
+            _centred_ranks(np.where(mask, values, np.nan))
+            if method == "spearman"
+            else _centred(values, mask)
+        )
+        ic = _row_correlation(centred_feature, centred_target)
+        ic[mask.sum(axis=1) < min_observations] = np.nan
+        ics[feature] = ic
+    return pd.DataFrame(ics, index=dates)
+
+
+def ic_summary(ic: pd.DataFrame) -> pd.DataFrame:
+    """
+    Feature x [IC mean, IC std, IC IR, t-stat, hit rate, dates] over the whole period.
+
+    The t-stat tests a zero mean IC (mean / (std / sqrt(dates))); the hit rate is the
+    share of dates with a positive IC.
+    """
+    count = ic.count()
+    mean, std = ic.mean(), ic.std()
+    return pd.DataFrame(
+        {
+            "IC mean": mean,
+            "IC std": std,
+            "IC IR": mean / std,
+            "t-stat": mean / std * np.sqrt(count),
+            "hit rate": (ic > 0).sum() / count,
+            "dates": count,
+        }
+    )
+
+
+def rolling_ic(ic: pd.DataFrame, window: int = 252) -> dict:
+    """
+    Rolling IC mean and t-stat over `window` dates (about a year by default).
+
+    Output: {"mean": date x feature, "t-stat": date x feature}
+    """
+    rolling = ic.rolling(window, min_periods=window // 2)
+    mean = rolling.mean()
+    return {"mean": mean, "t-stat": mean / rolling.std() * np.sqrt(rolling.count())}
@@ -0,0 +1,231 @@
+"""
+Content-addressed on-disk cache for derived features.
+
+Entries are keyed on a hash of the input data plus the function name and parameters,
+so a changed price cache (new days, new tickers, revised prices) produces a new key
+and stale entries are simply never read again; they age out under the size bound,
+least recently used first.
+"""
+
+import hashlib  # hashlib.blake2b (stdlib) fingerprints inputs and parameters.
+import json  # json (stdlib) serialises the parameters into the key.
+import os  # os.utime (stdlib) marks an entry as recently used.
+from pathlib import Path  # pathlib.Path (stdlib) gives cross-platform filesystem paths.
+
+import numpy as np  # Raw array bytes feed the fingerprint.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course.price_matrix import PriceMatrix  # Wide date x ticker container.
+from ai_course.price_store import replace_atomically  # Crash-safe file writes.
+
+DEFAULT_CACHE_DIR = Path(__file__).with_name("feature_cache")  # Next to the module.
+DEFAULT_MAX_BYTES = 2 * 2**30  # Size bound of the cache directory (2 GB).
+CACHE_VERSION = 2  # Bump when a cached function's output format changes.
+
+
+def _update_with_array(digest, array) -> None:
+    array = np.ascontiguousarray(array)
+    digest.update(f"{array.dtype.str}{array.shape}".encode())
+    digest.update(array.view(np.uint8).reshape(-1) if array.size else b"")
+
+
+def _update_with_index(digest, index: pd.Index) -> None:
+    if isinstance(index, pd.MultiIndex):
+        for level, codes in zip(index.levels, index.codes):
+            _update_with_index(digest, level)
+            _update_with_array(digest, codes)
+    elif isinstance(index, pd.DatetimeIndex):
+        _update_with_array(digest, index.as_unit("ns").asi8)
+    elif index.dtype.kind in "biuf":
+        _update_with_array(digest, index.to_numpy())
+    else:
+        digest.update("\0".join(map(str, index)).encode())
+
+
+def _column_values(label, column: pd.Series) -> np.ndarray:
+    """Values of one column as a plain array; only numeric, bool and datetime columns."""
+    values = column.to_numpy()
+    if values.dtype.kind not in "biufcmM":
+        raise TypeError(
+            f"Column {label!r} has dtype {column.dtype}; the feature cache only holds "
+            "numeric, bool and datetime columns (encode strings as categorical codes)"
+        )
+    return values
+
+
+def fingerprint(data) -> str:
+    """
+    Content hash of a DataFrame, Series or PriceMatrix: values, index and column labels.
+
+    Hashes the raw array bytes instead of hashing row by row, so fingerprinting a
+    25-year S&P 500 price matrix takes a few tens of milliseconds. Columns must be
+    numeric, bool or datetime (TypeError otherwise); index labels may be anything.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(data, PriceMatrix):
+        _update_with_array(digest, data.values)
+        _update_with_index(digest, data.dates)
+        _update_with_index(digest, data.tickers)
+        return digest.hexdigest()
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    _update_with_index(digest, data.index)
+    _update_with_index(digest, data.columns)
+    for label, column in data.items():
+        _update_with_array(digest, _column_values(label, column))
+    return digest.hexdigest()
+
+
+def _index_arrays(index: pd.Index, prefix: str) -> dict:
+    """Arrays describing an index: per level its values and the integer codes."""
+    if not isinstance(index, pd.MultiIndex):
+        index = pd.MultiIndex.from_arrays([index])
+    arrays = {f"{prefix}_names": np.array([str(name) for name in index.names])}
+    for position, (level, codes) in enumerate(zip(index.levels, index.codes)):
+        if isinstance(level, pd.CategoricalIndex):
+            # Categorical levels (compact frames) keep their dtype: codes plus categories.
+            categories = level.categories.to_numpy()
+            arrays[f"{prefix}_categories_{position}"] = (
+                categories
+                if categories.dtype.kind in "biufM"
+                else categories.astype(str)
+            )
+            arrays[f"{prefix}_ordered_{position}"] = np.array(level.ordered)
+            values = np.asarray(level.codes)
+        else:
+            values = level.to_numpy()
+        arrays[f"{prefix}_level_{position}"] = (
+            values if values.dtype.kind in "biufM" else values.astype(str)
+        )
+        arrays[f"{prefix}_codes_{position}"] = np.asarray(codes)
+    return arrays
+
+
+def _level_from_arrays(stored, prefix: str, position: int) -> pd.Index:
+    values = stored[f"{prefix}_level_{position}"]
+    if f"{prefix}_categories_{position}" not in stored:
+        return pd.Index(values)
+    return pd.CategoricalIndex(
+        pd.Categorical.from_codes(
+            values,
+            categories=stored[f"{prefix}_categories_{position}"],
+            ordered=bool(stored[f"{prefix}_ordered_{position}"]),
+        )
+    )
+
+
+def _index_from_arrays(stored, prefix: str) -> pd.Index:
+    names = list(stored[f"{prefix}_names"])
+    levels = [_level_from_arrays(stored, prefix, i) for i in range(len(names))]
+    codes = [stored[f"{prefix}_codes_{i}"] for i in range(len(names))]
+    if len(names) == 1:
+        return levels[0][codes[0]].rename(names[0] if names[0] != "None" else None)
+    # Codes are reused as stored, so no factorisation happens on load.
+    return pd.MultiIndex(
+        levels=levels, codes=codes, names=names, verify_integrity=False
+    )
+
+
+class FeatureCache:
+    """
+    Size-bounded LRU cache of DataFrames stored as uncompressed .npz files.
+
+    Each entry is one `<key>.npz` holding one array per column (numeric, bool or
+    datetime columns only) plus the index as level values and integer codes (a binary
+    columnar layout that loads without parsing or re-factorising the index). A hit refreshes the entry's modification time, and
+    writes evict the least recently used entries once the directory grows past
+    `max_bytes`.
+    """
+
+    suffix = ".npz"
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(name: str, data, params: dict) -> str:
+        """Cache key for `name` applied to `data` with `params`."""
+        description = json.dumps(
+            {"name": name, "version": CACHE_VERSION, "params": params},
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(description.encode())
+        digest.update(fingerprint(data).encode())
+        return f"{name}-{digest.hexdigest()}"
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (key + self.suffix)
+
+    def get(self, key: str):
+        """Return the cached DataFrame (or Series) for `key`, or None on a miss."""
+        path = self._path(key)
+        try:
+            stored = np.load(path)
+        except FileNotFoundError:
+            return None
+        with stored:
+            columns = _index_from_arrays(stored, "columns")
+            frame = pd.DataFrame(
+                {
+                    position: stored[f"column_{position}"]
+                    for position in range(len(columns))
+                },
+                index=_index_from_arrays(stored, "index"),
+            )
+            frame.columns = columns
+            is_series = bool(stored["series"])
+        os.utime(path)  # Mark as recently used for the LRU eviction.
+        return frame.iloc[:, 0] if is_series else frame
+
+    def put(self, key: str, result) -> None:
+        """
+        Store a DataFrame or Series under `key`, then evict beyond the size bound.
+
+        Raises TypeError for columns that are not numeric, bool or datetime: the
+        entries are loaded without pickle, so object arrays could not be read back.
+        """
+        frame = result.to_frame() if isinstance(result, pd.Series) else result
+        arrays = {
+            "series": np.array(isinstance(result, pd.Series)),
+            **_index_arrays(frame.index, "index"),
+            **_index_arrays(frame.columns, "columns"),
+        }
+        for position, (label, column) in enumerate(frame.items()):
+            arrays[f"column_{position}"] = _column_values(label, column)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        replace_atomically(self._path(key), lambda handle: np.savez(handle, **arrays))
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in `max_bytes`."""
+        entries = sorted(
+            (entry.stat().st_mtime, entry.stat().st_size, entry)
+            for entry in self.directory.glob("*" + self.suffix)
+        )
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        """Delete every entry."""
+        for entry in self.directory.glob("*" + self.suffix):
+            entry.unlink(missing_ok=True)
+
+    def get_or_compute(self, name: str, data, params: dict, compute):
+        """
+        Return the cached result of `compute()` for (`name`, `data`, `params`),
+        computing and storing it on a miss.
+        """
+        key = self.key(name, data, params)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        result = compute()
+        self.put(key, result)
+        return result
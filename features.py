@@ -0,0 +1,102 @@
+import numpy as np  # NumPy does the arithmetic on the wide date x ticker array.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+
+def trailing_returns(values: np.ndarray, window: int) -> np.ndarray:
+    """Percentage change over the previous `window` rows (same result as DataFrame.pct_change)."""
+    out = np.full(values.shape, np.nan, dtype=values.dtype)
+    if window < len(values):
+        out[window:] = values[window:] / values[:-window] - 1
+    return out
+
+
+def forward_returns(values: np.ndarray, horizon: int) -> np.ndarray:
+    """Percentage change over the next `horizon` rows, aligned with the current row."""
+    out = np.full(values.shape, np.nan, dtype=values.dtype)
+    if horizon < len(values):
+        out[:-horizon] = values[horizon:] / values[:-horizon] - 1
+    return out
+
+
+def momentum_name(window: int) -> str:
+    """Column name of a trailing-return feature, e.g. '5_d_returns'."""
+    return str(window) + "_d_returns"
+
+
+def forward_name(horizon: int) -> str:
+    """Column name of a forward-return target, e.g. 'F_1_d_returns'."""
+    return "F_" + str(horizon) + "_d_returns"
+
+
+def build_return_features(
+    values: np.ndarray, list_of_momentums, forecast_horizons=(1,)
+) -> dict[str, np.ndarray]:
+    """
+    Input:  date x ticker price array, momentum windows and forward horizons
+    Output: {column name: date x ticker array}; forward returns first, then momentums
+    """
+    features = {}
+    for horizon in forecast_horizons:
+        features[forward_name(horizon)] = forward_returns(values, horizon)
+    for window in list_of_momentums:
+        features[momentum_name(window)] = trailing_returns(values, window)
+    return features
+
+
+def kept_features(values: np.ndarray, list_of_momentums, forecast_horizons=(1,)):
+    """
+    Return features with the rows `computing_returns` drops blanked out.
+
+    Input:  date x ticker price array, momentum windows and forward horizons
+    Output: ({column name: date x ticker array}, boolean date x ticker mask of the
+            rows where every feature exists)
+    """
+    wide = build_return_features(values, list_of_momentums, forecast_horizons)
+    kept = np.logical_and.reduce([~np.isnan(column) for column in wide.values()])
+    return {name: np.where(kept, column, np.nan) for name, column in wide.items()}, kept
+
+
+def stack_features(
+    features: dict[str, np.ndarray],
+    dates,
+    tickers,
+    dropna: bool = True,
+    categorical_tickers: bool = False,
+) -> pd.DataFrame:
+    """
+    Stack wide date x ticker feature arrays into one long (Ticker, Date) DataFrame.
+
+    Tickers are sorted and each ticker's dates stay in order, matching the layout
+    produced by `unstack` followed by an index merge. With `dropna`, rows where any
+    feature is missing are removed in a single pass. With `categorical_tickers` the
+    Ticker level is categorical, so materialising it (get_level_values, reset_index)
+    yields integer codes instead of one Python string per row.
+    """
+    dates, tickers = pd.Index(dates), pd.Index(tickers)
+    order = np.argsort(tickers.to_numpy(dtype=str), kind="stable")
+    n_dates, n_tickers = len(dates), len(tickers)
+
+    # Ticker-major flattening: row k is (ticker k // n_dates, date k % n_dates).
+    columns = {
+        name: np.ascontiguousarray(array[:, order].T).reshape(-1)
+        for name, array in features.items()
+    }
+    ticker_codes = np.repeat(np.arange(n_tickers), n_dates)
+    date_codes = np.tile(np.arange(n_dates), n_tickers)
+
+    if dropna and columns:
+        keep = np.ones(n_dates * n_tickers, dtype=bool)
+        for column in columns.values():
+            keep &= ~np.isnan(column)
+        columns = {name: column[keep] for name, column in columns.items()}
+        ticker_codes, date_codes = ticker_codes[keep], date_codes[keep]
+
+    ticker_level = tickers[order]
+    if categorical_tickers:
+        ticker_level = pd.CategoricalIndex(ticker_level, name=tickers.name)
+    index = pd.MultiIndex(
+        levels=[ticker_level, dates],
+        codes=[ticker_codes, date_codes],
+        names=["Ticker", "Date"],
+    )  # Building from integer codes avoids materialising tuples of labels.
+    return pd.DataFrame(columns, index=index)
@@ -2,22 +2,40 @@ from pathlib import (
     Path,
 )  # pathlib.Path (Python stdlib) gives cross-platform filesystem path objects that replace raw strings.
 import io  # io module (stdlib) enables treating strings/bytes as file-like streams, used for read_html parsing.
+import functools  # functools.partial (stdlib) binds the data provider into the cache's fetch callback.
+import logging  # logging (stdlib) reports download progress without printing from library code.
+import contextlib  # contextlib.redirect_stdout (stdlib) silences printouts in validate_compact.
 
 import pandas as pd  # pandas is the primary data analysis library; here we shorten the module name to pd by convention.
-import requests  # requests is a third-party HTTP client (https://requests.readthedocs.io) used to download web content.
-import yfinance as yf  # yfinance (https://pypi.org/project/yfinance/) wraps Yahoo Finance APIs to fetch market data.
-import matplotlib.pyplot as plt  # matplotlib is the standard plotting library; pyplot module provides MATLAB-like plotting API.
+
+from ai_course import backtest  # Many trading rules in one vectorised pass.
+from ai_course import data_quality  # Vectorised price validation and cleaning at load time.
+from ai_course import downloader  # Concurrent, batched market-data downloads with retries.
+from ai_course import features  # Vectorised return features on the wide price array.
+from ai_course import indicators  # Vectorised RSI across all tickers at once.
+from ai_course import metrics  # Headless CAGR / Sharpe / drawdown engine.
+from ai_course import portfolio  # Sparse positions, weighting schemes, turnover and costs.
+from ai_course import plotting  # Optional chart layer; imports matplotlib only when drawing.
+from ai_course import report as reporting  # Headless PNG/HTML reports in worker processes.
+from ai_course import profiling  # Stage timers; no-ops unless a profiling.profile() block is active.
+from ai_course import signals  # Vectorised trading rules that compile to array expressions.
+from ai_course import price_store  # Pluggable on-disk storage for the date x ticker price matrix.
+from ai_course.feature_cache import FeatureCache  # Content-addressed cache, also for cleaned prices.
+from ai_course.price_cache import PriceCache  # Range-aware cache that only fetches missing blocks.
+from ai_course.price_matrix import PriceMatrix, wide_codes  # Compact wide date x ticker container.
 
 USER_AGENT = "Mozilla/5.0"  # Spoof a modern browser User-Agent so Wikipedia serves the page without blocking the request.
 S_AND_P_500_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"  # URL where the current S&P 500 table lives.
 MIN_REQUIRED_NUM_OBS_PER_TICKER = 100  # Minimum number of non-missing price observations we require for each ticker column.
 
+logger = logging.getLogger(__name__)  # Module logger; configure logging (e.g. logging.basicConfig) to see progress.
+
 
 def _fetch_sp500_tickers() -> (
     list[str]
 ):  # Leading underscore marks this helper as internal; return type lists ticker symbols.
     """Fetch the current S&P 500 ticker list from Wikipedia."""
-    response = requests.get(  # requests.get issues an HTTP GET (source: requests library) and returns a Response object.
+    response = downloader.http_session().get(  # Session.get issues an HTTP GET over a pooled keep-alive connection and returns a Response object.
         S_AND_P_500_URL,  # Target the constant Wikipedia URL defined above.
         headers={
             "User-Agent": USER_AGENT
@@ -35,12 +53,18 @@ def _fetch_sp500_tickers() -> (
 
 
 def _filter_dense_tickers(
-    prices: pd.DataFrame,
-) -> pd.DataFrame:  # Helper expects a pandas DataFrame and returns another DataFrame.
+    prices,
+):  # Helper expects a pandas DataFrame (or a PriceMatrix) and returns the same type.
     """Keep only tickers with sufficient observation count."""
     ticker_counts = (
         prices.count()
-    )  # DataFrame.count() (pandas) tallies non-NA values for each column.
+    )  # DataFrame.count() (pandas) / PriceMatrix.count() tally non-NA values for each ticker.
+    if (ticker_counts.to_numpy() >= MIN_REQUIRED_NUM_OBS_PER_TICKER).all():
+        return prices  # Nothing to drop: keep the (memory-mapped) prices instead of copying them.
+    if isinstance(prices, PriceMatrix):
+        return prices.select(
+            ticker_counts.to_numpy() >= MIN_REQUIRED_NUM_OBS_PER_TICKER
+        )  # Boolean mask over the ticker axis keeps only the dense tickers.
     valid_ticker_index = ticker_counts[
         ticker_counts >= MIN_REQUIRED_NUM_OBS_PER_TICKER
     ].index  # Boolean mask keeps tickers meeting the minimum observation threshold and retrieves their column labels.
@@ -49,58 +73,103 @@ def _filter_dense_tickers(
     ]  # Subset the DataFrame to only those dense tickers by label selection.
 
 
+def _download_close_prices(
+    tickers, start_date: str, end_date: str, provider=None
+) -> downloader.DownloadResult:
+    """
+    Download close prices for `tickers` over [start_date, end_date) in concurrent batches.
+
+    Returns the downloader.DownloadResult, so PriceCache can tell failed tickers from
+    tickers without trading days in the range.
+    """
+    logger.info(
+        "Searching %d tickers", len(tickers)
+    )  # Report how many tickers will be requested.
+
+    result = downloader.download_prices(
+        tickers, start_date, end_date, provider=provider
+    )  # Batches run on a bounded worker pool with retries; Yahoo Finance is the default provider.
+    if result.failed:
+        logger.warning(
+            "%d tickers failed: %s", len(result.failed), sorted(result.failed)
+        )  # PriceCache leaves failed tickers out of the coverage and retries them on the next call.
+    return result
+
+
+def _clean_prices(historical_prices, store):
+    """
+    Validate and clean freshly loaded prices with data_quality.clean_prices.
+
+    The cleaned prices and the per-ticker quality report are cached next to the price
+    store (`<store>.quality`), keyed on the raw prices: an unchanged cache skips the
+    work, a refresh recomputes it once. Get the report with
+    data_quality.clean_prices(raw_prices, cache=FeatureCache(<that directory>)).
+    """
+    with profiling.stage("clean") as timed:
+        result = data_quality.clean_prices(
+            historical_prices,
+            cache=FeatureCache(store.path.with_name(store.path.name + ".quality")),
+        )
+        timed.observe(result.prices)
+    flags = result.report[
+        ["non_positive", "bad_prints", "split_jumps", "extreme_returns", "stale_days"]
+    ]
+    logger.info(
+        "Data quality: %d of %d tickers flagged (%s)",
+        (flags.sum(axis=1) > 0).sum(),
+        len(flags),
+        ", ".join(f"{name}={count}" for name, count in flags.sum().items()),
+    )
+    return result.prices
+
+
 def create_ticker_hist_prices(
-    tickers, start_date: str = "2025-10-01", end_date: str = "2025-10-24"
+    tickers,
+    start_date: str = "2025-10-01",
+    end_date: str = "2025-10-24",
+    backend: str = price_store.DEFAULT_PRICE_STORE_BACKEND,
+    provider=None,
+    clean: bool = False,
+    mmap: bool = False,
 ) -> pd.DataFrame:  # Public API: optional ISO date strings; returns a pandas DataFrame.
     """
     Returns historical prices for requested tickers between the provided dates.
 
-    The data is cached to `historical_prices_tickers.csv` alongside this module to avoid
-    hitting the Yahoo Finance API on every invocation.
+    The data is cached in the `historical_prices_tickers` price store (see price_store.py)
+    alongside this module. The cache records which (ticker, date range) blocks it holds,
+    so only tickers and dates missing from it are downloaded. `provider` selects the data
+    source (see downloader.py); Yahoo Finance is used by default. With `clean` the
+    prices pass through data_quality.clean_prices (see _clean_prices). With `mmap` the
+    frame wraps the store's read-only memory map instead of a private copy: no load
+    time or memory per process, but in-place edits (`prices.iloc[0, 0] = x`,
+    `fillna(inplace=True)`) raise "read-only"; use `.copy()` first.
     """
-    data_path = Path(__file__).with_name(
-        "historical_prices_tickers.csv"
-    )  # Path(__file__) builds a path to this file; with_name replaces the filename so cache sits next to the module.
-
-    if (
-        data_path.exists()
-    ):  # Path.exists() (pathlib) checks whether the CSV cache is already present.
-        print(
-            "Loading historical prices from local CSV file."
-        )  # Notify the user that we are using the cached dataset.
-        historical_prices = pd.read_csv(
-            data_path, index_col=0, parse_dates=True
-        )  # pandas.read_csv loads the cached table, using the first column as the Date index and parsing to datetime objects.
-    else:
-        print(
-            "Downloading historical prices from Yahoo Finance."
-        )  # Message for the slower path that hits the network.
-        if tickers is None:
-            tickers = (
-                _fetch_sp500_tickers()
-            )  # Reuse our helper to grab the current ticker list.
-        print(
-            f"Searching {len(tickers)} tickers"
-        )  # f-string reports how many tickers yfinance will request.
-
-        historical_prices = yf.download(  # yfinance.download queries Yahoo's API for historical prices and returns a pandas DataFrame with a MultiIndex on columns.
-            tickers,  # Provide the full ticker list to download all series at once.
-            start=start_date,  # Lower bound for the historical period (yfinance accepts YYYY-MM-DD strings).
-            end=end_date,  # Upper bound end date (exclusive) for the download.
-            progress=True,  # Disable yfinance's progress bar so scripts/logs stay clean.
-            group_by="ticker",  # Request data grouped by ticker so column index is (field, ticker).
+    cache = PriceCache(
+        price_store.open_price_store(
+            Path(__file__).with_name("historical_prices_tickers"), backend
         )
-
-        # Retain only close prices to minimise storage and match downstream expectations.
-        historical_prices = historical_prices.loc[
-            :, historical_prices.columns.get_level_values(1) == "Close"
-        ]  # Use DataFrame.loc with a boolean mask on the top-level MultiIndex to keep only "Close" series.
-        historical_prices.columns = historical_prices.columns.droplevel(
-            1
-        )  # Drop the top level ("Close") to leave plain ticker symbols as column labels.
-        historical_prices.to_csv(
-            data_path
-        )  # Persist the prepared DataFrame to CSV so the next run can reuse it.
+    )  # Path(__file__) builds a path to this file; with_name replaces the filename so the cache sits next to the module.
+
+    if tickers is None:
+        tickers = (
+            cache.store.tickers() if cache.store.exists() else _fetch_sp500_tickers()
+        )  # Reuse the cached universe, or grab the current ticker list on the first run.
+
+    with profiling.stage("load") as timed:
+        historical_prices = timed.observe(
+            cache.get(
+                tickers,
+                start_date,
+                end_date,
+                fetch=functools.partial(_download_close_prices, provider=provider),
+            )
+        )  # Fetch only the missing blocks, merge them into the store and read back the request.
+    if not mmap:
+        historical_prices = (
+            historical_prices.copy()
+        )  # A writable frame in memory, detached from the store's memory map.
+    if clean:
+        historical_prices = _clean_prices(historical_prices, cache.store)
 
     # filtered_prices = _filter_dense_tickers(historical_prices)  # Apply the density filter regardless of cache path to ensure quality data.
     # print(filtered_prices.head())  # Uncomment for a quick preview of the filtered data during debugging.
@@ -108,241 +177,228 @@ def create_ticker_hist_prices(
 
 
 def create_sp500_historical_prices(
-    start_date: str = "2000-01-01", end_date: str = "2025-10-21"
-) -> pd.DataFrame:  # Public API: optional ISO date strings; returns a pandas DataFrame.
+    start_date: str = "2000-01-01",
+    end_date: str = "2025-10-21",
+    tickers=None,
+    backend: str = price_store.DEFAULT_PRICE_STORE_BACKEND,
+    provider=None,
+    as_matrix: bool = False,
+    compact: bool = False,
+    clean: bool = False,
+    mmap: bool = False,
+):  # Public API: optional ISO date strings; returns a pandas DataFrame (or a PriceMatrix).
     """
     Return S&P 500 adjusted close prices between the provided dates.
 
-    The data is cached to `historical_prices.csv` alongside this module to avoid
-    hitting the Yahoo Finance API on every invocation.
+    The data is cached in the `historical_prices` price store (see price_store.py)
+    alongside this module. The cache records which (ticker, date range) blocks it holds,
+    so a refresh with a later `end_date` only downloads the missing days.
+    Pass `tickers` to load only a subset of the universe and `provider` to choose the
+    data source (see downloader.py; Yahoo Finance by default). With `as_matrix` the
+    prices come back as a PriceMatrix, which computing_returns and validate_compact
+    accept; compute_BM_perf takes one of returns (prices.forward_returns(1)), and the
+    RSI and strategy functions take the long frame computing_returns builds.
+    With `compact` the prices are float32, half the memory (see validate_compact for
+    the effect on returns, RSI and performance figures). With `clean` bad prints,
+    non-positive prices and stale runs are removed before the density filter (see
+    _clean_prices), so the filter counts only usable observations. With `mmap` the
+    prices wrap the store's read-only memory map instead of a private copy, so
+    processes share one copy of the matrix; in-place edits then raise "read-only"
+    (use `.copy()` first).
     """
-    data_path = Path(__file__).with_name(
-        "historical_prices.csv"
-    )  # Path(__file__) builds a path to this file; with_name replaces the filename so cache sits next to the module.
-
-    if (
-        data_path.exists()
-    ):  # Path.exists() (pathlib) checks whether the CSV cache is already present.
-        print(
-            "Loading historical prices from local CSV file."
-        )  # Notify the user that we are using the cached dataset.
-        filtered_prices = pd.read_csv(
-            data_path, index_col=0, parse_dates=True
-        )  # pandas.read_csv loads the cached table, using the first column as the Date index and parsing to datetime objects.
-    else:
-        print(
-            "Downloading historical prices from Yahoo Finance."
-        )  # Message for the slower path that hits the network.
-        sp500_tickers = (
-            _fetch_sp500_tickers()
-        )  # Reuse our helper to grab the current ticker list.
-        print(
-            f"Searching {len(sp500_tickers)} tickers"
-        )  # f-string reports how many tickers yfinance will request.
-
-        historical_prices = yf.download(  # yfinance.download queries Yahoo's API for historical prices and returns a pandas DataFrame with a MultiIndex on columns.
-            sp500_tickers,  # Provide the full ticker list to download all series at once.
-            start=start_date,  # Lower bound for the historical period (yfinance accepts YYYY-MM-DD strings).
-            end=end_date,  # Upper bound end date (exclusive) for the download.
-            progress=True,  # Disable yfinance's progress bar so scripts/logs stay clean.
-            group_by="ticker",  # Request data grouped by ticker so column index is (field, ticker).
+    cache = PriceCache(
+        price_store.open_price_store(
+            Path(__file__).with_name("historical_prices"), backend
         )
-
-        # Retain only close prices to minimise storage and match downstream expectations.
-        historical_prices = historical_prices.loc[
-            :, historical_prices.columns.get_level_values(1) == "Close"
-        ]  # Use DataFrame.loc with a boolean mask on the top-level MultiIndex to keep only "Close" series.
-        historical_prices.columns = historical_prices.columns.droplevel(
-            1
-        )  # Drop the top level ("Close") to leave plain ticker symbols as column labels.
-        filtered_prices = _filter_dense_tickers(
+    )  # Path(__file__) builds a path to this file; with_name replaces the filename so the cache sits next to the module.
+
+    if tickers is None:
+        tickers = (
+            cache.store.tickers() if cache.store.exists() else _fetch_sp500_tickers()
+        )  # Reuse the cached universe, or grab the current ticker list on the first run.
+
+    with profiling.stage("load") as timed:
+        historical_prices = timed.observe(
+            cache.get(
+                tickers,
+                start_date,
+                end_date,
+                fetch=functools.partial(_download_close_prices, provider=provider),
+            )
+        )  # Fetch only the missing blocks, merge them into the store and read back the request.
+    if not mmap:
+        historical_prices = (
+            historical_prices.copy()
+        )  # A writable frame in memory, detached from the store's memory map.
+    if as_matrix:
+        historical_prices = PriceMatrix.from_frame(
             historical_prices
+        )  # Wrap the loaded array without copying it.
+    if clean:
+        historical_prices = _clean_prices(
+            historical_prices, cache.store
+        )  # Cleaned in float64, before any compact cast.
+    if compact:
+        historical_prices = historical_prices.astype(
+            "float32"
+        )  # About 7 significant digits, ample for prices (see validate_compact).
+    with profiling.stage("filter") as timed:
+        filtered_prices = timed.observe(
+            _filter_dense_tickers(historical_prices)
         )  # Apply the density filter regardless of cache path to ensure quality data.
-        filtered_prices.to_csv(
-            data_path
-        )  # Persist the prepared DataFrame to CSV so the next run can reuse it.
 
     # print(filtered_prices.head())  # Uncomment for a quick preview of the filtered data during debugging.
     return filtered_prices  # Return the filtered DataFrame to the caller for further processing.
 
 
 def computing_returns(
-    historical_prices, list_of_momentums
+    historical_prices,
+    list_of_momentums,
+    forecast_horizons=(1,),
+    cache=None,
+    compact: bool = False,
+    universe=None,
 ):  # Function computes forward and momentum-based returns; parameters are expected pandas objects.
     """
-    Input:  dataframe of historical prices
+    Input:  dataframe (or PriceMatrix) of historical prices
             list of momentums
-    Output: returns dataframe with returns over the momentum list and one day forward return
+            forecast horizons (default: one day forward)
+            cache: optional feature_cache.FeatureCache to memoize the result on disk
+            compact: float32 columns and a categorical Ticker level (see validate_compact)
+            universe: optional universe.Membership; rows of tickers outside the index
+                      on that date are dropped (point-in-time, survivorship-free)
+    Output: returns dataframe with returns over the momentum list and the forward returns
+
+    All windows are computed together on the wide date x ticker array and stacked into
+    the long (Ticker, Date) layout once at the end, so extra windows add little cost.
     """
 
-    # Initialize the forecast horizon
-    forecast_horizon = 1  # Use a one-day lookahead to define how far forward we compute percentage changes.
-
-    # compute the forward returns by taking the percentage change of close price
-    f_returns = historical_prices.pct_change(
-        forecast_horizon
-    )  # DataFrame.pct_change(n) (pandas) computes percent change over n periods along the index.
-
-    # We then shift the forward returns
-    f_returns = f_returns.shift(
-        -forecast_horizon
-    )  # DataFrame.shift(-n) moves data upward so each row stores the future return aligned with the current date.
-
-    # Pivot the returns dataframe to have a multi-index with date and ticker
-    f_returns = pd.DataFrame(
-        f_returns.unstack()
-    )  # Series/DataFrame.unstack() (pandas) pivots columns into a MultiIndex; wrapping with DataFrame makes sure we keep a 2D structure.
-    f_returns.index.set_names(
-        ["Ticker", "Date"], inplace=True
-    )  # Assign explicit names to the MultiIndex levels for clarity downstream.
-
-    # Name the column based on the forecast horizon
-    name = (
-        "F_" + str(forecast_horizon) + "_d_returns"
-    )  # Build a descriptive column name like 'F_1_d_returns' using string concatenation.
-    f_returns.rename(
-        columns={0: name}, inplace=True
-    )  # DataFrame.rename lets us replace the default column label (0) with our descriptive name.
-    print(f_returns.head())  # Display the top rows to validate the transformation.
-
-    # Initialise total_returns with forward returns
-    total_returns = f_returns  # Start aggregating features into total_returns, beginning with the forward returns DataFrame.
-
-    for (
-        i
-    ) in (
-        list_of_momentums
-    ):  # Iterate through each momentum window specified by the caller.
-        # Compute returns for each momentum value
-        feature = historical_prices.pct_change(
-            i
-        )  # Calculate trailing percentage change over i periods using pandas pct_change.
-        feature = pd.DataFrame(
-            feature.unstack()
-        )  # Reshape the feature the same way as before so we can merge on (Ticker, Date).
-        feature.index.set_names(
-            ["Ticker", "Date"], inplace=True
-        )  # Align index level names with forward returns for consistent merging.
-
-        # Name the column based on the momentum value
-        name = (
-            str(i) + "_d_returns"
-        )  # Produce readable names like '5_d_returns' for each momentum window.
-        feature.rename(
-            columns={0: name}, inplace=True
-        )  # Rename the value column so each feature has an informative label.
-
-        # Merge the computed feature returns with total_returns based on ticker and date
-        total_returns = pd.merge(
-            total_returns, feature, left_index=True, right_index=True, how="outer"
-        )  # pandas.merge with outer join preserves rows even when some features are missing, aligning on the MultiIndex indices.
-
-        # drop any rows with NaN values
-        total_returns.dropna(
-            axis=0, how="any", inplace=True
-        )  # Drop rows containing any NaNs so downstream models receive complete data (DataFrame.dropna API).
-        # print(total_returns.head())  # Show a snapshot after each merge to monitor the incremental feature set.
+    if cache is not None:
+        return cache.get_or_compute(
+            "computing_returns",
+            historical_prices,
+            {
+                "list_of_momentums": list(list_of_momentums),
+                "forecast_horizons": list(forecast_horizons),
+                "compact": compact,
+                "universe": None if universe is None else universe.fingerprint(),
+            },
+            lambda: computing_returns(
+                historical_prices,
+                list_of_momentums,
+                forecast_horizons,
+                compact=compact,
+                universe=universe,
+            ),
+        )  # Keyed on the price content, so a refreshed price cache computes afresh.
+
+    if not isinstance(historical_prices, PriceMatrix):
+        historical_prices = PriceMatrix.from_frame(
+            historical_prices, dtype="float64"
+        )  # Work on the raw date x ticker array; no copy when the dtype already matches.
+    values = historical_prices.values.astype(
+        "float64", copy=False
+    )  # Returns are always computed in float64, also from compact float32 prices.
+
+    with profiling.stage("features") as timed:
+        # Compute every forward return (F_<h>_d_returns) and momentum (<i>_d_returns) in one pass
+        wide_features = features.build_return_features(
+            values, list_of_momentums, forecast_horizons
+        )  # Each entry is a percentage change over shifted rows of the same array (see features.py).
+        if universe is not None:
+            wide_features = universe.restrict(
+                wide_features, historical_prices.dates, historical_prices.tickers
+            )  # One membership mask for all features; non-members are dropped with the NaNs.
+        if compact:
+            wide_features = {
+                name: array.astype("float32") for name, array in wide_features.items()
+            }  # Rounded once, after the arithmetic.
+
+        # Pivot to a multi-index with ticker and date and drop rows with any NaN in one go
+        total_returns = timed.observe(
+            features.stack_features(
+                wide_features,
+                historical_prices.dates,
+                historical_prices.tickers,
+                categorical_tickers=compact,
+            )
+        )  # Rows missing any feature are dropped so downstream models receive complete data.
 
     return total_returns  # Return the final feature DataFrame with forward AND momentum-based returns.
 
 
-def compute_BM_perf(total_returns):
+def _print_performance(summary, label):
+    """Print CAGR and Sharpe ratio for one row of a metrics summary table."""
+    print(f"The CAGR of the {label} over the period is {round(summary['CAGR'], 2)} %")
+    print(
+        f"The Sharpe Ratio of the {label} over the period is {round(summary['Sharpe'], 2)}"
+    )
+
+
+def compute_BM_perf(total_returns, plot=True, renderer=None, universe=None):
     """
     Purpose: Compute benchmark performance for investment universe and return cumulative calendar returns.
     Input:  dataframe of total returns with forward and momentum returns
+            (or a PriceMatrix of 1-day forward returns, e.g. prices.forward_returns(1))
+            plot: draw the cumulative and calendar return charts (set False for batch jobs)
+            renderer: optional report.ReportRenderer; the charts are then written to
+                      files in the background instead (combine with plot=False)
+            universe: optional universe.Membership; the benchmark then averages over the
+                      index members of each date only
     """
 
-    total_returns = (
-        total_returns.sort_index()
-    )  # Ensure the DataFrame is sorted by the MultiIndex (Ticker, Date) for consistent processing.
-
     # Compute the daily mean of all stocks. This will be our equal weighted benchmark return.
-    # daily_mean = pd.DataFrame(total_returns.loc[:"F_1_d_returns"].groupby(level="Date").mean())  # Group by Date level of the MultiIndex and average the forward return column across tickers for each date.
-    daily_mean = pd.DataFrame(
-        total_returns.loc[:, "F_1_d_returns"].groupby(level="Date").mean()
-    )  # Group by Date level of the MultiIndex and average the forward return column across tickers for each date.
+    if isinstance(total_returns, PriceMatrix):
+        if total_returns.name != features.forward_name(1):
+            raise ValueError(
+                f"compute_BM_perf needs 1-day forward returns, got a PriceMatrix of "
+                f"{total_returns.name!r}; pass prices.forward_returns(1)"
+            )  # Prices averaged as returns would give a meaningless CAGR and Sharpe.
+        if universe is not None:
+            total_returns = PriceMatrix(
+                universe.restrict(
+                    total_returns.values, total_returns.dates, total_returns.tickers
+                ),
+                total_returns.dates,
+                total_returns.tickers,
+                total_returns.name,
+            )  # Non-members are NaN and drop out of the row-wise mean.
+        daily_mean = pd.DataFrame(
+            {"F_1_d_returns": total_returns.to_frame().mean(axis=1)}
+        ).dropna()  # Row-wise mean over the tickers with a forward return; dates without any are dropped.
+    else:
+        forward_returns = total_returns.loc[:, "F_1_d_returns"]
+        if universe is not None:
+            forward_returns = forward_returns[
+                universe.contains(forward_returns.index)
+            ]  # One gather from the membership mask; frames from computing_returns(universe=...) are already restricted.
+        daily_mean = pd.DataFrame(
+            forward_returns.groupby(level="Date").mean()
+        )  # Group by Date level of the MultiIndex and average the forward return column across tickers for each date.
 
     daily_mean.rename(
         columns={"F_1_d_returns": "S&P500"}, inplace=True
     )  # Rename the column to indicate these are benchmark daily returns.
 
-    # Convert daily returns to cumulative returns
-    cum_returns = pd.DataFrame(
-        (daily_mean[["S&P500"]] + 1).cumprod()
-    )  # Cumulative product of (1 + daily return) yields the value of a $1 investment through time.
-
-    # Plot cumulative returns
-    cum_returns.plot()  # Use DataFrame.plot to visualize cumulative returns with a title.
-    # Customize the plot with title and labels
-    plt.title(
-        "Cumulative Returns over time", fontsize=16, fontweight="bold"
-    )  # Set the plot title.
-    plt.xlabel("Date", fontsize=14)  # Label the x-axis as Date.
-    plt.ylabel(
-        "Cumulative Return", fontsize=14
-    )  # Label the y-axis as Cumulative Return.
-    plt.grid(True)  # Enable grid lines for better readability.
-    plt.xticks(
-        rotation=45
-    )  # Rotate x-axis labels so overlapping dates remain readable.
-    plt.legend(title_fontsize=13, fontsize=12)  # Set legend font size for clarity.
-
-    # Calulate the number of years in the dataset
-    number_of_years = (
-        len(daily_mean) / 252
-    )  # Assuming 252 trading days per year to convert total return to annualized return.
-
-    ending_value = cum_returns["S&P500"].iloc[
-        -1
-    ]  # Get the final cumulative return value for the benchmark.
-    beginning_value = cum_returns["S&P500"].iloc[
-        1
-    ]  # Use the first non-NaN cumulative value as the starting point for CAGR.
-
-    # Compute the Compounded Annual Growth Rate (CAGR)
-    ratio = (
-        ending_value / beginning_value
-    )  # Calculate the ratio of ending to beginning value.
-    cagr = round(
-        (ratio ** (1 / number_of_years) - 1) * 100, 2
-    )  # CAGR formula to annualize the return over the number of years.
-    print(f"The CAGR of the S&P500 benchmark over the period is {cagr} %")
-
-    # Compute the Sharpe Ratio
-    average_daily_return = (
-        daily_mean[["S&P500"]].describe().iloc[1, :] * 252
-    )  # Annualize the mean of daily returns (describe row index 1).
-    standard_dev_daily_return = daily_mean[["S&P500"]].describe().iloc[2, :] * pow(
-        252, 1 / 2
-    )  # Annualize the standard deviation (describe row index 2) using sqrt(252).
-
-    sharp = (
-        average_daily_return / standard_dev_daily_return
-    )  # Sharpe ratio calculation.
-    print(
-        f"The Sharpe Ratio of the S&P500 benchmark over the period is {round(sharp.iloc[0],2)}"
-    )
-
-    ann_returns = (
-        pd.DataFrame(
-            (daily_mean[["S&P500"]] + 1)
-            .groupby(daily_mean.index.get_level_values(0).year)
-            .cumprod()
-        )
-        - 1
-    ) * 100  # Convert each year's cumulative growth into percentage returns.
-    calendar_returns = pd.DataFrame(
-        ann_returns["S&P500"].groupby(daily_mean.index.get_level_values(0).year).last()
-    )  # Extract last value of each year to get calendar-year returns.
-
-    calendar_returns.plot.bar(
-        rot=30, legend="top_left"
-    )  # Plot annual returns as a bar chart with rotated labels for readability.
-    plt.show()  # Display the plot to the user.
+    # Cumulative returns, calendar returns, CAGR, Sharpe, volatility and drawdown in one pass
+    with profiling.stage("benchmark") as timed:
+        report = metrics.compute_metrics(timed.observe(daily_mean))
+    _print_performance(report.summary.loc["S&P500"], "S&P500 benchmark")
+
+    if plot:
+        with profiling.stage("plot"):
+            plotting.plot_cumulative_returns(report.cum_returns, show=False)
+            plotting.plot_calendar_returns(report.calendar_returns)
+    if renderer is not None:
+        renderer.submit(
+            "S&P500 benchmark",
+            reporting.strategy_charts(report.cum_returns, report.calendar_returns),
+            report.summary,
+        )  # Rendered by worker processes while the computation continues.
 
     return (
-        cum_returns,
-        calendar_returns,
+        report.cum_returns,
+        report.calendar_returns,
     )  # Return the cumulative benchmark series (calendar returns kept for potential future use).
 
 
@@ -372,111 +428,251 @@ def calculate_rsi(returns, window=14):
     return rsi
 
 
+def validate_rsi(total_returns, column="1_d_returns", window=14, tickers=None):
+    """
+    Compare the vectorised RSI engine (indicators.compute_rsi) with calculate_rsi.
+
+    Input:  long (Ticker, Date) returns frame, e.g. built from the cached prices
+            return column, RSI window and optionally a subset of tickers to check
+    Output: largest absolute difference between both RSI versions (0.0 when identical);
+            raises AssertionError when they disagree on which rows have an RSI
+    """
+    if tickers is not None:
+        total_returns = total_returns[
+            total_returns.index.get_level_values("Ticker").isin(tickers)
+        ]  # Restrict the comparison to the requested tickers to keep the slow path short.
+
+    reference = total_returns.groupby("Ticker")[[column]].transform(
+        lambda returns: calculate_rsi(returns, window=window)
+    )[column]  # Original per-ticker implementation.
+    vectorised = indicators.compute_rsi(
+        total_returns, column=column, windows=window
+    )  # Whole-matrix implementation.
+
+    assert (
+        reference.isna() == vectorised.isna()
+    ).all(), "RSI engines disagree on which rows have a value"
+    return float((reference - vectorised).abs().max())
+
+
 def compute_strat_perf(
-    total_returns, cum_returns, calendar_returns, trading_strategy, model_name
+    total_returns,
+    cum_returns,
+    calendar_returns,
+    trading_strategy,
+    model_name="RSI",
+    plot=True,
+    compact: bool = False,
+    weighting=None,
+    cost_bps: float = 0.0,
+    renderer=None,
+    universe=None,
 ):
-    """Apply trading strategy to each RSI value"""
-
-    model_name = "RSI"
-    total_returns["Position"] = total_returns[model_name].transform(
-        trading_strategy
-    )  # Apply the trading strategy function to generate positions based on RSI values.
-
-    # Create returns for each trade
-    total_returns[f"{model_name}_Return"] = (
-        total_returns["F_1_d_returns"] * total_returns["Position"]
-    )  # Calculate strategy returns by multiplying forward returns with the position signal.
-
-    # Compute daily mean of strategy returns
-    daily_mean = pd.DataFrame(
-        total_returns.loc[:, f"{model_name}_Return"].groupby(level="Date").mean()
-    )  # Group by Date level of the MultiIndex and average the strategy return column across tickers for each date.
-
-    # Convert daily returns to cumulative returns
-    cum_returns.loc[:, f"{model_name}_Return"] = pd.DataFrame(
-        (daily_mean[f"{model_name}_Return"] + 1).cumprod()
-    )  # Cumulative product of (1 + daily return) yields the value of a $1 investment through time.
-
-    # Plotting the cumulative returns
-    cum_returns.plot()  # Use DataFrame.plot to visualize cumulative returns with a title.
-    # Customize the plot with title and labels
-    plt.title(
-        "Cumulative Returns over time", fontsize=16, fontweight="bold"
-    )  # Set the plot title.
-    plt.xlabel("Date", fontsize=14)  # Label the x-axis as Date.
-    plt.ylabel(
-        "Cumulative Return", fontsize=14
-    )  # Label the y-axis as Cumulative Return.
-    plt.grid(True)  # Enable grid lines for better readability.
-    plt.xticks(
-        rotation=45
-    )  # Rotate x-axis labels so overlapping dates remain readable.
-    plt.legend(title_fontsize=13, fontsize=11)  # Set legend font size for clarity.
-
-    plt.show()  # Display the plot to the user.
-
-    # Calulate the number of years in the dataset
-    number_of_years = (
-        len(daily_mean) / 252
-    )  # Assuming 252 trading days per year to convert total return to annualized return.
-
-    ending_value = cum_returns["S&P500"].iloc[
-        -1
-    ]  # Get the final cumulative return value for the benchmark.
-    beginning_value = cum_returns["S&P500"].iloc[
-        1
-    ]  # Use the first non-NaN cumulative value as the starting point for CAGR.
-
-    # Compute the Compounded Annual Growth Rate (CAGR)
-    ratio = (
-        ending_value / beginning_value
-    )  # Calculate the ratio of ending to beginning value.
-    cagr = round(
-        (ratio ** (1 / number_of_years) - 1) * 100, 2
-    )  # CAGR formula to annualize the return over the number of years.
-    print(f"The CAGR is {cagr} %")
-
-    # Compute the Sharpe Ratio
-    average_daily_return = (
-        daily_mean[["S&P500"]].describe().iloc[1, :] * 252
-    )  # Annualize the mean of daily returns (describe row index 1).
-    standard_dev_daily_return = daily_mean[["S&P500"]].describe().iloc[2, :] * pow(
-        252, 1 / 2
-    )  # Annualize the standard deviation (describe row index 2) using sqrt(252).
-
-    sharp = (
-        average_daily_return / standard_dev_daily_return
-    )  # Sharpe ratio calculation.
-    print(
-        f"The Sharpe Ratio of the S&P500 benchmark over the period is {round(sharp.iloc[0],2)}"
-    )
+    """
+    Apply trading strategy to each value of the `model_name` feature column (RSI by default)
+
+    `trading_strategy` is either a vectorised signals.Rule (e.g. RSI_BUY_RULE), which
+    generates all positions in one array expression, or a scalar function such as
+    trading_strategy that is called once per row. The strategy's daily returns are added
+    next to the benchmark in `cum_returns` and `calendar_returns`; set plot=False to skip
+    the charts. With `compact` the Position column is int8 (the strategy return then
+    keeps the dtype of F_1_d_returns, float32 for compact frames).
+
+    By default the strategy return of a date is the mean of position x forward return
+    over all tickers, so names without a position dilute it. Pass a portfolio.Weighting
+    (e.g. portfolio.equal_weight()) to weight the held names only, computed on the
+    sparse positions, with `cost_bps` of transaction costs charged on the turnover.
+    In both cases `<model_name>_Return` is written into `total_returns`: position x
+    forward return by default, weight x forward return with a weighting (its sum per
+    date is the return before costs).
+    Pass a report.ReportRenderer as `renderer` to write the charts to files in the
+    background instead of showing them. With a universe.Membership as `universe`,
+    positions in tickers outside the index on that date are set to 0.
+    """
 
-    ann_returns = (
-        pd.DataFrame(
-            (daily_mean[f"{model_name}_Return"] + 1)
-            .groupby(daily_mean.index.get_level_values(0).year)
-            .cumprod()
-        )
-        - 1
-    ) * 100  # Convert each year's cumulative growth into percentage returns.
-    calendar_returns.loc[:, f"{model_name}_Return"] = pd.DataFrame(
-        ann_returns[f"{model_name}_Return"]
-        .groupby(daily_mean.index.get_level_values(0).year)
-        .last()
-    )  # Extract last value of each year to get calendar-year returns.
-
-    calendar_returns.plot.bar(
-        rot=30, legend="top_left"
-    )  # Plot annual returns as a bar chart with rotated labels for readability.
-    plt.show()  # Display the plot to the user.
+    with profiling.stage("signal") as timed:
+        if isinstance(trading_strategy, signals.Rule):
+            total_returns["Position"] = trading_strategy.positions(
+                total_returns
+            )  # Evaluate the rule on whole columns at once.
+        else:
+            total_returns["Position"] = total_returns[model_name].transform(
+                trading_strategy
+            )  # Apply the trading strategy function to generate positions based on the feature values.
+        if universe is not None:
+            total_returns["Position"] = total_returns["Position"].where(
+                universe.contains(total_returns.index), 0
+            )  # Point-in-time membership as one array mask.
+        if compact:
+            total_returns["Position"] = total_returns["Position"].astype(
+                "int8"
+            )  # Positions are small integers: 1 byte per row instead of 8.
+        timed.observe(total_returns)
+
+    if weighting is None:
+        # Create returns for each trade
+        total_returns[f"{model_name}_Return"] = (
+            total_returns["F_1_d_returns"] * total_returns["Position"]
+        )  # Calculate strategy returns by multiplying forward returns with the position signal.
+
+    with profiling.stage("metrics") as timed:
+        if weighting is None:
+            # Compute daily mean of strategy returns
+            daily_mean = pd.DataFrame(
+                total_returns.loc[:, f"{model_name}_Return"]
+                .groupby(level="Date")
+                .mean()
+            )  # Group by Date level of the MultiIndex and average the strategy return column across tickers for each date.
+        else:
+            weighted = portfolio.build_portfolio(
+                total_returns, weighting, cost_bps=cost_bps
+            )
+            date_codes, ticker_codes, dates, _ = wide_codes(total_returns.index)
+            rows = weighted.weights.dates.get_indexer(dates)[
+                date_codes
+            ]  # Every row's date is on the portfolio calendar; the tickers are the same.
+            total_returns[f"{model_name}_Return"] = (
+                total_returns["F_1_d_returns"]
+                * weighted.weights.to_dense()[rows, ticker_codes]
+            )  # Each row's contribution to the weighted return.
+            daily_mean = (
+                weighted.daily["Net"].rename(f"{model_name}_Return").to_frame()
+            )  # Weighted over the held names only; cost scales with the active positions.
+
+        # Cumulative returns, calendar returns, CAGR, Sharpe, volatility and drawdown in one pass
+        report = metrics.compute_metrics(timed.observe(daily_mean))
+    _print_performance(report.summary.loc[f"{model_name}_Return"], f"{model_name} strategy")
+
+    cum_returns.loc[:, f"{model_name}_Return"] = report.cum_returns[
+        f"{model_name}_Return"
+    ]  # Add the strategy next to the benchmark, aligned on date.
+    calendar_returns.loc[:, f"{model_name}_Return"] = report.calendar_returns[
+        f"{model_name}_Return"
+    ]  # Same for the calendar-year returns, aligned on year.
+
+    if plot:
+        with profiling.stage("plot"):
+            plotting.plot_cumulative_returns(cum_returns, legend_fontsize=11)
+            plotting.plot_calendar_returns(calendar_returns)
+    if renderer is not None:
+        renderer.submit(
+            f"{model_name} strategy",
+            reporting.strategy_charts(cum_returns, calendar_returns),
+            report.summary,
+        )  # Rendered by worker processes while the computation continues.
 
     return cum_returns, calendar_returns
 
 
+def compare_strategies(total_returns, strategies, plot=True, renderer=None, universe=None):
+    """
+    Evaluate many trading rules side by side without touching `total_returns`.
+
+    Input:  long (Ticker, Date) frame with the feature columns the rules read and
+            F_1_d_returns; {name: signals.Rule} (or a list of rules); plot, renderer and
+            universe as in compute_strat_perf
+    Output: comparison table (one row per strategy plus the S&P500 benchmark: CAGR,
+            Sharpe, volatility, max drawdown, exposure), cumulative and calendar returns
+    """
+    with profiling.stage("batch backtest") as timed:
+        result = backtest.run_strategies(
+            timed.observe(total_returns), strategies, universe=universe
+        )  # One position tensor and one reduction for all strategies, instead of one pass per rule.
+    print(result.comparison.round(2).to_string())
+
+    cum_returns, calendar_returns = (
+        result.report.cum_returns,
+        result.report.calendar_returns,
+    )
+    if plot:
+        with profiling.stage("plot"):
+            plotting.plot_cumulative_returns(cum_returns, legend_fontsize=11)
+            plotting.plot_calendar_returns(calendar_returns)
+    if renderer is not None:
+        renderer.submit(
+            "Strategy comparison",
+            reporting.strategy_charts(cum_returns, calendar_returns),
+            result.comparison,
+        )  # Rendered by worker processes while the computation continues.
+
+    return result.comparison, cum_returns, calendar_returns
+
+
+RSI_BUY_RULE = signals.below(
+    "RSI", 30
+)  # Vectorised form of trading_strategy: buy (1) where RSI < 30, no action (0) elsewhere.
+
+
 def trading_strategy(rsi):
-    """Generate trading signals based on RSI values."""
+    """Generate trading signals based on RSI values (see RSI_BUY_RULE for the vectorised form)."""
 
     if rsi < 30:
         return 1  # Buy signal
     else:
         return 0  # No action
+
+
+def validate_compact(historical_prices, list_of_momentums=(1,), trading_rule=None):
+    """
+    Compare the compact (float32) pipeline with the default float64 one.
+
+    Runs computing_returns, indicators.compute_rsi and compute_strat_perf in both modes
+    on the same prices. On 25 years x 500 tickers of (synthetic) prices the returns agree
+    to about 1e-7 and CAGR / Sharpe to about 1e-7, and the long frame takes about half
+    the memory (ratio 2.1 with the RSI, Position and RSI_Return columns). The RSI agrees
+    to about 1e-4 points on average, but a few rows in 100,000 differ by several points:
+    where float32 prices turn a tiny daily move into exactly zero, that day no longer
+    counts as a gain or a loss in the RSI window.
+
+    Input:  prices (DataFrame or PriceMatrix), momentum windows and a signals.Rule
+            (RSI_BUY_RULE by default)
+    Output: Series with the largest absolute differences, the share of RSI values that
+            differ by more than 0.01, the CAGR / Sharpe differences and the memory of
+            both frames (MB) and their ratio
+    """
+    trading_rule = RSI_BUY_RULE if trading_rule is None else trading_rule
+    frames, summaries = {}, {}
+    for compact in (False, True):
+        prices = historical_prices.astype("float32") if compact else historical_prices
+        total_returns = computing_returns(prices, list_of_momentums, compact=compact)
+        total_returns["RSI"] = indicators.compute_rsi(total_returns)
+        with contextlib.redirect_stdout(io.StringIO()):  # Silence the CAGR printouts.
+            cum_returns, calendar_returns = compute_BM_perf(total_returns, plot=False)
+            compute_strat_perf(
+                total_returns,
+                cum_returns,
+                calendar_returns,
+                trading_rule,
+                plot=False,
+                compact=compact,
+            )
+        frames[compact] = total_returns
+        summaries[compact] = metrics.compute_metrics(
+            total_returns.groupby(level="Date")[["F_1_d_returns", "RSI_Return"]].mean()
+        ).summary  # Benchmark and strategy statistics side by side.
+
+    full, compact = frames[False], frames[True]
+    feature_columns = [column for column in full.columns if column != "Position"]
+    differences = {
+        f"max |diff| {column}": float(
+            (full[column] - compact[column].astype("float64")).abs().max()
+        )
+        for column in feature_columns
+    }
+    differences["share |diff| RSI > 0.01"] = float(
+        ((full["RSI"] - compact["RSI"].astype("float64")).abs() > 0.01).mean()
+    )
+    for metric in ("CAGR", "Sharpe"):
+        differences[f"max |diff| {metric}"] = float(
+            (summaries[False][metric] - summaries[True][metric]).abs().max()
+        )
+    full_mb = full.memory_usage(deep=True).sum() / 2**20
+    compact_mb = compact.memory_usage(deep=True).sum() / 2**20
+    differences.update(
+        {
+            "float64 MB": full_mb,
+            "compact MB": compact_mb,
+            "memory ratio": full_mb / compact_mb,
+        }
+    )
+    return pd.Series(differences)
@@ -0,0 +1,129 @@
+import numpy as np  # NumPy does the arithmetic on the wide date x ticker array.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+from numpy.lib.stride_tricks import sliding_window_view  # Rolling windows as views.
+
+from ai_course import profiling  # Stage timer around the RSI computation.
+from ai_course.price_matrix import (
+    wide_codes,
+)  # Long (Ticker, Date) <-> wide coordinates.
+
+RSI_WINDOW = 14  # Default look-back, same as `funct_lib.calculate_rsi`.
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs down each column of a 2D array."""
+    rows = np.arange(len(values))[:, None]
+    last_valid = np.where(~np.isnan(values), rows, 0)
+    # Latest valid row so far.
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    return values[last_valid, np.arange(values.shape[1])]
+
+
+def _mean_of_last(values: np.ndarray, selected: np.ndarray, window: int) -> np.ndarray:
+    """
+    For every row, the mean of the last `window` selected values in the same column.
+
+    Selected values of all columns are laid out column by column in one flat array, so
+    a single rolling sum covers every ticker; windows that straddle two columns are
+    masked out. Rows before a column's first full window are NaN.
+    """
+    # Column-major: each ticker's selected values are contiguous.
+    flat = values.T[selected.T]
+    column_of = np.nonzero(selected.T)[0]
+    out = np.full(values.shape, np.nan)
+    if len(flat) < window:
+        return out
+    means = np.full(len(flat), np.nan)
+    means[window - 1 :] = sliding_window_view(flat, window).mean(axis=1)
+    position_in_column = np.arange(len(flat)) - np.searchsorted(column_of, column_of)
+    # Window reaches into the previous ticker.
+    means[position_in_column < window - 1] = np.nan
+
+    out.T[selected.T] = means  # Scatter back to the rows where the value occurred...
+    return _ffill(out)  # ...and carry it forward until the next one.
+
+
+def rsi_matrix(returns: np.ndarray, windows=(RSI_WINDOW,), method: str = "sma"):
+    """
+    Relative Strength Index for every column of a date x ticker return array at once.
+
+    Input:  returns array (NaN where a ticker has no observation), window lengths and
+            smoothing method:
+            "sma"    mean of the last `window` gains and of the last `window` losses,
+                     the definition used by `funct_lib.calculate_rsi`
+            "wilder" Wilder's exponential smoothing (alpha = 1 / window)
+    Output: {window: date x ticker RSI array}; NaN where the RSI is not defined yet
+    """
+    observed = ~np.isnan(returns)
+    results = {}
+    for window in windows:
+        if method == "sma":
+            gain = _mean_of_last(returns, returns > 0, window)
+            loss = np.abs(_mean_of_last(returns, returns < 0, window))
+        elif method == "wilder":
+            smoothing = dict(
+                alpha=1 / window, adjust=False, min_periods=window, ignore_na=True
+            )
+            gain = pd.DataFrame(np.where(observed, np.clip(returns, 0, None), np.nan))
+            loss = pd.DataFrame(np.where(observed, np.clip(-returns, 0, None), np.nan))
+            gain = gain.ewm(**smoothing).mean().to_numpy()
+            loss = loss.ewm(**smoothing).mean().to_numpy()
+        else:
+            raise ValueError(
+                f"Unknown RSI method {method!r}; expected 'sma' or 'wilder'"
+            )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - (100 / (1 + gain / loss))  # Standard RSI formula.
+        rsi[~observed] = np.nan  # Only rows that exist in the input get a value.
+        results[window] = rsi
+    return results
+
+
+def compute_rsi(
+    total_returns: pd.DataFrame,
+    column: str = "1_d_returns",
+    windows=RSI_WINDOW,
+    method: str = "sma",
+    cache=None,
+):
+    """
+    Vectorised replacement for `groupby("Ticker")[[column]].transform(calculate_rsi)`.
+
+    Input:  long (Ticker, Date) returns frame, the return column to use, one window or a
+            list of windows, the smoothing method (see `rsi_matrix`) and an optional
+            feature_cache.FeatureCache to memoize the result on disk
+    Output: Series "RSI" aligned with `total_returns` for a single window, otherwise a
+            DataFrame with one "RSI_<window>" column per window; float32 when the input
+            column is float32 (compact mode), float64 otherwise
+    """
+    if cache is not None:
+        # Keyed on the input column only: other columns do not affect the RSI.
+        return cache.get_or_compute(
+            "compute_rsi",
+            total_returns[[column]],
+            {"column": column, "windows": windows, "method": method},
+            lambda: compute_rsi(total_returns, column, windows, method),
+        )
+    with profiling.stage("rsi") as timed:
+        timed.observe(total_returns)
+        date_codes, ticker_codes, dates, tickers = wide_codes(total_returns.index)
+        wide = np.full((len(dates), len(tickers)), np.nan)
+        wide[date_codes, ticker_codes] = total_returns[column].to_numpy(dtype="float64")
+
+        single = np.isscalar(windows)
+        rsi = rsi_matrix(wide, [windows] if single else list(windows), method)
+    # Computed in float64; stored in the input's precision.
+    dtype = np.result_type(total_returns[column].dtype, np.float32)
+    if single:
+        return pd.Series(
+            rsi[windows][date_codes, ticker_codes].astype(dtype, copy=False),
+            index=total_returns.index,
+            name="RSI",
+        )
+    return pd.DataFrame(
+        {
+            f"RSI_{window}": values[date_codes, ticker_codes].astype(dtype, copy=False)
+            for window, values in rsi.items()
+        },
+        index=total_returns.index,
+    )
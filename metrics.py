@@ -0,0 +1,76 @@
+from dataclasses import dataclass  # Lightweight container for the structured result.
+
+import numpy as np  # NumPy handles the column-wise reductions.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+TRADING_DAYS_PER_YEAR = 252  # Used to annualise daily statistics.
+
+
+@dataclass
+class PerformanceReport:
+    """Performance of one or more strategies; every frame has one column per strategy."""
+
+    daily_returns: pd.DataFrame  # Date x strategy daily returns (fractions).
+    cum_returns: pd.DataFrame  # Value of $1 invested, per date.
+    calendar_returns: pd.DataFrame  # Return per calendar year, in %.
+    # Strategy x metric: CAGR (%), Sharpe, Volatility (%), Max Drawdown (%).
+    summary: pd.DataFrame
+
+
+def compute_metrics(
+    daily_returns, periods_per_year: int = TRADING_DAYS_PER_YEAR
+) -> PerformanceReport:
+    """
+    Compute performance metrics for all strategies in one vectorised pass.
+
+    Input:  date x strategy DataFrame (or a Series for a single strategy) of daily returns
+    Output: PerformanceReport with cumulative and calendar returns and a summary table
+            of CAGR, Sharpe ratio, annualised volatility and maximum drawdown
+    """
+    if isinstance(daily_returns, pd.Series):
+        daily_returns = daily_returns.to_frame()
+    # Compounding thousands of days needs float64, even for compact float32 inputs.
+    daily_returns = daily_returns.astype("float64")
+
+    growth = daily_returns + 1
+    # Cumulative product of (1 + daily return); NaNs are skipped.
+    cum_returns = growth.cumprod()
+
+    values = cum_returns.to_numpy(dtype="float64")
+    observations = daily_returns.count().to_numpy()  # Non-missing days per strategy.
+    ending_value = cum_returns.ffill().iloc[-1].to_numpy() if len(values) else np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        number_of_years = observations / periods_per_year
+        cagr = (ending_value ** (1 / number_of_years) - 1) * 100
+
+        mean = daily_returns.mean().to_numpy()
+        std = daily_returns.std().to_numpy()  # Sample standard deviation (ddof=1).
+        sharpe = (mean * periods_per_year) / (std * np.sqrt(periods_per_year))
+        volatility = std * np.sqrt(periods_per_year) * 100
+
+        # Drawdown against the running peak, where the starting capital of 1 counts as a peak.
+        peaks = np.fmax.accumulate(
+            np.vstack([np.ones((1, values.shape[1])), values]), axis=0
+        )
+        max_drawdown = np.nanmin(values / peaks[1:] - 1, axis=0, initial=0) * 100
+
+    summary = pd.DataFrame(
+        {
+            "CAGR": cagr,
+            "Sharpe": sharpe,
+            "Volatility": volatility,
+            "Max Drawdown": max_drawdown,
+        },
+        index=daily_returns.columns,
+    )
+
+    years = daily_returns.index.get_level_values(0).year
+    # Compounded return per year.
+    calendar_returns = (growth.groupby(years).prod() - 1) * 100
+
+    return PerformanceReport(
+        daily_returns=daily_returns,
+        cum_returns=cum_returns,
+        calendar_returns=calendar_returns,
+        summary=summary,
+    )
@@ -0,0 +1,212 @@
+import json  # json (stdlib) stores the small metadata part of a saved state.
+
+import numpy as np  # NumPy holds the per-ticker ring buffers.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course import features  # Column names and the full-history return definitions.
+from ai_course.indicators import RSI_WINDOW
+
+
+def _last_selected(returns: np.ndarray, selected: np.ndarray, window: int):
+    """Ring buffer (window x ticker) of the last `window` selected values and their counts."""
+    counts = selected.sum(axis=0)
+    ring = np.zeros((window, returns.shape[1]))
+    flat = returns.T[selected.T]  # Column-major: each ticker's values are contiguous.
+    column_of = np.nonzero(selected.T)[0]
+    # The k-th selected value of a ticker (0-based) lives in slot k % window.
+    first_of_column = np.searchsorted(column_of, column_of)
+    k = np.arange(len(flat)) - first_of_column
+    recent = k >= counts[column_of] - window
+    ring[k[recent] % window, column_of[recent]] = flat[recent]
+    return ring, counts
+
+
+class IndicatorState:
+    """
+    Persisted per-ticker indicator state advanced one daily bar at a time.
+
+    Keeps the last prices (for momentum returns) and ring buffers of the last
+    `rsi_window` gains and losses (for the RSI), so `update` costs O(tickers) per day.
+
+    Values match the pipeline's full recompute, `funct_lib.computing_returns` followed
+    by `indicators.compute_rsi` ("sma" method), up to float rounding. That pipeline only
+    keeps rows with every momentum return and a 1-day forward return, so a day's return
+    enters the RSI window only once the next day's price is known. `update` therefore
+    holds each day's return back until the next bar and reports today's RSI as if
+    today's row is kept; if tomorrow's price turns out missing (a gap), the pipeline
+    drops today's row and the held-back return is discarded, as in the recompute.
+    """
+
+    def __init__(
+        self, tickers, list_of_momentums=(1,), rsi_window=RSI_WINDOW, rsi_momentum=1
+    ):
+        self.tickers = pd.Index(tickers)
+        self.momentums = list(list_of_momentums)
+        self.rsi_window = rsi_window
+        self.rsi_momentum = rsi_momentum  # RSI is computed on this momentum's returns.
+        self.lookback = max(self.momentums + [rsi_momentum])
+        n = len(self.tickers)
+        self.prices = np.full((self.lookback, n), np.nan)  # Ring of the last prices.
+        # Number of bars consumed; the next bar goes to rows_seen % lookback.
+        self.rows_seen = 0
+        self.gains = np.zeros((rsi_window, n))
+        self.losses = np.zeros((rsi_window, n))
+        self.gain_counts = np.zeros(n, dtype=np.int64)
+        self.loss_counts = np.zeros(n, dtype=np.int64)
+        # The last bar's RSI return, pushed on the next bar if that bar has a price.
+        self.pending = np.full(n, np.nan)
+        self.last_date = None
+
+    @classmethod
+    def from_history(
+        cls,
+        historical_prices: pd.DataFrame,
+        list_of_momentums=(1,),
+        rsi_window=RSI_WINDOW,
+        rsi_momentum=1,
+    ):
+        """Build the state from a date x ticker price history in one vectorised pass."""
+        state = cls(
+            historical_prices.columns, list_of_momentums, rsi_window, rsi_momentum
+        )
+        values = historical_prices.to_numpy(dtype="float64")
+        n_rows = len(values)
+        for row in range(max(0, n_rows - state.lookback), n_rows):
+            state.prices[row % state.lookback] = values[row]
+        state.rows_seen = n_rows
+
+        # Rows the pipeline keeps: every momentum return and the forward return exist.
+        returns = features.trailing_returns(values, rsi_momentum)
+        valid = state._valid(
+            [features.trailing_returns(values, window) for window in state.momentums]
+            + [returns]
+        )
+        kept = valid & ~np.isnan(features.forward_returns(values, 1))
+        state.pending = (
+            np.where(valid[-1], returns[-1], np.nan) if n_rows else state.pending
+        )
+        returns = np.where(kept, returns, np.nan)  # The last row is never kept yet.
+        state.gains, state.gain_counts = _last_selected(
+            returns, returns > 0, rsi_window
+        )
+        state.losses, state.loss_counts = _last_selected(
+            returns, returns < 0, rsi_window
+        )
+        state.last_date = historical_prices.index[-1] if n_rows else None
+        return state
+
+    def _returns(self, new_prices: np.ndarray, window: int) -> np.ndarray:
+        if self.rows_seen < window:
+            return np.full(len(new_prices), np.nan)
+        return new_prices / self.prices[(self.rows_seen - window) % self.lookback] - 1
+
+    @staticmethod
+    def _valid(returns) -> np.ndarray:
+        """Where every return in `returns` exists (the row survives computing_returns)."""
+        return np.logical_and.reduce([~np.isnan(values) for values in returns])
+
+    def _push(self, ring, counts, returns, selected):
+        columns = np.nonzero(selected)[0]
+        ring[counts[columns] % self.rsi_window, columns] = returns[columns]
+        counts[columns] += 1
+
+    def _mean_with(self, ring, counts, returns, selected):
+        """Mean of the last `rsi_window` selected values with today's appended (no push)."""
+        total = ring.sum(axis=0)
+        columns = np.nonzero(selected)[0]
+        # Today's value replaces the oldest slot (still 0 while the ring is filling).
+        oldest = ring[counts[columns] % self.rsi_window, columns]
+        total[columns] += returns[columns] - oldest
+        counts = counts + selected
+        return np.where(counts >= self.rsi_window, total / self.rsi_window, np.nan)
+
+    def update(self, new_bar_row: pd.Series, date=None) -> pd.DataFrame:
+        """
+        Advance every indicator by one bar.
+
+        Input:  Series of close prices indexed by ticker (missing tickers count as NaN)
+                and the bar's date (defaults to the Series name)
+        Output: ticker x feature DataFrame with the momentum returns and the RSI
+        """
+        new_prices = new_bar_row.reindex(self.tickers).to_numpy(dtype="float64")
+        # Yesterday's row is kept by the pipeline if today's price gives it a forward
+        # return; only then does its return enter the RSI window.
+        kept = ~np.isnan(self.pending) & ~np.isnan(new_prices)
+        self._push(
+            self.gains, self.gain_counts, self.pending, kept & (self.pending > 0)
+        )
+        self._push(
+            self.losses, self.loss_counts, self.pending, kept & (self.pending < 0)
+        )
+
+        result = {
+            features.momentum_name(window): self._returns(new_prices, window)
+            for window in self.momentums
+        }
+        rsi_returns = self._returns(new_prices, self.rsi_momentum)
+        valid = self._valid(list(result.values()) + [rsi_returns])
+        rsi_returns = np.where(valid, rsi_returns, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gain = self._mean_with(
+                self.gains, self.gain_counts, rsi_returns, rsi_returns > 0
+            )
+            loss = np.abs(
+                self._mean_with(
+                    self.losses, self.loss_counts, rsi_returns, rsi_returns < 0
+                )
+            )
+            rsi = 100 - (100 / (1 + gain / loss))  # Standard RSI formula.
+        rsi[~valid] = np.nan  # No row in the pipeline today, no RSI value.
+        result["RSI"] = rsi
+        self.pending = rsi_returns
+
+        self.prices[self.rows_seen % self.lookback] = new_prices
+        self.rows_seen += 1
+        self.last_date = date if date is not None else new_bar_row.name
+        return pd.DataFrame(result, index=self.tickers)
+
+    def save(self, path) -> None:
+        """Persist the state to a single .npz file."""
+        meta = {
+            "tickers": [str(ticker) for ticker in self.tickers],
+            "momentums": self.momentums,
+            "rsi_window": self.rsi_window,
+            "rsi_momentum": self.rsi_momentum,
+            "rows_seen": self.rows_seen,
+            "last_date": None if self.last_date is None else str(self.last_date),
+        }
+        # Keep the exact file name (np.savez would add .npz).
+        with open(path, "wb") as handle:
+            np.savez(
+                handle,
+                meta=np.array(json.dumps(meta)),
+                prices=self.prices,
+                gains=self.gains,
+                losses=self.losses,
+                gain_counts=self.gain_counts,
+                loss_counts=self.loss_counts,
+                pending=self.pending,
+            )
+
+    @classmethod
+    def load(cls, path):
+        """Restore a state written by `save`."""
+        with np.load(path) as stored:
+            meta = json.loads(str(stored["meta"]))
+            state = cls(
+                meta["tickers"],
+                meta["momentums"],
+                meta["rsi_window"],
+                meta["rsi_momentum"],
+            )
+            state.prices = stored["prices"]
+            state.gains, state.losses = stored["gains"], stored["losses"]
+            state.gain_counts = stored["gain_counts"]
+            state.loss_counts = stored["loss_counts"]
+            if "pending" in stored:  # States saved before the return was held back.
+                state.pending = stored["pending"]
+        state.rows_seen = meta["rows_seen"]
+        state.last_date = (
+            None if meta["last_date"] is None else pd.Timestamp(meta["last_date"])
+        )
+        return state
@@ -0,0 +1,38 @@
+"""
+Optional chart layer for performance results.
+
+matplotlib is only imported when a chart is actually drawn, so computing metrics never
+pays for it.
+"""
+
+
+def plot_cumulative_returns(
+    cum_returns, ax=None, show: bool = True, legend_fontsize=12
+):
+    """Line chart of cumulative returns (one line per column)."""
+    # Imported lazily; headless runs never load matplotlib.
+    import matplotlib.pyplot as plt
+
+    ax = cum_returns.plot(ax=ax)  # Use DataFrame.plot to visualize cumulative returns.
+    # Customize the plot with title and labels
+    ax.set_title("Cumulative Returns over time", fontsize=16, fontweight="bold")
+    ax.set_xlabel("Date", fontsize=14)
+    ax.set_ylabel("Cumulative Return", fontsize=14)
+    ax.grid(True)  # Enable grid lines for better readability.
+    ax.tick_params(axis="x", labelrotation=45)  # Keep overlapping dates readable.
+    ax.legend(title_fontsize=13, fontsize=legend_fontsize)
+    if show:
+        plt.show()  # Display the plot to the user.
+    return ax
+
+
+def plot_calendar_returns(calendar_returns, ax=None, show: bool = True):
+    """Bar chart of calendar-year returns (one bar group per year)."""
+    # Imported lazily; headless runs never load matplotlib.
+    import matplotlib.pyplot as plt
+
+    # Plot annual returns as a bar chart with rotated labels for readability.
+    ax = calendar_returns.plot.bar(ax=ax, rot=30, legend="top_left")
+    if show:
+        plt.show()  # Display the plot to the user.
+    return ax
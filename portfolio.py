@@ -0,0 +1,289 @@
+"""
+Portfolio construction on sparse positions.
+
+Trading rules such as RSI < 30 hold a small fraction of the (ticker, date) rows, so
+positions are kept as coordinate lists (date code, ticker code, value) of the non-zero
+entries only. Weighting, portfolio returns, turnover and transaction costs are
+bincounts and sorts over those entries, so their cost grows with the number of active
+positions instead of with the size of the universe times the history.
+"""
+
+from dataclasses import dataclass  # Lightweight container for the structured result.
+
+import numpy as np  # NumPy does the per-date reductions over the active entries.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course.price_matrix import wide_codes  # Long index -> wide array coordinates.
+
+BASIS_POINT = 1e-4
+
+
+@dataclass
+class SparsePositions:
+    """
+    Non-zero positions (or weights) in coordinate form, sorted by date then ticker.
+
+    `columns` holds feature values (e.g. forward returns or the RSI) at the active
+    entries only, aligned with `values`.
+    """
+
+    dates: pd.DatetimeIndex  # Portfolio calendar, including days without positions.
+    tickers: pd.Index
+    date_codes: np.ndarray  # Row of each entry in `dates`.
+    ticker_codes: np.ndarray  # Column of each entry in `tickers`.
+    values: np.ndarray
+    columns: dict
+
+    @classmethod
+    def from_frame(cls, total_returns, position_column="Position", columns=()):
+        """
+        Collect the non-zero `position_column` rows of a long (Ticker, Date) frame,
+        with the values of `columns` at those rows.
+        """
+        date_codes, ticker_codes, dates, tickers = wide_codes(total_returns.index)
+        positions = total_returns[position_column].to_numpy()
+        active = np.flatnonzero(positions)
+        # Only dates that still have rows belong to the calendar (levels may keep more).
+        present = np.bincount(date_codes, minlength=len(dates)) > 0
+        remap = np.cumsum(present) - 1
+        order = np.lexsort((ticker_codes[active], date_codes[active]))
+        active = active[order]
+        return cls(
+            dates=dates[present],
+            tickers=tickers,
+            date_codes=remap[date_codes[active]],
+            ticker_codes=ticker_codes[active],
+            values=positions[active].astype("float64"),
+            columns={
+                name: total_returns[name].to_numpy()[active].astype("float64")
+                for name in columns
+            },
+        )
+
+    @classmethod
+    def from_dense(cls, positions, dates, tickers, columns=None):
+        """Collect the non-zero entries of a wide date x ticker position array."""
+        date_codes, ticker_codes = np.nonzero(positions)  # Date-major order.
+        return cls(
+            dates=pd.DatetimeIndex(dates, name="Date"),
+            tickers=pd.Index(tickers, name="Ticker"),
+            date_codes=date_codes,
+            ticker_codes=ticker_codes,
+            values=np.asarray(positions, dtype="float64")[date_codes, ticker_codes],
+            columns={
+                name: np.asarray(array, dtype="float64")[date_codes, ticker_codes]
+                for name, array in (columns or {}).items()
+            },
+        )
+
+    def __len__(self):
+        return len(self.values)
+
+    def with_values(self, values):
+        """Same entries with new values (e.g. weights instead of positions)."""
+        return SparsePositions(
+            self.dates,
+            self.tickers,
+            self.date_codes,
+            self.ticker_codes,
+            values,
+            self.columns,
+        )
+
+    def per_date(self, values) -> np.ndarray:
+        """Sum `values` (one per entry) over each date of the calendar."""
+        return np.bincount(self.date_codes, weights=values, minlength=len(self.dates))
+
+    def to_series(self, name="Weight") -> pd.Series:
+        """Long (Ticker, Date) Series of the active entries."""
+        index = pd.MultiIndex(
+            levels=[self.tickers, self.dates],
+            codes=[self.ticker_codes, self.date_codes],
+            names=["Ticker", "Date"],
+        )
+        return pd.Series(self.values, index=index, name=name)
+
+    def to_dense(self) -> np.ndarray:
+        """Wide date x ticker array with zeros where there is no position."""
+        dense = np.zeros((len(self.dates), len(self.tickers)))
+        dense[self.date_codes, self.ticker_codes] = self.values
+        return dense
+
+
+class Weighting:
+    """
+    A rule turning sparse positions into portfolio weights.
+
+    Weights carry the sign of the position and each date's absolute weights sum to 1
+    (fully invested in the held names); dates without positions stay in cash.
+    """
+
+    def columns(self) -> set[str]:
+        """Feature columns the weighting reads at the active entries."""
+        return set()
+
+    def weights(self, positions: SparsePositions) -> np.ndarray:
+        """Return one weight per active entry."""
+        raise NotImplementedError
+
+
+def _normalise(positions: SparsePositions, strength) -> np.ndarray:
+    """Scale non-negative strengths so every date's absolute weights sum to 1."""
+    totals = positions.per_date(strength)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weights = strength / totals[positions.date_codes]
+    return np.sign(positions.values) * np.nan_to_num(weights)
+
+
+class EqualWeight(Weighting):
+    """Equal weight over the names held on each date (scaled by the position size)."""
+
+    def weights(self, positions):
+        return _normalise(positions, np.abs(positions.values))
+
+    def __repr__(self):
+        return "EqualWeight()"
+
+
+class SignalWeight(Weighting):
+    """
+    Weight proportional to the distance of `column` from `center`.
+
+    For the RSI < 30 rule, `SignalWeight("RSI", 30)` puts more weight on the names
+    that are more oversold; entries exactly at `center` (or without a value) get none.
+    """
+
+    def __init__(self, column: str, center: float = 0.0):
+        self.column, self.center = column, center
+
+    def columns(self):
+        return {self.column}
+
+    def weights(self, positions):
+        distance = np.abs(positions.columns[self.column] - self.center)
+        return _normalise(positions, np.abs(positions.values) * np.nan_to_num(distance))
+
+    def __repr__(self):
+        return f"SignalWeight({self.column!r}, {self.center!r})"
+
+
+class Capped(Weighting):
+    """
+    Another weighting with every absolute weight capped at `max_weight`.
+
+    The excess above the cap is redistributed pro rata over the uncapped names of the
+    same date until no weight exceeds the cap; when fewer than 1 / `max_weight` names
+    are held, all of them sit at the cap and the remainder stays in cash.
+    """
+
+    def __init__(self, weighting: Weighting, max_weight: float):
+        if not 0 < max_weight <= 1:
+            raise ValueError(f"max_weight must be in (0, 1], got {max_weight}")
+        self.weighting, self.max_weight = weighting, max_weight
+
+    def columns(self):
+        return self.weighting.columns()
+
+    def weights(self, positions):
+        weights = self.weighting.weights(positions)
+        size, sign = np.abs(weights), np.sign(weights)
+        capped = np.zeros(len(size), dtype=bool)
+        # Each round caps at least one more name per affected date, so this terminates;
+        # in practice two or three rounds suffice.
+        while True:
+            over = size > self.max_weight * (1 + 1e-12)
+            if not over.any():
+                break
+            excess = positions.per_date(np.where(over, size - self.max_weight, 0.0))
+            capped |= over
+            size = np.where(over, self.max_weight, size)
+            free = positions.per_date(np.where(capped, 0.0, size))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scale = np.where(free > 0, 1 + excess / free, 1.0)
+            size = np.where(capped, size, size * scale[positions.date_codes])
+        return sign * size
+
+    def __repr__(self):
+        return f"Capped({self.weighting!r}, {self.max_weight!r})"
+
+
+def equal_weight() -> Weighting:
+    """Equal weight over the held names."""
+    return EqualWeight()
+
+
+def signal_weight(column: str, center: float = 0.0) -> Weighting:
+    """Weight proportional to |column - center| (see SignalWeight)."""
+    return SignalWeight(column, center)
+
+
+def capped(weighting: Weighting, max_weight: float) -> Weighting:
+    """`weighting` with each name capped at `max_weight` (see Capped)."""
+    return Capped(weighting, max_weight)
+
+
+def turnover(weights: SparsePositions) -> np.ndarray:
+    """
+    Daily turnover: sum over tickers of |w(t) - w(t-1)|, per date of the calendar.
+
+    Weights are the targets at each date's close (drift between rebalances is ignored),
+    so entering from cash on the first day counts as a turnover of the gross exposure.
+    """
+    n_tickers = len(weights.tickers)
+    # Yesterday's weights are moved to today's row with the opposite sign; summing both
+    # per (date, ticker) key leaves the change, also for names entered or exited.
+    keys = np.concatenate(
+        [
+            weights.date_codes * n_tickers + weights.ticker_codes,
+            (weights.date_codes + 1) * n_tickers + weights.ticker_codes,
+        ]
+    )
+    changes = np.concatenate([weights.values, -weights.values])
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    net_change = np.bincount(inverse, weights=changes)
+    return np.bincount(
+        unique_keys // n_tickers,
+        weights=np.abs(net_change),
+        minlength=len(weights.dates) + 1,
+    )[: len(weights.dates)]  # Exits after the last date fall outside the calendar.
+
+
+@dataclass
+class PortfolioResult:
+    """Weights and daily performance of a sparse portfolio."""
+
+    weights: SparsePositions
+    # Date x [Gross, Turnover, Cost, Net]: returns before and after transaction costs.
+    daily: pd.DataFrame
+
+
+def build_portfolio(
+    total_returns,
+    weighting: Weighting | None = None,
+    position_column: str = "Position",
+    return_column: str = "F_1_d_returns",
+    cost_bps: float = 0.0,
+) -> PortfolioResult:
+    """
+    Weight the positions of a long (Ticker, Date) frame and compute daily returns.
+
+    Input:  long frame with a position column (e.g. after compute_strat_perf) and the
+            forward return column; the weighting (equal weight over the held names by
+            default) and the transaction cost in basis points of traded value
+    Output: PortfolioResult; the net return is the gross return minus
+            cost_bps * turnover, and dates without positions earn 0 (cash)
+    """
+    weighting = EqualWeight() if weighting is None else weighting
+    positions = SparsePositions.from_frame(
+        total_returns, position_column, {return_column} | weighting.columns()
+    )
+    weights = positions.with_values(weighting.weights(positions))
+    forward = np.nan_to_num(positions.columns[return_column])
+    gross = weights.per_date(weights.values * forward)
+    traded = turnover(weights)
+    cost = traded * cost_bps * BASIS_POINT
+    daily = pd.DataFrame(
+        {"Gross": gross, "Turnover": traded, "Cost": cost, "Net": gross - cost},
+        index=weights.dates,
+    )
+    return PortfolioResult(weights=weights, daily=daily)
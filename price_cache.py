@@ -0,0 +1,175 @@
+import json  # json (stdlib) persists the coverage sidecar as plain text.
+import logging  # logging (stdlib) reports which blocks are fetched.
+from collections import defaultdict  # Groups tickers that share the same gaps.
+
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course.price_store import PriceStore  # On-disk backend holding the matrix.
+
+logger = logging.getLogger(__name__)
+
+
+def _merge_intervals(intervals):
+    """Merge overlapping or touching [start, end) intervals into a sorted minimal list."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)  # Extend the previous block.
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _subtract_intervals(start, end, covered):
+    """Return the parts of [start, end) that are not covered by the sorted `covered` list."""
+    gaps = []
+    cursor = start
+    for block_start, block_end in covered:
+        if block_end <= cursor or block_start >= end:
+            continue  # Block lies entirely outside the remaining request.
+        if block_start > cursor:
+            gaps.append((cursor, block_start))
+        cursor = max(cursor, block_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class PriceCache:
+    """
+    Range-aware price cache on top of a `PriceStore`.
+
+    A sidecar `<store>.coverage.json` records which [start, end) date blocks are held
+    for each ticker. A request is compared against that record, only the missing
+    blocks are fetched, and the results are merged into the store in place.
+    """
+
+    def __init__(self, store: PriceStore):
+        self.store = store
+        self.coverage_path = store.path.with_name(store.path.name + ".coverage.json")
+
+    def coverage(self) -> dict[str, list[list[pd.Timestamp]]]:
+        """Return {ticker: [[start, end), ...]} for the blocks currently held."""
+        if self.coverage_path.exists():
+            raw = json.loads(self.coverage_path.read_text())
+            return {
+                ticker: [[pd.Timestamp(s), pd.Timestamp(e)] for s, e in blocks]
+                for ticker, blocks in raw.items()
+            }
+        if not self.store.exists():
+            return {}
+        # Stores written before coverage tracking: assume each ticker spans the stored dates.
+        dates = self.store.load(tickers=[]).index
+        if len(dates) == 0:
+            return {}
+        block = [dates[0], dates[-1] + pd.Timedelta(days=1)]
+        return {ticker: [list(block)] for ticker in self.store.tickers()}
+
+    def _save_coverage(self, coverage) -> None:
+        serialisable = {
+            ticker: [
+                [s.strftime("%Y-%m-%d"), e.strftime("%Y-%m-%d")] for s, e in blocks
+            ]
+            for ticker, blocks in coverage.items()
+        }
+        self.coverage_path.write_text(json.dumps(serialisable, sort_keys=True))
+
+    def missing_blocks(self, tickers, start_date, end_date):
+        """
+        Compute the gap between the cache and a request.
+
+        Output: list of (tickers, start, end) fetch requests; tickers that miss exactly
+                the same date ranges are batched into one request.
+        """
+        coverage = self.coverage()
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        by_gap = defaultdict(list)  # (gap_start, gap_end) -> tickers missing it.
+        for ticker in tickers:
+            for gap in _subtract_intervals(start, end, coverage.get(ticker, [])):
+                by_gap[gap].append(ticker)
+        return [(group, gs, ge) for (gs, ge), group in sorted(by_gap.items())]
+
+    def get(self, tickers, start_date, end_date, fetch) -> pd.DataFrame:
+        """
+        Return close prices for `tickers` over [start_date, end_date), fetching only the gaps.
+
+        `fetch(tickers, start_date, end_date)` returns a date x ticker close-price
+        DataFrame, or a downloader.DownloadResult whose `failed` tickers are left out
+        of the coverage and fetched again on the next call; it is only called for
+        blocks the cache does not hold yet. A DataFrame answer counts as a successful
+        fetch for every ticker (fetch functions signal failures by raising).
+        """
+        tickers = list(tickers)
+        blocks = self.missing_blocks(tickers, start_date, end_date)
+        failed = self._fill(blocks, fetch) if blocks else {}
+        if not self.store.exists():
+            if failed:
+                ticker, reason = next(iter(failed.items()))
+                raise RuntimeError(
+                    f"No prices cached and the download failed for {len(failed)} "
+                    f"tickers (e.g. {ticker}: {reason})"
+                )
+            # Nothing traded in the requested range yet (e.g. a weekend).
+            return pd.DataFrame(
+                columns=pd.Index(tickers, dtype=object),
+                index=pd.DatetimeIndex([], name="Date"),
+                dtype="float64",
+            )
+        return self.store.load(
+            tickers=tickers, start_date=start_date, end_date=end_date
+        )
+
+    def _fill(self, blocks, fetch) -> dict[str, str]:
+        """Fetch the blocks, merge them into the store; returns {ticker: reason} failures."""
+        coverage = self.coverage()
+        # Today's bar may still change, so coverage never extends past the start of today.
+        today = pd.Timestamp.today().normalize()
+        fetched = []
+        failures = {}
+        try:
+            for group, gap_start, gap_end in blocks:
+                logger.info(
+                    "Fetching %d tickers from %s to %s",
+                    len(group),
+                    gap_start.date(),
+                    gap_end.date(),
+                )
+                result = fetch(
+                    group, gap_start.strftime("%Y-%m-%d"), gap_end.strftime("%Y-%m-%d")
+                )
+                prices = getattr(result, "prices", result)
+                failed = getattr(result, "failed", {})
+                failures.update(failed)
+                has_data = (
+                    prices.notna().any() if len(prices) else pd.Series(dtype=bool)
+                )
+                received = [t for t in group if t in has_data.index and has_data[t]]
+                if isinstance(result, pd.DataFrame) and received:
+                    # A plain DataFrame has no failure list: an empty column among
+                    # others is treated as a failed ticker and retried next call.
+                    recorded = received
+                else:
+                    # Covered: tickers with data, and tickers the fetch reported no rows
+                    # for (weekend, holiday); failed tickers are retried next call.
+                    recorded = [t for t in group if t not in failed]
+                block_end = min(gap_end, today)
+                if block_end > gap_start:
+                    for ticker in recorded:
+                        coverage[ticker] = _merge_intervals(
+                            coverage.get(ticker, []) + [[gap_start, block_end]]
+                        )
+                if received:
+                    fetched.append(prices[received])
+        finally:
+            # Blocks fetched before an error are kept, together with their coverage.
+            if fetched:
+                update = fetched[0]
+                for prices in fetched[1:]:
+                    # Tickers can appear in several date blocks; combine_first unions them.
+                    update = prices.combine_first(update)
+                if self.store.exists():
+                    # Freshly fetched values take priority over cached ones on overlapping dates.
+                    update = update.combine_first(self.store.load())
+                self.store.save(update.sort_index())
+            self._save_coverage(coverage)
+        return failures
@@ -0,0 +1,166 @@
+import numpy as np  # NumPy holds the contiguous date x ticker values.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course import features  # Return definitions and the long-format stacker.
+
+
+def wide_codes(index: pd.MultiIndex):
+    """
+    Map a long (Ticker, Date) MultiIndex onto wide array coordinates.
+
+    Output: (date_codes, ticker_codes, dates, tickers) with dates in calendar order, so
+            `wide[date_codes, ticker_codes]` addresses each row of the long frame.
+    """
+    date_level = index.names.index("Date")
+    ticker_level = index.names.index("Ticker")
+    dates = index.levels[date_level]
+    order = np.argsort(dates.to_numpy(), kind="stable")
+    rank = np.empty(len(dates), dtype=np.intp)
+    rank[order] = np.arange(len(dates))
+    # Remap so code order follows the calendar.
+    date_codes = rank[index.codes[date_level]]
+    ticker_codes = np.asarray(index.codes[ticker_level])
+    return date_codes, ticker_codes, dates[order], index.levels[ticker_level]
+
+
+class PriceMatrix:
+    """
+    Wide date x ticker matrix backed by one contiguous NumPy array.
+
+    Slicing by a date range or a contiguous block of tickers returns views (no copy);
+    arbitrary ticker subsets copy only the selected columns. Conversion to and from the
+    long (Ticker, Date) format is meant for the edges of a pipeline only.
+
+    `name` says what the values are: "price", or the feature column a return matrix
+    stands for (e.g. "F_1_d_returns"), so consumers can reject the wrong one.
+    """
+
+    def __init__(self, values: np.ndarray, dates, tickers, name: str = "price"):
+        values = np.asarray(values)
+        if values.ndim != 2 or values.shape != (len(dates), len(tickers)):
+            raise ValueError(
+                f"values of shape {values.shape} do not match {len(dates)} dates x {len(tickers)} tickers"
+            )
+        self.values = values
+        self.dates = pd.DatetimeIndex(dates, name="Date")
+        self.tickers = pd.Index(tickers, name="Ticker")
+        self.name = name
+
+    @classmethod
+    def from_frame(cls, prices: pd.DataFrame, dtype=None):
+        """Wrap a date-indexed wide DataFrame (no copy when the dtype already matches)."""
+        return cls(
+            prices.to_numpy(dtype=dtype, copy=False), prices.index, prices.columns
+        )
+
+    @classmethod
+    def from_long(cls, long, column=None, dtype="float64"):
+        """Build from a long (Ticker, Date) Series, or one column of a long DataFrame."""
+        series = long if column is None else long[column]
+        date_codes, ticker_codes, dates, tickers = wide_codes(series.index)
+        values = np.full((len(dates), len(tickers)), np.nan, dtype=dtype)
+        values[date_codes, ticker_codes] = series.to_numpy(dtype=dtype)
+        return cls(values, dates, tickers)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Wide DataFrame view of the matrix."""
+        return pd.DataFrame(
+            self.values, index=self.dates, columns=self.tickers, copy=False
+        )
+
+    def to_long(self, name: str = "value", dropna: bool = True) -> pd.DataFrame:
+        """Long (Ticker, Date) DataFrame with a single `name` column."""
+        return features.stack_features(
+            {name: self.values}, self.dates, self.tickers, dropna
+        )
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Boolean validity mask: True where a value is present."""
+        return ~np.isnan(self.values)
+
+    def count(self) -> pd.Series:
+        """Number of valid observations per ticker."""
+        return pd.Series(self.mask.sum(axis=0), index=self.tickers)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __repr__(self):
+        return (
+            f"PriceMatrix({len(self.dates)} dates x {len(self.tickers)} tickers, "
+            f"name={self.name!r}, dtype={self.values.dtype})"
+        )
+
+    def slice(self, start_date=None, end_date=None, tickers=None):
+        """
+        Restrict to [start_date, end_date) and optionally a ticker subset.
+
+        Date ranges and tickers that form one contiguous block are views of the same
+        memory; other ticker subsets copy only the selected columns.
+        """
+        start = (
+            0
+            if start_date is None
+            else self.dates.searchsorted(pd.Timestamp(start_date))
+        )
+        stop = (
+            len(self.dates)
+            if end_date is None
+            else self.dates.searchsorted(pd.Timestamp(end_date))
+        )
+        values, dates = self.values[start:stop], self.dates[start:stop]
+        columns = self.tickers
+        if tickers is not None:
+            positions = columns.get_indexer(list(tickers))
+            positions = positions[positions >= 0]
+            if len(positions) and np.array_equal(
+                positions, np.arange(positions[0], positions[0] + len(positions))
+            ):
+                block = slice(positions[0], positions[0] + len(positions))  # View.
+                values, columns = values[:, block], columns[block]
+            else:
+                values, columns = values[:, positions], columns[positions]
+        return PriceMatrix(values, dates, columns, self.name)
+
+    def select(self, ticker_mask) -> "PriceMatrix":
+        """Keep the tickers where the boolean `ticker_mask` is True."""
+        ticker_mask = np.asarray(ticker_mask, dtype=bool)
+        return PriceMatrix(
+            self.values[:, ticker_mask],
+            self.dates,
+            self.tickers[ticker_mask],
+            self.name,
+        )
+
+    def astype(self, dtype) -> "PriceMatrix":
+        """Matrix with values converted to `dtype` (no copy when it already matches)."""
+        return PriceMatrix(
+            self.values.astype(dtype, copy=False), self.dates, self.tickers, self.name
+        )
+
+    def trailing_returns(self, window: int) -> "PriceMatrix":
+        """Percentage change over the previous `window` rows."""
+        return PriceMatrix(
+            features.trailing_returns(self.values, window),
+            self.dates,
+            self.tickers,
+            features.momentum_name(window),
+        )
+
+    def forward_returns(self, horizon: int = 1) -> "PriceMatrix":
+        """Percentage change over the next `horizon` rows."""
+        return PriceMatrix(
+            features.forward_returns(self.values, horizon),
+            self.dates,
+            self.tickers,
+            features.forward_name(horizon),
+        )
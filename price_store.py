@@ -0,0 +1,284 @@
+import json  # json (stdlib) serialises the small ticker/metadata sidecar files.
+import logging  # logging (stdlib) reports the one-off legacy CSV migration.
+import os  # os.replace (stdlib) swaps finished files into place atomically.
+import shutil  # shutil.rmtree (stdlib) removes superseded store versions.
+import time  # time.time_ns (stdlib) names store versions in save order.
+from pathlib import Path  # pathlib.Path (stdlib) gives cross-platform filesystem paths.
+
+import numpy as np  # NumPy provides the raw contiguous arrays and memory-mapped .npy files.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course.price_matrix import PriceMatrix  # Wide date x ticker container.
+
+logger = logging.getLogger(__name__)
+
+# Raw .npy + sidecar needs no extra dependency and can be memory-mapped.
+DEFAULT_PRICE_STORE_BACKEND = "npy"
+# Reads of a versioned store are retried when a save prunes their version meanwhile.
+READ_ATTEMPTS = 5
+
+
+class PriceStore:
+    """
+    Base class for on-disk storage of a date x ticker close-price matrix.
+
+    Subclasses implement `save` and `load`; `load` supports column projection
+    (`tickers`) and date-range pushdown (`start_date` inclusive, `end_date`
+    exclusive, matching the yfinance convention).
+    """
+
+    suffix = ""  # File/directory suffix appended to the store name.
+
+    def __init__(self, path):
+        self.path = Path(path)  # Store location (file or directory, per backend).
+
+    def exists(self) -> bool:
+        """Return True when the store holds data."""
+        return self.path.exists()
+
+    def tickers(self) -> list[str]:
+        """Return the ticker columns held by the store."""
+        raise NotImplementedError
+
+    def save(self, prices: pd.DataFrame) -> None:
+        """Persist a date-indexed price DataFrame, replacing the current contents."""
+        raise NotImplementedError
+
+    def load(self, tickers=None, start_date=None, end_date=None) -> pd.DataFrame:
+        """Load the stored prices, restricted to `tickers` and [start_date, end_date)."""
+        raise NotImplementedError
+
+    def load_matrix(self, tickers=None, start_date=None, end_date=None) -> PriceMatrix:
+        """Same as `load`, returned as a PriceMatrix."""
+        return PriceMatrix.from_frame(self.load(tickers, start_date, end_date))
+
+
+def _date_bounds(dates: pd.DatetimeIndex, start_date, end_date) -> slice:
+    """Translate [start_date, end_date) into a positional slice over sorted dates."""
+    start = (
+        0
+        if start_date is None
+        else dates.searchsorted(pd.Timestamp(start_date), side="left")
+    )
+    stop = (
+        len(dates)
+        if end_date is None
+        else dates.searchsorted(pd.Timestamp(end_date), side="left")
+    )
+    return slice(start, stop)  # Positional slices on NumPy arrays are views (no copy).
+
+
+def replace_atomically(target: Path, write) -> None:
+    """
+    Write to a temporary sibling file and swap it into place with os.replace.
+
+    `write(handle)` fills the binary file handle; readers see the old or the new file,
+    never a partial one.
+    """
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as handle:
+        write(handle)
+    os.replace(tmp, target)  # Atomic: readers holding the old mmap keep a valid inode.
+
+
+def _project_tickers(available: pd.Index, tickers) -> np.ndarray | slice | None:
+    """
+    Return column positions for the requested tickers that exist in the store
+    (None = all). Tickers forming one contiguous block in store order, such as the
+    full `store.tickers()` list, come back as a slice, so the projection stays a view.
+    """
+    if tickers is None:
+        return None
+    positions = available.get_indexer(list(tickers))  # -1 marks labels not present.
+    positions = positions[positions >= 0]
+    if len(positions) and np.array_equal(
+        positions, np.arange(positions[0], positions[0] + len(positions))
+    ):
+        return slice(positions[0], positions[0] + len(positions))
+    return positions
+
+
+class NpyPriceStore(PriceStore):
+    """
+    Raw NumPy storage: `close.npy` (column-major float64) plus `dates.npy` and `tickers.json`.
+
+    The matrix is opened with `np.load(mmap_mode="r")`, so several processes reading the
+    same store share one copy through the OS page cache. Column-major order keeps each
+    ticker's history contiguous, which makes ticker projection a sequential read.
+
+    Every save writes the three files into a new version directory and then switches
+    the `CURRENT` manifest to it with one atomic rename, so a concurrent reader always
+    sees matching prices, dates and tickers. The previous version is kept for readers
+    that resolved it just before the switch; older ones are removed.
+    """
+
+    suffix = ".npystore"
+    manifest = "CURRENT"
+
+    def _version(self) -> Path:
+        """Directory of the current version (the store itself for unversioned stores)."""
+        manifest = self.path / self.manifest
+        if manifest.exists():
+            return self.path / manifest.read_text().strip()
+        return self.path  # Layout written before versioning.
+
+    def _files(self, directory=None):
+        directory = self._version() if directory is None else directory
+        return (
+            directory / "close.npy",
+            directory / "dates.npy",
+            directory / "tickers.json",
+        )
+
+    def exists(self) -> bool:
+        return all(file.exists() for file in self._files())
+
+    def tickers(self) -> list[str]:
+        return json.loads(self._files()[2].read_text())
+
+    def save(self, prices: pd.DataFrame) -> None:
+        prices = prices.sort_index()
+        previous = self._version()
+        # Unique per writer, and sorting by name sorts by age.
+        version = f"v{time.time_ns():020d}-{os.getpid()}"
+        directory = self.path / version
+        directory.mkdir(parents=True)
+        # Column-major order so each ticker's history is contiguous on disk.
+        values = np.asfortranarray(prices.to_numpy(dtype=np.float64))
+        dates = prices.index.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        close_path, dates_path, tickers_path = self._files(directory)
+        np.save(close_path, values)
+        np.save(dates_path, dates)
+        tickers_path.write_text(json.dumps([str(c) for c in prices.columns]))
+        # The single atomic switch: readers see either the old or the new version.
+        replace_atomically(
+            self.path / self.manifest, lambda handle: handle.write(version.encode())
+        )
+
+        keep = {version, previous.name}
+        for old in self.path.glob("v*"):
+            if old.is_dir() and old.name not in keep:
+                shutil.rmtree(old, ignore_errors=True)
+        if previous == self.path:
+            for old in self._files(self.path):
+                old.unlink(missing_ok=True)  # Unversioned files are superseded.
+
+    def load_arrays(self, tickers=None, start_date=None, end_date=None):
+        """Return (values, dates, tickers) with values as a read-only memory-mapped view when possible."""
+        for attempt in range(READ_ATTEMPTS):
+            # Resolve the version once, so all three files come from the same save.
+            close_path, dates_path, tickers_path = self._files()
+            try:
+                dates = pd.DatetimeIndex(
+                    np.load(dates_path).astype("datetime64[ns]"), name="Date"
+                )
+                columns = pd.Index(json.loads(tickers_path.read_text()))
+                # Memory-map instead of reading the whole file into RAM.
+                values = np.load(close_path, mmap_mode="r")
+                break
+            except FileNotFoundError:
+                # Several saves in quick succession removed this version mid-read.
+                if attempt + 1 == READ_ATTEMPTS:
+                    raise
+        rows = _date_bounds(dates, start_date, end_date)
+        values, dates = values[rows], dates[rows]  # Basic slicing keeps the mmap view.
+        positions = _project_tickers(columns, tickers)
+        if positions is not None:
+            # A slice keeps the mmap view; fancy indexing copies only the projected columns.
+            values, columns = values[:, positions], columns[positions]
+        return values, dates, columns
+
+    def load_matrix(self, tickers=None, start_date=None, end_date=None) -> PriceMatrix:
+        # Wraps the memory-mapped array directly; no DataFrame is built.
+        return PriceMatrix(*self.load_arrays(tickers, start_date, end_date))
+
+    def load(self, tickers=None, start_date=None, end_date=None) -> pd.DataFrame:
+        values, dates, columns = self.load_arrays(tickers, start_date, end_date)
+        # copy=False wraps the (possibly memory-mapped) array instead of duplicating it.
+        return pd.DataFrame(values, index=dates, columns=columns, copy=False)
+
+
+class ParquetPriceStore(PriceStore):
+    """Parquet storage via pyarrow with column projection, row-group date filters and memory mapping."""
+
+    suffix = ".parquet"
+
+    def tickers(self) -> list[str]:
+        import pyarrow.parquet as pq  # Optional dependency, only needed for this backend.
+
+        return [name for name in pq.read_schema(self.path).names if name != "Date"]
+
+    def save(self, prices: pd.DataFrame) -> None:
+        prices = prices.sort_index().rename_axis("Date")
+        replace_atomically(
+            self.path, lambda handle: prices.to_parquet(handle, engine="pyarrow")
+        )
+
+    def load(self, tickers=None, start_date=None, end_date=None) -> pd.DataFrame:
+        filters = []
+        if start_date is not None:
+            filters.append(("Date", ">=", pd.Timestamp(start_date)))
+        if end_date is not None:
+            filters.append(("Date", "<", pd.Timestamp(end_date)))
+        columns = None
+        if tickers is not None:
+            available = set(self.tickers())
+            columns = [ticker for ticker in tickers if ticker in available]
+        return pd.read_parquet(
+            self.path,
+            engine="pyarrow",
+            columns=columns,  # Column projection: only the requested tickers are decoded.
+            # Date pushdown: row groups outside the range are skipped.
+            filters=filters or None,
+            memory_map=True,  # Map the file instead of buffering it in process memory.
+        )
+
+
+class CsvPriceStore(PriceStore):
+    """Legacy CSV storage; reads the whole file and filters afterwards."""
+
+    suffix = ".csv"
+
+    def tickers(self) -> list[str]:
+        return pd.read_csv(self.path, index_col=0, nrows=0).columns.tolist()
+
+    def save(self, prices: pd.DataFrame) -> None:
+        prices.to_csv(self.path)
+
+    def load(self, tickers=None, start_date=None, end_date=None) -> pd.DataFrame:
+        prices = pd.read_csv(self.path, index_col=0, parse_dates=True)
+        prices = prices.iloc[_date_bounds(prices.index, start_date, end_date)]
+        positions = _project_tickers(prices.columns, tickers)
+        return prices if positions is None else prices.iloc[:, positions]
+
+
+BACKENDS = {
+    "npy": NpyPriceStore,
+    "parquet": ParquetPriceStore,
+    "csv": CsvPriceStore,
+}
+
+
+def open_price_store(
+    base_path, backend: str = DEFAULT_PRICE_STORE_BACKEND
+) -> PriceStore:
+    """
+    Return the price store for `base_path` (a path without suffix) using the named backend.
+
+    A legacy `<base_path>.csv` cache is migrated into the new backend on first use.
+    """
+    try:
+        store_class = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown price store backend {backend!r}; expected one of {sorted(BACKENDS)}"
+        )
+    base_path = Path(base_path)
+    store = store_class(base_path.with_name(base_path.name + store_class.suffix))
+
+    legacy_csv = base_path.with_name(base_path.name + CsvPriceStore.suffix)
+    if backend != "csv" and not store.exists() and legacy_csv.exists():
+        logger.info("Migrating %s to the %s price store.", legacy_csv.name, backend)
+        # One-off conversion; the CSV itself is left untouched.
+        store.save(CsvPriceStore(legacy_csv).load())
+    return store
@@ -0,0 +1,148 @@
+"""
+Stage-level instrumentation for the funct_lib pipeline.
+
+Stages are timed only while a `profile()` block is active; otherwise `stage()` hands
+back a shared no-op context, so instrumented code pays one global lookup per stage.
+
+    with profiling.profile(trace_memory=True) as profiler:
+        prices = fl.create_sp500_historical_prices()
+        total_returns = fl.computing_returns(prices, [1])
+    print(profiler.summary())
+    profiler.to_jsonl("timings.jsonl")
+"""
+
+import contextlib  # contextlib.contextmanager (stdlib) builds the profile() block.
+import json  # json (stdlib) writes one structured record per line.
+import logging  # logging (stdlib) emits every finished stage as a structured log record.
+import time  # time.perf_counter (stdlib) is the timer.
+import tracemalloc  # tracemalloc (stdlib) measures memory deltas, NumPy arrays included.
+
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+logger = logging.getLogger(__name__)
+
+_active = None  # The Profiler collecting stage records; None while profiling is off.
+
+
+def _shape(data):
+    """(rows, tickers) of a long (Ticker, Date) frame, a wide frame or a PriceMatrix."""
+    index = getattr(data, "index", None)
+    if isinstance(index, pd.MultiIndex) and "Ticker" in index.names:
+        return len(index), len(index.unique("Ticker"))
+    tickers = getattr(data, "tickers", getattr(data, "columns", None))
+    return len(data), None if tickers is None else len(tickers)
+
+
+class _Stage:
+    """
+    One timed stage; `observe` records the row and ticker counts of its output.
+
+    Memory peaks are measured with tracemalloc.reset_peak, so stages are meant to be
+    flat: an enclosing stage's peak only covers the part after its last inner stage.
+    """
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.record = {"stage": name}
+
+    def observe(self, data):
+        self.record["rows"], self.record["tickers"] = _shape(data)
+        return data
+
+    def __enter__(self):
+        if self.profiler.trace_memory:
+            self._memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.record["seconds"] = time.perf_counter() - self._start
+        if self.profiler.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self.record["memory_delta_mb"] = (current - self._memory) / 2**20
+            self.record["peak_mb"] = (peak - self._memory) / 2**20
+        self.profiler.records.append(self.record)
+        logger.debug("stage %(stage)s: %(seconds).3f s", self.record, extra=self.record)
+        return False
+
+
+class _DisabledStage:
+    """Shared stand-in used while profiling is off: every method is a no-op."""
+
+    def observe(self, data):
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_DISABLED = _DisabledStage()
+
+
+class Profiler:
+    """Collects one record per finished stage (see `profile`)."""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.records = []
+
+    def summary(self) -> pd.DataFrame:
+        """Total time, call count and last row / ticker counts per stage, slowest first."""
+        if not self.records:
+            return pd.DataFrame(columns=["calls", "seconds", "rows", "tickers"])
+        records = pd.DataFrame(self.records)
+        aggregations = {"calls": ("stage", "size"), "seconds": ("seconds", "sum")}
+        for column, how in [
+            ("rows", "last"),
+            ("tickers", "last"),
+            ("memory_delta_mb", "sum"),
+            ("peak_mb", "max"),
+        ]:
+            if column in records:
+                aggregations[column] = (column, how)
+        table = records.groupby("stage", sort=False).agg(**aggregations)
+        return table.sort_values("seconds", ascending=False)
+
+    def to_jsonl(self, path) -> None:
+        """Write the stage records as JSON lines, one per finished stage."""
+        with open(path, "w") as handle:
+            for record in self.records:
+                handle.write(json.dumps(record) + "\n")
+
+
+@contextlib.contextmanager
+def profile(trace_memory: bool = False):
+    """
+    Collect stage records for the code run inside the block.
+
+    Input:  trace_memory: also record memory deltas and peaks (slower, uses tracemalloc)
+    Output: the Profiler holding the records
+    """
+    global _active
+    profiler, previous = Profiler(trace_memory), _active
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def stage(name: str):
+    """
+    Context manager timing one pipeline stage while a `profile()` block is active.
+
+        with profiling.stage("filter") as timed:
+            prices = timed.observe(_filter_dense_tickers(prices))
+    """
+    if _active is None:
+        return _DISABLED
+    return _Stage(_active, name)
@@ -0,0 +1,282 @@
+"""
+Headless report rendering for benchmark, strategy and factor charts.
+
+Charts are described by small `Chart` objects whose data is aggregated up front in
+the calling process (a 2-D histogram instead of millions of scatter points, histogram
+counts instead of raw values), so only kilobytes travel to the worker processes that
+draw them with matplotlib's non-interactive Agg backend and save PNG files. Every
+report also gets an HTML page showing its charts and summary table.
+
+    with report.ReportRenderer("reports") as renderer:
+        fl.compute_strat_perf(..., plot=False, renderer=renderer)
+        renderer.submit("RSI factor", report.factor_charts(total_returns, "RSI"))
+    # Leaving the block waits for the remaining charts.
+"""
+
+import copy  # copy.deepcopy (stdlib) snapshots chart data at submit time.
+import html  # html.escape (stdlib) keeps report titles safe in the HTML page.
+import re  # re (stdlib) turns report and chart names into file names.
+from concurrent.futures import ProcessPoolExecutor  # Renders charts in parallel.
+from dataclasses import dataclass, field  # Lightweight chart description.
+from pathlib import Path  # pathlib.Path (stdlib) gives cross-platform filesystem paths.
+
+import numpy as np  # NumPy pre-aggregates dense data before it is sent to a worker.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+DEFAULT_REPORT_DIR = "reports"
+DEFAULT_DENSITY_BINS = 200  # Cells per axis of the 2-D histogram replacing a scatter.
+DENSITY_PERCENTILES = (0.5, 99.5)  # Axis range of density charts; outliers are clipped.
+
+
+@dataclass
+class Chart:
+    """
+    One chart of a report: what to draw (`kind`) and its pre-aggregated data.
+
+    Kinds: "cumulative" and "calendar" (date or year x series frames, see plotting.py),
+    "bars" (a Series), "histogram" (counts and edges) and "density" (2-D counts,
+    edges and the binned mean of y).
+    """
+
+    name: str
+    kind: str
+    data: object
+    title: str = ""
+    xlabel: str = ""
+    ylabel: str = ""
+    options: dict = field(default_factory=dict)
+
+
+def _file_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "chart"
+
+
+def cumulative_chart(cum_returns: pd.DataFrame, name="cumulative_returns") -> Chart:
+    """Cumulative returns, one line per column (see plotting.plot_cumulative_returns)."""
+    return Chart(name, "cumulative", cum_returns)
+
+
+def calendar_chart(calendar_returns: pd.DataFrame, name="calendar_returns") -> Chart:
+    """Calendar-year returns as grouped bars (see plotting.plot_calendar_returns)."""
+    return Chart(name, "calendar", calendar_returns, title="Calendar-year returns (%)")
+
+
+def histogram_chart(values, bins: int = 50, name="histogram", **labels) -> Chart:
+    """Histogram of `values`; only the bin counts are kept."""
+    values = np.asarray(values, dtype="float64")
+    counts, edges = np.histogram(values[~np.isnan(values)], bins=bins)
+    return Chart(name, "histogram", {"counts": counts, "edges": edges}, **labels)
+
+
+def _bin_codes(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Bin of each value for equal-width `edges` (last edge inclusive), -1 outside."""
+    bins = len(edges) - 1
+    span = edges[-1] - edges[0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        codes = np.floor((values - edges[0]) / span * bins) if span else values * 0
+    codes = np.where(values == edges[-1], bins - 1, codes)
+    return np.where((codes >= 0) & (codes < bins), codes, -1).astype(np.intp)
+
+
+def density_chart(x, y, bins: int = DEFAULT_DENSITY_BINS, name="density", **labels):
+    """
+    Scatter replacement for dense data: 2-D histogram counts (log colour scale) and
+    the mean of `y` per `x` bin.
+
+    The axes span the 0.5th to 99.5th percentiles of each variable, so a handful of
+    extreme returns does not squash the picture.
+    """
+    x, y = np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64")
+    present = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[present], y[present]
+    if not len(x):
+        raise ValueError("density_chart needs at least one (x, y) pair")
+    x_edges = np.linspace(*np.percentile(x, DENSITY_PERCENTILES), bins + 1)
+    y_edges = np.linspace(*np.percentile(y, DENSITY_PERCENTILES), bins + 1)
+    # Equal-width bins: the cell follows from one multiply instead of a binary search.
+    column = _bin_codes(x, x_edges)
+    row = _bin_codes(y, y_edges)
+    inside = column >= 0
+    counts = np.bincount(
+        column[inside & (row >= 0)] * bins + row[inside & (row >= 0)],
+        minlength=bins * bins,
+    ).reshape(bins, bins)
+    # Binned mean over all points of each x bin (not only those inside the y range).
+    sums = np.bincount(column[inside], weights=y[inside], minlength=bins)
+    totals = np.bincount(column[inside], minlength=bins)
+    with np.errstate(invalid="ignore"):
+        mean = sums / totals
+    data = {"counts": counts, "x_edges": x_edges, "y_edges": y_edges, "mean": mean}
+    return Chart(name, "density", data, **labels)
+
+
+def bars_chart(values: pd.Series, name="bars", **labels) -> Chart:
+    """Bar chart of a Series (e.g. mean forward return per bucket)."""
+    return Chart(name, "bars", values, **labels)
+
+
+def strategy_charts(cum_returns, calendar_returns) -> list[Chart]:
+    """The charts `compute_BM_perf` / `compute_strat_perf` draw interactively."""
+    return [cumulative_chart(cum_returns), calendar_chart(calendar_returns)]
+
+
+def factor_charts(
+    total_returns: pd.DataFrame,
+    feature: str,
+    target: str = "F_1_d_returns",
+    bucket_column: str | None = None,
+) -> list[Chart]:
+    """
+    Distribution of `feature`, its density against `target` and, when `bucket_column`
+    is given (e.g. from factor_analysis.assign_buckets), the mean target per bucket.
+    """
+    values = total_returns[feature].to_numpy(dtype="float64")
+    charts = [
+        histogram_chart(
+            values,
+            name=f"{feature}_histogram",
+            title=f"Distribution of {feature}",
+            xlabel=feature,
+            ylabel="Frequency",
+        ),
+        density_chart(
+            values,
+            total_returns[target].to_numpy(dtype="float64"),
+            name=f"{feature}_vs_{target}",
+            title=f"{feature} vs {target}",
+            xlabel=feature,
+            ylabel=target,
+        ),
+    ]
+    if bucket_column is not None:
+        charts.append(
+            bars_chart(
+                total_returns.groupby(bucket_column)[target].mean(),
+                name=f"{feature}_buckets",
+                title=f"Mean {target} per {feature} bucket",
+                xlabel=bucket_column,
+                ylabel=target,
+            )
+        )
+    return charts
+
+
+def _draw(chart: Chart, ax) -> None:
+    from ai_course import plotting
+
+    if chart.kind == "cumulative":
+        plotting.plot_cumulative_returns(chart.data, ax=ax, show=False)
+    elif chart.kind == "calendar":
+        plotting.plot_calendar_returns(chart.data, ax=ax, show=False)
+    elif chart.kind == "bars":
+        chart.data.plot.bar(ax=ax, rot=0, color="skyblue", edgecolor="black")
+    elif chart.kind == "histogram":
+        edges = chart.data["edges"]
+        ax.stairs(chart.data["counts"], edges, fill=True, color="skyblue")
+        ax.stairs(chart.data["counts"], edges, color="black")
+    elif chart.kind == "density":
+        from matplotlib.colors import LogNorm
+
+        data = chart.data
+        counts = np.ma.masked_equal(data["counts"].T, 0)  # Empty cells stay blank.
+        mesh = ax.pcolormesh(
+            data["x_edges"], data["y_edges"], counts, norm=LogNorm(), cmap="viridis"
+        )
+        ax.figure.colorbar(mesh, ax=ax, label="Observations")
+        centres = (data["x_edges"][:-1] + data["x_edges"][1:]) / 2
+        ax.plot(centres, data["mean"], color="red", linewidth=1, label="Binned mean")
+        ax.legend()
+    else:
+        raise ValueError(f"Unknown chart kind {chart.kind!r}")
+    if chart.title:
+        ax.set_title(chart.title, fontsize=16, fontweight="bold")
+    if chart.xlabel:
+        ax.set_xlabel(chart.xlabel, fontsize=14)
+    if chart.ylabel:
+        ax.set_ylabel(chart.ylabel, fontsize=14)
+    ax.grid(True)
+
+
+def render_chart(chart: Chart, path) -> str:
+    """Draw `chart` on an off-screen figure and save it as PNG; returns the path."""
+    # A bare Figure renders with Agg and never touches the pyplot window manager.
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=chart.options.get("figsize", (10, 6)), layout="tight")
+    _draw(chart, figure.subplots())
+    figure.savefig(path, dpi=chart.options.get("dpi", 100))
+    return str(path)
+
+
+def _use_agg() -> None:
+    # Worker initializer: plotting.py goes through pyplot, which must stay headless.
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _html_page(title: str, chart_files, summary) -> str:
+    parts = [
+        "<!DOCTYPE html>",
+        f"<html><head><meta charset='utf-8'><title>{html.escape(title)}</title></head>",
+        f"<body><h1>{html.escape(title)}</h1>",
+    ]
+    if summary is not None:
+        parts.append(summary.to_html(float_format=lambda value: f"{value:.2f}"))
+    parts += [f"<p><img src='{html.escape(name)}'></p>" for name in chart_files]
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+class ReportRenderer:
+    """
+    Render reports in a pool of worker processes while the caller keeps computing.
+
+    `submit` writes the report's HTML page at once and queues its charts; it returns
+    the chart futures. Leaving the `with` block (or `close()`) waits for all charts
+    and re-raises the first rendering error.
+    """
+
+    def __init__(self, directory=DEFAULT_REPORT_DIR, max_workers=None):
+        self.directory = Path(directory)
+        self.pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_use_agg)
+        self.futures = []
+
+    def submit(self, title: str, charts, summary: pd.DataFrame | None = None) -> list:
+        """
+        Queue one report: `<directory>/<title>/<chart>.png` plus `<title>.html`.
+
+        The charts are copied here, so later changes to their data do not leak in.
+        """
+        folder = _file_name(title)
+        (self.directory / folder).mkdir(parents=True, exist_ok=True)
+        files = [f"{folder}/{_file_name(chart.name)}.png" for chart in charts]
+        (self.directory / f"{folder}.html").write_text(
+            _html_page(title, files, summary), encoding="utf-8"
+        )
+        # The pool pickles its arguments later, on a feeder thread; a snapshot keeps
+        # frames the caller goes on modifying (e.g. compute_strat_perf adding its
+        # column to the benchmark's cum_returns) out of this report.
+        charts = copy.deepcopy(list(charts))
+        futures = [
+            self.pool.submit(render_chart, chart, self.directory / name)
+            for chart, name in zip(charts, files)
+        ]
+        self.futures += futures
+        return futures
+
+    def close(self) -> list[str]:
+        """Wait for every queued chart; returns the written PNG paths."""
+        try:
+            return [future.result() for future in self.futures]
+        finally:
+            self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is not None:
+            self.pool.shutdown(cancel_futures=True)
+            return
+        self.close()
@@ -0,0 +1,422 @@
+"""
+Local query server over the in-memory price matrix and derived features.
+
+The prices are loaded once, the return features and the RSI are computed once on the
+wide date x ticker arrays (the same definitions as computing_returns followed by
+indicators.compute_rsi), and every query is an array lookup or a slice of them:
+
+    GET /health
+    GET /point?ticker=AAPL&date=2025-10-17&fields=RSI,1_d_returns
+    GET /range?ticker=AAPL&start=2025-10-06&end=2025-10-10&fields=RSI
+    GET /cross_section?date=2025-10-17&field=RSI&top=10&ascending=true
+    GET /metrics?start=2010-01-01&end=2015-12-31&strategy=rsi&buy_threshold=30
+    POST /refresh
+
+Point queries are as of the date: the last trading day on or before it. Ranges
+include both ends. Features exist on the rows computing_returns keeps, so the last
+day (no forward return yet) has its price only; cross sections then fall back to the
+last day with values. Responses are JSON, with null for missing values.
+
+Requests are served concurrently by asyncio. A refresh (on request, or every
+`refresh_interval` seconds) reloads and recomputes in a worker thread while queries
+keep using the current snapshot, then swaps in the new one if the prices changed.
+
+    python -m ai_course serve --config run.toml
+"""
+
+import asyncio  # asyncio (stdlib) serves concurrent connections on one thread.
+import json  # json (stdlib) encodes the responses.
+import logging  # logging (stdlib) reports refreshes and failed requests.
+import time  # time.perf_counter (stdlib) times queries and refreshes.
+from urllib.parse import parse_qs, urlsplit  # Query-string parsing (stdlib).
+
+import numpy as np  # NumPy holds the wide feature arrays.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course import features, indicators, metrics, signals
+from ai_course.feature_cache import (
+    fingerprint,
+)  # Detects whether a refresh changed anything.
+from ai_course.price_matrix import PriceMatrix  # Wide date x ticker container.
+
+DEFAULT_HOST = "127.0.0.1"  # Local only: there is no authentication.
+DEFAULT_PORT = 8765
+MAX_HEADER_BYTES = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class QueryError(ValueError):
+    """A request that cannot be answered; reported to the client as 400."""
+
+
+class NotFound(Exception):
+    """A request for a path the server does not serve; reported as 404."""
+
+
+def _json_values(values) -> list:
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+class Snapshot:
+    """Prices, wide features, benchmark returns and the RSI for one state of the data."""
+
+    def __init__(
+        self,
+        historical_prices,
+        list_of_momentums=(1,),
+        rsi_window: int = indicators.RSI_WINDOW,
+        universe=None,
+    ):
+        if not isinstance(historical_prices, PriceMatrix):
+            historical_prices = PriceMatrix.from_frame(historical_prices)
+        values = historical_prices.values.astype("float64", copy=False)
+        self.fingerprint = fingerprint(historical_prices)
+        self.dates, self.tickers = historical_prices.dates, historical_prices.tickers
+        # The RSI is computed on 1-day returns, as in the demo pipelines.
+        self.list_of_momentums = sorted(set(list_of_momentums) | {1})
+        self.loaded_at = pd.Timestamp.now()
+
+        # Rows missing any feature are blanked, matching the rows computing_returns keeps.
+        self.features, self.kept = features.kept_features(
+            values, self.list_of_momentums, (1,)
+        )
+        if universe is not None:  # Non-members are blanked, as in computing_returns.
+            self.features = universe.restrict(self.features, self.dates, self.tickers)
+            self.kept &= universe.mask(self.dates, self.tickers)
+        self.features["RSI"] = indicators.rsi_matrix(
+            self.features[features.momentum_name(1)], [rsi_window]
+        )[rsi_window]
+        self.features["price"] = values
+        self.filled = {
+            name: ~np.isnan(array).all(axis=1) for name, array in self.features.items()
+        }
+        self.counts = self.kept.sum(axis=1)
+        forward = self.features[features.forward_name(1)]
+        with np.errstate(invalid="ignore"):
+            self.benchmark = pd.Series(
+                np.nansum(forward, axis=1) / self.counts, index=self.dates
+            ).dropna()
+
+    # Lookups -----------------------------------------------------------------
+
+    def _ticker(self, ticker: str) -> int:
+        position = self.tickers.get_indexer([ticker])[0]
+        if position < 0:
+            raise QueryError(f"Unknown ticker {ticker!r}")
+        return position
+
+    def _as_of(self, date) -> int:
+        row = self.dates.searchsorted(pd.Timestamp(date), side="right") - 1
+        if row < 0:
+            raise QueryError(f"No data on or before {date}")
+        return row
+
+    def _fields(self, fields) -> list[str]:
+        fields = list(fields) if fields else ["price", "RSI"]
+        unknown = [name for name in fields if name not in self.features]
+        if unknown:
+            raise QueryError(
+                f"Unknown fields {unknown}; available: {sorted(self.features)}"
+            )
+        return fields
+
+    def _rows(self, start, end) -> slice:
+        first = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start))
+        stop = (
+            len(self.dates)
+            if end is None
+            else self.dates.searchsorted(pd.Timestamp(end), side="right")
+        )
+        return slice(first, stop)
+
+    # Queries -----------------------------------------------------------------
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "tickers": len(self.tickers),
+            "first_date": f"{self.dates[0]:%Y-%m-%d}" if len(self.dates) else None,
+            "last_date": f"{self.dates[-1]:%Y-%m-%d}" if len(self.dates) else None,
+            "fields": sorted(self.features),
+            "loaded_at": self.loaded_at.isoformat(timespec="seconds"),
+        }
+
+    def point(self, ticker: str, date=None, fields=None) -> dict:
+        """Feature values of one ticker on the last trading day on or before `date`."""
+        column = self._ticker(ticker)
+        row = len(self.dates) - 1 if date is None else self._as_of(date)
+        fields = self._fields(fields)
+        return {
+            "ticker": ticker,
+            "date": f"{self.dates[row]:%Y-%m-%d}",
+            **dict(
+                zip(
+                    fields,
+                    _json_values([self.features[name][row, column] for name in fields]),
+                )
+            ),
+        }
+
+    def range(self, ticker: str, start=None, end=None, fields=None) -> dict:
+        """Feature values of one ticker for every trading day in [start, end]."""
+        column, rows = self._ticker(ticker), self._rows(start, end)
+        fields = self._fields(fields)
+        return {
+            "ticker": ticker,
+            "dates": [f"{date:%Y-%m-%d}" for date in self.dates[rows]],
+            **{
+                name: _json_values(self.features[name][rows, column]) for name in fields
+            },
+        }
+
+    def cross_section(self, date=None, field="RSI", top=None, ascending=True) -> dict:
+        """
+        One feature across the tickers that have it, sorted, optionally the top N.
+
+        Uses the last date on or before `date` (default: the end) with any value.
+        """
+        (field,) = self._fields([field])
+        row = len(self.dates) - 1 if date is None else self._as_of(date)
+        filled = np.flatnonzero(self.filled[field][: row + 1])
+        if not len(filled):
+            raise QueryError(f"No {field} values on or before {date}")
+        row = filled[-1]
+        values = self.features[field][row]
+        order = np.argsort(values if ascending else -values, kind="stable")
+        order = order[~np.isnan(values[order])]
+        if top is not None:
+            order = order[:top]
+        return {
+            "date": f"{self.dates[row]:%Y-%m-%d}",
+            "field": field,
+            "tickers": self.tickers[order].tolist(),
+            "values": _json_values(values[order]),
+        }
+
+    def strategy_returns(self, buy_threshold: float) -> pd.Series:
+        """Daily returns of the RSI < `buy_threshold` rule, as in compute_strat_perf."""
+        positions = signals.below("RSI", buy_threshold).positions(self.features)
+        forward = self.features[features.forward_name(1)]
+        with np.errstate(invalid="ignore"):
+            daily = np.nansum(forward * positions, axis=1) / self.counts
+        return pd.Series(daily, index=self.dates).dropna()
+
+    def metrics(self, start=None, end=None, strategy="benchmark", buy_threshold=30):
+        """CAGR, Sharpe, volatility and max drawdown over [start, end]."""
+        if strategy == "benchmark":
+            daily = self.benchmark
+        elif strategy == "rsi":
+            daily = self.strategy_returns(buy_threshold)
+        else:
+            raise QueryError(
+                f"Unknown strategy {strategy!r}; expected benchmark or rsi"
+            )
+        daily = daily.loc[
+            None if start is None else pd.Timestamp(start) : None
+            if end is None
+            else pd.Timestamp(end)
+        ]
+        if daily.empty:
+            raise QueryError("No returns in the requested period")
+        summary = metrics.compute_metrics(daily.rename(strategy)).summary.iloc[0]
+        return {
+            "strategy": strategy,
+            "start": f"{daily.index[0]:%Y-%m-%d}",
+            "end": f"{daily.index[-1]:%Y-%m-%d}",
+            "days": len(daily),
+            **dict(zip(summary.index, _json_values(summary.to_numpy()))),
+        }
+
+
+def _parameters(query: str) -> dict:
+    return {name: values[-1] for name, values in parse_qs(query).items()}
+
+
+def _required(parameters: dict, name: str) -> str:
+    if name not in parameters:
+        raise QueryError(f"Missing parameter {name!r}")
+    return parameters[name]
+
+
+def _split(value):
+    return [part for part in value.split(",") if part] if value else None
+
+
+class QueryServer:
+    """
+    asyncio HTTP/1.1 server answering queries against the current Snapshot.
+
+    `loader()` returns the date x ticker prices (e.g. a cache-only
+    funct_lib.create_sp500_historical_prices call); it runs in a worker thread at
+    start-up and on every refresh.
+    """
+
+    def __init__(
+        self,
+        loader,
+        list_of_momentums=(1,),
+        rsi_window: int = indicators.RSI_WINDOW,
+        refresh_interval=None,
+        universe=None,
+    ):
+        self.loader = loader
+        self.universe = universe
+        self.list_of_momentums = list(list_of_momentums)
+        self.rsi_window = rsi_window
+        self.refresh_interval = refresh_interval
+        self.snapshot = None
+        self._refreshing = asyncio.Lock()
+
+    def _build(self):
+        return Snapshot(
+            self.loader(), self.list_of_momentums, self.rsi_window, self.universe
+        )
+
+    async def refresh(self) -> dict:
+        """Reload and recompute off the event loop; swap only if the prices changed."""
+        async with self._refreshing:  # One refresh at a time; queries continue.
+            start = time.perf_counter()
+            snapshot = await asyncio.to_thread(self._build)
+            changed = (
+                self.snapshot is None
+                or snapshot.fingerprint != self.snapshot.fingerprint
+            )
+            if changed:
+                self.snapshot = snapshot  # Atomic swap: a query sees one snapshot.
+            seconds = time.perf_counter() - start
+            logger.info("Refresh in %.2f s, changed: %s", seconds, changed)
+            return {"changed": changed, "seconds": round(seconds, 3)}
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Scheduled refresh failed")
+
+    async def dispatch(self, method: str, target: str) -> dict:
+        """Answer one request; raises QueryError (400) or NotFound (404)."""
+        url = urlsplit(target)
+        parameters = _parameters(url.query)
+        snapshot = self.snapshot
+        try:
+            if url.path == "/refresh" and method == "POST":
+                return await self.refresh()
+            if method != "GET":
+                raise QueryError(f"{method} is not supported for {url.path}")
+            if url.path == "/health":
+                return snapshot.health()
+            if url.path == "/point":
+                return snapshot.point(
+                    _required(parameters, "ticker"),
+                    parameters.get("date"),
+                    _split(parameters.get("fields")),
+                )
+            if url.path == "/range":
+                return snapshot.range(
+                    _required(parameters, "ticker"),
+                    parameters.get("start"),
+                    parameters.get("end"),
+                    _split(parameters.get("fields")),
+                )
+            if url.path == "/cross_section":
+                top = parameters.get("top")
+                return snapshot.cross_section(
+                    parameters.get("date"),
+                    parameters.get("field", "RSI"),
+                    None if top is None else int(top),
+                    parameters.get("ascending", "true").lower() != "false",
+                )
+            if url.path == "/metrics":
+                return snapshot.metrics(
+                    parameters.get("start"),
+                    parameters.get("end"),
+                    parameters.get("strategy", "benchmark"),
+                    float(parameters.get("buy_threshold", 30)),
+                )
+        except (TypeError, ValueError) as error:
+            if isinstance(error, QueryError):
+                raise
+            raise QueryError(str(error)) from None
+        raise NotFound(url.path)
+
+    async def _respond(self, writer, status: str, body: dict, keep_alive: bool):
+        payload = json.dumps(body).encode()
+        writer.write(
+            (
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode()
+            + payload
+        )
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        """Serve one connection; HTTP/1.1 keep-alive lets a client reuse it."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (
+                    asyncio.IncompleteReadError,
+                    asyncio.LimitOverrunError,
+                    asyncio.CancelledError,  # Server shutting down.
+                    ConnectionError,
+                ):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, version = (lines[0].split() + ["", "", ""])[:3]
+                headers = {
+                    name.strip().lower(): value.strip()
+                    for name, _, value in (line.partition(":") for line in lines[1:])
+                    if name
+                }
+                length = int(headers.get("content-length", 0) or 0)
+                if length:
+                    await reader.readexactly(length)  # Request bodies are ignored.
+                keep_alive = (
+                    version == "HTTP/1.1"
+                    and headers.get("connection", "").lower() != "close"
+                )
+                start = time.perf_counter()
+                try:
+                    status, body = "200 OK", await self.dispatch(method, target)
+                except QueryError as error:
+                    status, body = "400 Bad Request", {"error": str(error)}
+                except NotFound:
+                    status, body = "404 Not Found", {"error": f"Unknown path {target}"}
+                except Exception as error:
+                    logger.exception("Request %s %s failed", method, target)
+                    status, body = "500 Internal Server Error", {"error": str(error)}
+                logger.debug(
+                    "%s %s -> %s in %.2f ms",
+                    method,
+                    target,
+                    status,
+                    (time.perf_counter() - start) * 1000,
+                )
+                await self._respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """Load the first snapshot, then serve until cancelled."""
+        await self.refresh()
+        server = await asyncio.start_server(
+            self.handle, host, port, limit=MAX_HEADER_BYTES
+        )
+        if self.refresh_interval:
+            refresher = asyncio.create_task(self._refresh_periodically())
+        logger.info("Serving on http://%s:%d", host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if self.refresh_interval:
+                refresher.cancel()
@@ -0,0 +1,153 @@
+import operator  # operator (stdlib) maps comparison symbols to vectorised functions.
+
+import numpy as np  # NumPy evaluates every rule as one array expression.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+_COMPARISONS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+class Rule:
+    """
+    A vectorised trading rule over feature columns.
+
+    Rules are evaluated against anything indexable by column name: a long (Ticker, Date)
+    DataFrame or a dict of wide date x ticker arrays. Comparisons with NaN are False, so
+    rows without a feature value never trigger a position. Rules combine with `&`, `|`
+    and `~`.
+    """
+
+    def columns(self) -> set[str]:
+        """Feature columns the rule reads."""
+        raise NotImplementedError
+
+    def evaluate(self, frame) -> np.ndarray:
+        """Return a boolean array that is True where the rule fires."""
+        raise NotImplementedError
+
+    def positions(self, frame, position: int = 1):
+        """
+        Positions for every row: `position` where the rule fires and 0 elsewhere.
+
+        Returns a Series aligned with `frame` for DataFrames, otherwise an array.
+        """
+        values = np.where(self.evaluate(frame), position, 0)
+        if isinstance(frame, pd.DataFrame):
+            return pd.Series(values, index=frame.index, name="Position")
+        return values
+
+    def __and__(self, other):
+        return Combination(np.logical_and, self, other, "&")
+
+    def __or__(self, other):
+        return Combination(np.logical_or, self, other, "|")
+
+    def __invert__(self):
+        return Not(self)
+
+
+class Threshold(Rule):
+    """`column <op> value`, where `value` is a number or the name of another column."""
+
+    def __init__(self, column: str, op: str, value):
+        if op not in _COMPARISONS:
+            raise ValueError(
+                f"Unknown comparison {op!r}; expected one of {list(_COMPARISONS)}"
+            )
+        self.column, self.op, self.value = column, op, value
+
+    def columns(self) -> set[str]:
+        return {self.column} | ({self.value} if isinstance(self.value, str) else set())
+
+    def evaluate(self, frame) -> np.ndarray:
+        left = np.asarray(frame[self.column])
+        right = (
+            np.asarray(frame[self.value]) if isinstance(self.value, str) else self.value
+        )
+        fired = _COMPARISONS[self.op](left, right)
+        if self.op == "!=":
+            # NaN != x is True; rows without a value must not fire.
+            fired &= ~np.isnan(np.asarray(left, dtype="float64"))
+            if isinstance(self.value, str):
+                fired &= ~np.isnan(np.asarray(right, dtype="float64"))
+        return fired
+
+    def __repr__(self):
+        return f"({self.column} {self.op} {self.value!r})"
+
+
+class Band(Rule):
+    """`lower <= column <= upper` (bounds inclusive unless `inclusive=False`)."""
+
+    def __init__(self, column: str, lower, upper, inclusive: bool = True):
+        self.column, self.lower, self.upper = column, lower, upper
+        self.inclusive = inclusive
+
+    def columns(self) -> set[str]:
+        return {self.column}
+
+    def evaluate(self, frame) -> np.ndarray:
+        values = np.asarray(frame[self.column])
+        if self.inclusive:
+            return (values >= self.lower) & (values <= self.upper)
+        return (values > self.lower) & (values < self.upper)
+
+    def __repr__(self):
+        bounds = "[]" if self.inclusive else "()"
+        return f"({self.column} in {bounds[0]}{self.lower}, {self.upper}{bounds[1]})"
+
+
+class Combination(Rule):
+    """Element-wise logical combination of two rules."""
+
+    def __init__(self, combine, left: Rule, right: Rule, symbol: str):
+        self.combine, self.left, self.right, self.symbol = combine, left, right, symbol
+
+    def columns(self) -> set[str]:
+        return self.left.columns() | self.right.columns()
+
+    def evaluate(self, frame) -> np.ndarray:
+        return self.combine(self.left.evaluate(frame), self.right.evaluate(frame))
+
+    def __repr__(self):
+        return f"({self.left!r} {self.symbol} {self.right!r})"
+
+
+class Not(Rule):
+    """Element-wise negation of a rule (rows with missing features stay False)."""
+
+    def __init__(self, rule: Rule):
+        self.rule = rule
+
+    def columns(self) -> set[str]:
+        return self.rule.columns()
+
+    def evaluate(self, frame) -> np.ndarray:
+        fired = ~self.rule.evaluate(frame)
+        for column in self.rule.columns():
+            fired &= ~np.isnan(np.asarray(frame[column], dtype="float64"))
+        return fired
+
+    def __repr__(self):
+        return f"~{self.rule!r}"
+
+
+def below(column: str, value) -> Rule:
+    """Rule firing where `column < value`."""
+    return Threshold(column, "<", value)
+
+
+def above(column: str, value) -> Rule:
+    """Rule firing where `column > value`."""
+    return Threshold(column, ">", value)
+
+
+def between(column: str, lower, upper, inclusive: bool = True) -> Rule:
+    """Rule firing where `column` lies within [lower, upper] (or (lower, upper))."""
+    return Band(column, lower, upper, inclusive)
@@ -0,0 +1,111 @@
+import itertools  # itertools.product (stdlib) expands the parameter grid.
+import os  # os.cpu_count (stdlib) sizes the default process pool.
+from concurrent.futures import ProcessPoolExecutor  # Parallel evaluation across cores.
+from multiprocessing import shared_memory  # One price matrix shared by all workers.
+
+import numpy as np  # NumPy does the arithmetic on the wide date x ticker array.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course import features, indicators, metrics
+
+_shared = {}  # Per-worker state: the attached shared-memory block and the price view.
+
+
+def _attach(name: str, shape, dtype: str, dates) -> None:
+    """Process-pool initializer: map the shared price matrix without copying it."""
+    block = shared_memory.SharedMemory(name=name)
+    prices = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    prices.flags.writeable = False  # Workers only read the shared matrix.
+    _shared.update(block=block, prices=prices, dates=dates)
+
+
+def strategy_daily_returns(
+    prices: np.ndarray, momentum_window: int, rsi_window: int, buy_thresholds
+) -> np.ndarray:
+    """
+    Daily returns of the RSI strategy for several buy thresholds.
+
+    Rows are kept where both the momentum return and the 1-day forward return exist,
+    as in `computing_returns`; RSI is computed on the momentum return and positions are
+    averaged over all kept tickers per date, as in `compute_strat_perf`.
+
+    Output: date x threshold array (NaN on dates without any kept ticker)
+    """
+    momentum = features.trailing_returns(prices, momentum_window)
+    forward = features.forward_returns(prices, 1)
+    kept = ~np.isnan(momentum) & ~np.isnan(forward)
+    momentum[~kept] = np.nan
+    forward = np.where(kept, forward, 0.0)
+
+    rsi = indicators.rsi_matrix(momentum, [rsi_window])[rsi_window]
+    counts = kept.sum(axis=1)
+    daily = np.empty((len(prices), len(buy_thresholds)))
+    with np.errstate(invalid="ignore"):
+        for column, threshold in enumerate(buy_thresholds):
+            # Comparisons with NaN are False, so missing RSI means no position.
+            daily[:, column] = (forward * (rsi < threshold)).sum(axis=1) / counts
+    daily[counts == 0] = np.nan
+    return daily
+
+
+def _evaluate(task) -> pd.DataFrame:
+    """Worker: evaluate every buy threshold for one (momentum window, RSI window) pair."""
+    momentum_window, rsi_window, buy_thresholds = task
+    daily = strategy_daily_returns(
+        _shared["prices"], momentum_window, rsi_window, buy_thresholds
+    )
+    daily = pd.DataFrame(daily, index=_shared["dates"], columns=list(buy_thresholds))
+    summary = metrics.compute_metrics(daily.dropna(how="all")).summary
+    summary.index.name = "buy_threshold"
+    summary = summary.reset_index()
+    summary.insert(0, "rsi_window", rsi_window)
+    summary.insert(0, "momentum_window", momentum_window)
+    return summary
+
+
+def run_sweep(
+    historical_prices: pd.DataFrame,
+    rsi_windows=(14,),
+    buy_thresholds=(30,),
+    momentum_windows=(1,),
+    max_workers=None,
+    rank_by: str = "Sharpe",
+) -> pd.DataFrame:
+    """
+    Evaluate the RSI strategy over a parameter grid in parallel.
+
+    The price matrix is copied once into shared memory and mapped read-only by every
+    worker; tasks only carry their parameters. Each task computes RSI once for its
+    (momentum window, RSI window) pair and evaluates all buy thresholds on it.
+
+    Input:  date x ticker prices and the grid values
+    Output: one row per combination with CAGR, Sharpe, volatility and max drawdown,
+            sorted by `rank_by` (best first)
+    """
+    values = np.ascontiguousarray(historical_prices.to_numpy(dtype="float64"))
+    block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        tasks = [
+            (momentum_window, rsi_window, tuple(buy_thresholds))
+            for momentum_window, rsi_window in itertools.product(
+                momentum_windows, rsi_windows
+            )
+        ]
+        with ProcessPoolExecutor(
+            max_workers=max_workers or min(len(tasks), os.cpu_count() or 1),
+            initializer=_attach,
+            initargs=(
+                block.name,
+                values.shape,
+                values.dtype.str,
+                historical_prices.index,
+            ),
+        ) as pool:
+            results = list(pool.map(_evaluate, tasks))
+    finally:
+        block.close()
+        block.unlink()  # Release the shared segment once every worker is done.
+
+    table = pd.concat(results, ignore_index=True)
+    return table.sort_values(rank_by, ascending=False, ignore_index=True)
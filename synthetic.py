@@ -0,0 +1,40 @@
+import numpy as np  # NumPy's Generator gives reproducible random draws.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+TRADING_DAYS_PER_YEAR = 252  # Business days generated per simulated year.
+
+
+def synthetic_prices(
+    n_tickers: int = 500,
+    n_years: float = 25,
+    missing_ratio: float = 0.01,
+    late_listing_ratio: float = 0.2,
+    seed: int = 0,
+    start_date: str = "2000-01-03",
+    dtype="float64",
+) -> pd.DataFrame:
+    """
+    Deterministic date x ticker close prices shaped like the cached S&P 500 data.
+
+    Input:  number of tickers and years, share of randomly missing observations,
+            share of tickers listed after the start (leading NaNs) and a random seed
+    Output: DataFrame indexed by business-day "Date" with tickers "T0000", "T0001", ...
+    """
+    rng = np.random.default_rng(seed)
+    n_days = int(round(n_years * TRADING_DAYS_PER_YEAR))
+    dates = pd.bdate_range(start_date, periods=n_days, name="Date")
+    tickers = [f"T{i:04d}" for i in range(n_tickers)]
+
+    # Geometric Brownian motion with a per-ticker drift and volatility.
+    drift = rng.normal(0.0003, 0.0002, n_tickers)
+    volatility = rng.uniform(0.01, 0.03, n_tickers)
+    log_returns = rng.standard_normal((n_days, n_tickers)) * volatility + drift
+    prices = 50 * np.exp(np.cumsum(log_returns, axis=0))
+
+    # Some tickers only start trading part-way through the history.
+    late = rng.random(n_tickers) < late_listing_ratio
+    first_day = np.where(late, rng.integers(0, max(n_days // 2, 1), n_tickers), 0)
+    prices[np.arange(n_days)[:, None] < first_day] = np.nan
+
+    prices[rng.random((n_days, n_tickers)) < missing_ratio] = np.nan  # Random gaps.
+    return pd.DataFrame(prices.astype(dtype), index=dates, columns=tickers)
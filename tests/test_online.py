@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from ai_course import funct_lib as fl
+from ai_course import indicators
+from ai_course.online import IndicatorState
+from ai_course.synthetic import synthetic_prices
+
+MOMENTUMS = [1, 5]
+
+
+def test_updates_match_the_pipeline_with_gaps(tmp_path):
+    prices = synthetic_prices(n_tickers=20, n_years=2, missing_ratio=0.03, seed=7)
+    history, live = prices.iloc[:300], prices.iloc[300:]
+
+    state = IndicatorState.from_history(history, MOMENTUMS)
+    state.save(tmp_path / "state.npz")
+    state = IndicatorState.load(tmp_path / "state.npz")
+    online = (
+        pd.concat(
+            {date: state.update(row) for date, row in live.iterrows()},
+            names=["Date", "Ticker"],
+        )
+        .swaplevel()
+        .sort_index()
+    )
+
+    total_returns = fl.computing_returns(prices, MOMENTUMS)
+    total_returns["RSI"] = indicators.compute_rsi(total_returns)
+    expected = total_returns.loc[
+        total_returns.index.get_level_values("Date") >= live.index[0],
+        ["1_d_returns", "5_d_returns", "RSI"],
+    ]
+    # Every row the pipeline keeps gets the same values online.
+    actual = online.reindex(expected.index)
+    assert expected["RSI"].notna().sum() > 1000
+    np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-9)
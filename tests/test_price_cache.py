@@ -0,0 +1,125 @@
+import pandas as pd
+import pytest
+
+from ai_course.downloader import (
+    DownloadResult,
+    LocalProvider,
+    MarketDataProvider,
+    download_prices,
+)
+from ai_course.price_cache import PriceCache
+from ai_course.price_store import NpyPriceStore
+
+TICKERS = ["AAA", "BBB"]
+
+
+def _prices(start_date, end_date, tickers):
+    dates = pd.bdate_range(start_date, end_date, inclusive="left", name="Date")
+    return pd.DataFrame(
+        {ticker: range(1, len(dates) + 1) for ticker in tickers},
+        index=dates,
+        dtype="float64",
+    )
+
+
+def working_fetch(tickers, start_date, end_date):
+    return DownloadResult(prices=_prices(start_date, end_date, tickers))
+
+
+def failing_fetch(tickers, start_date, end_date):
+    return DownloadResult(
+        prices=pd.DataFrame(dtype=float),
+        failed={ticker: "ConnectionError: offline" for ticker in tickers},
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PriceCache(NpyPriceStore(tmp_path / "prices.npystore"))
+
+
+def test_failed_refresh_is_not_recorded_as_covered(cache):
+    cache.get(TICKERS, "2020-01-01", "2020-02-01", working_fetch)
+    cache.get(TICKERS, "2020-01-01", "2020-03-01", failing_fetch)
+
+    assert cache.missing_blocks(TICKERS, "2020-01-01", "2020-03-01") == [
+        (TICKERS, pd.Timestamp("2020-02-01"), pd.Timestamp("2020-03-01"))
+    ]
+    prices = cache.get(TICKERS, "2020-01-01", "2020-03-01", working_fetch)
+    assert len(prices) == len(pd.bdate_range("2020-01-01", "2020-02-29"))
+
+
+def test_failure_on_empty_store_raises(cache):
+    with pytest.raises(RuntimeError, match="download failed for 2 tickers"):
+        cache.get(TICKERS, "2020-01-01", "2020-02-01", failing_fetch)
+    assert cache.coverage() == {}
+
+
+def test_empty_range_is_covered(cache):
+    prices = cache.get(TICKERS, "2020-01-04", "2020-01-06", working_fetch)  # Weekend.
+
+    assert prices.empty and list(prices.columns) == TICKERS
+    assert cache.missing_blocks(TICKERS, "2020-01-04", "2020-01-06") == []
+
+
+def test_partial_failure_retries_failed_tickers_only(cache):
+    def partial_fetch(tickers, start_date, end_date):
+        return DownloadResult(
+            prices=_prices(start_date, end_date, ["AAA"]),
+            failed={"BBB": "no data returned"},
+        )
+
+    cache.get(TICKERS, "2020-01-01", "2020-02-01", partial_fetch)
+
+    assert cache.missing_blocks(TICKERS, "2020-01-01", "2020-02-01") == [
+        (["BBB"], pd.Timestamp("2020-01-01"), pd.Timestamp("2020-02-01"))
+    ]
+
+
+def _provider_fetch(provider):
+    def fetch(tickers, start_date, end_date):
+        return download_prices(tickers, start_date, end_date, provider, backoff=0)
+
+    return fetch
+
+
+def test_downloader_failures_then_refresh(cache, tmp_path):
+    source = _prices("2020-01-01", "2020-03-01", TICKERS)
+    path = tmp_path / "source.npystore"
+    working = _provider_fetch(LocalProvider.from_frame(source, path))
+    offline = _provider_fetch(LocalProvider(path, failure_rate=1.0))
+
+    cache.get(TICKERS, "2020-01-01", "2020-02-01", working)
+    cache.get(TICKERS, "2020-01-01", "2020-03-01", offline)
+    prices = cache.get(TICKERS, "2020-01-01", "2020-03-01", working)
+
+    pd.testing.assert_frame_equal(
+        prices, source, check_freq=False, check_index_type=False
+    )
+
+
+def test_downloader_empty_range_is_not_a_failure(tmp_path):
+    source = _prices("2020-01-01", "2020-02-01", TICKERS)
+    provider = LocalProvider.from_frame(source, tmp_path / "source.npystore")
+
+    result = download_prices(TICKERS, "2020-01-04", "2020-01-06", provider, backoff=0)
+
+    assert result.prices.empty and result.failed == {}
+
+
+class SilentOutageProvider(MarketDataProvider):
+    """Answers like yfinance without a network: an empty frame, no exception."""
+
+    def fetch_close(self, tickers, start_date, end_date):
+        return pd.DataFrame(columns=list(tickers), dtype=float)
+
+
+def test_silent_outage_is_not_recorded_as_covered(cache):
+    cache.get(TICKERS, "2020-01-01", "2020-02-01", working_fetch)
+    cache.get(
+        TICKERS, "2020-01-01", "2020-03-01", _provider_fetch(SilentOutageProvider())
+    )
+
+    assert cache.missing_blocks(TICKERS, "2020-01-01", "2020-03-01") == [
+        (TICKERS, pd.Timestamp("2020-02-01"), pd.Timestamp("2020-03-01"))
+    ]
@@ -0,0 +1,138 @@
+"""
+Point-in-time index membership for survivorship-free backtests.
+
+Membership is kept as (ticker, start, end) intervals, start inclusive and end
+exclusive, with NaT for an open end. It is turned into a boolean date x ticker mask
+once, with a difference array and one cumulative sum, and then applied to whole arrays:
+features outside the index are blanked before stacking (computing_returns), and
+positions of non-members are zeroed (compute_strat_perf). Dates are never looked up
+one by one.
+
+Membership files are CSVs in one of two layouts:
+
+    date,ticker,action        (action: add / added or remove / removed)
+    ticker,start,end          (one row per membership spell; empty end = still in)
+
+In a change log, a ticker whose first event is a removal counts as a member from the
+start of the history.
+"""
+
+import hashlib  # hashlib.blake2b (stdlib) fingerprints the intervals.
+
+import numpy as np  # NumPy builds the mask with a difference array.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course.price_matrix import wide_codes  # Long index -> wide array coordinates.
+
+_ADD = {"add", "added", "addition"}
+_REMOVE = {"remove", "removed", "removal", "delete", "deleted"}
+
+
+class Membership:
+    """Index membership intervals per ticker."""
+
+    def __init__(self, intervals: pd.DataFrame):
+        intervals = intervals[["ticker", "start", "end"]].copy()
+        intervals["ticker"] = intervals["ticker"].astype(str)
+        for column in ("start", "end"):
+            intervals[column] = pd.to_datetime(intervals[column])
+        self.intervals = intervals.sort_values(["ticker", "start"], ignore_index=True)
+
+    @classmethod
+    def from_changes(cls, changes: pd.DataFrame) -> "Membership":
+        """Build from a change log with date, ticker and action columns."""
+        changes = changes.assign(
+            date=pd.to_datetime(changes["date"]),
+            action=changes["action"].str.strip().str.lower(),
+        )
+        unknown = set(changes["action"]) - _ADD - _REMOVE
+        if unknown:
+            raise ValueError(f"Unknown membership actions: {sorted(unknown)}")
+        rows = []
+        # One pass over the events (thousands, not dates x tickers).
+        for ticker, events in changes.sort_values(["ticker", "date"]).groupby(
+            "ticker", sort=False
+        ):
+            start = None
+            for date, action in zip(events["date"], events["action"]):
+                if action in _ADD:
+                    if start is None:
+                        start = date
+                else:
+                    rows.append((ticker, pd.NaT if start is None else start, date))
+                    start = None
+            if start is not None:
+                rows.append((ticker, start, pd.NaT))
+        return cls(pd.DataFrame(rows, columns=["ticker", "start", "end"]))
+
+    @classmethod
+    def from_csv(cls, path) -> "Membership":
+        """Load a change log or an interval file (see the module docstring)."""
+        table = pd.read_csv(path)
+        table.columns = table.columns.str.strip().str.lower()
+        if {"date", "ticker", "action"} <= set(table.columns):
+            return cls.from_changes(table)
+        if {"ticker", "start", "end"} <= set(table.columns):
+            return cls(table)
+        raise ValueError(
+            f"{path}: expected columns date,ticker,action or ticker,start,end, "
+            f"got {list(table.columns)}"
+        )
+
+    def tickers(self) -> list[str]:
+        """Every ticker that was a member at some point, delisted names included."""
+        return sorted(self.intervals["ticker"].unique())
+
+    def members(self, date) -> list[str]:
+        """Tickers in the index on `date`."""
+        date = pd.Timestamp(date)
+        starts, ends = self.intervals["start"], self.intervals["end"]
+        inside = (starts.isna() | (starts <= date)) & (ends.isna() | (date < ends))
+        return sorted(self.intervals.loc[inside, "ticker"].unique())
+
+    def mask(self, dates, tickers) -> np.ndarray:
+        """
+        Boolean date x ticker array: True where the ticker is in the index on the date.
+
+        Tickers without any interval are never members.
+        """
+        dates = pd.DatetimeIndex(dates)
+        columns = pd.Index(tickers).get_indexer(self.intervals["ticker"])
+        known = columns >= 0
+        starts = self.intervals["start"].to_numpy()[known]
+        ends = self.intervals["end"].to_numpy()[known]
+        # Open starts and ends map to the first row and past the last row.
+        first = np.where(pd.isna(starts), 0, dates.searchsorted(starts))
+        stop = np.where(pd.isna(ends), len(dates), dates.searchsorted(ends))
+        changes = np.zeros((len(dates) + 1, len(tickers)), dtype=np.int32)
+        np.add.at(changes, (first, columns[known]), 1)
+        np.add.at(changes, (stop, columns[known]), -1)
+        return np.cumsum(changes[:-1], axis=0) > 0
+
+    def restrict(self, arrays, dates, tickers):
+        """
+        Blank out (NaN) the entries of non-members in a date x ticker array, or in
+        every array of a dict of them; the mask is built once for all of them.
+        """
+        member = self.mask(dates, tickers)
+        if isinstance(arrays, dict):
+            return {
+                name: np.where(member, array, np.nan) for name, array in arrays.items()
+            }
+        return np.where(member, arrays, np.nan)
+
+    def fingerprint(self) -> str:
+        """Content hash of the intervals, e.g. for feature cache keys."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.intervals.to_csv(index=False).encode())
+        return digest.hexdigest()
+
+    def contains(self, index: pd.MultiIndex) -> np.ndarray:
+        """For every row of a long (Ticker, Date) index: was the ticker a member then?"""
+        date_codes, ticker_codes, dates, tickers = wide_codes(index)
+        return self.mask(dates, tickers)[date_codes, ticker_codes]
+
+
+def load_membership(path) -> Membership:
+    """Membership from a CSV file (see Membership.from_csv)."""
+    return Membership.from_csv(path)
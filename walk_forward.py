@@ -0,0 +1,177 @@
+import itertools  # itertools.product (stdlib) expands the parameter grid.
+from dataclasses import dataclass  # Lightweight container for the structured result.
+
+import numpy as np  # NumPy does the prefix sums and window differences.
+import pandas as pd  # pandas is the primary data analysis library; pd by convention.
+
+from ai_course import metrics, sweep
+from ai_course.price_matrix import PriceMatrix  # Wide date x ticker container.
+
+PARAMETERS = ["momentum_window", "rsi_window", "buy_threshold"]
+
+
+@dataclass
+class WalkForwardResult:
+    """Outcome of a walk-forward run."""
+
+    # One row per window: dates, chosen parameters, in-sample and out-of-sample metrics.
+    windows: pd.DataFrame
+    # Chained out-of-sample daily returns of the chosen parameters (test periods only).
+    daily_returns: pd.Series
+    # Metrics of `daily_returns` as a single strategy.
+    report: metrics.PerformanceReport
+
+
+def _prefix_sums(daily: np.ndarray) -> dict:
+    """
+    Running totals (with a leading zero row) from which any window's statistics follow
+    by a single subtraction: observation count, sum, sum of squares and log growth.
+    """
+    present = ~np.isnan(daily)
+    filled = np.where(present, daily, 0.0)
+    totals = {
+        "count": present,
+        "sum": filled,
+        "sum_squares": filled**2,
+        "log_growth": np.log1p(filled),  # Compounding becomes a sum of logs.
+    }
+    return {
+        name: np.concatenate([np.zeros((1, daily.shape[1])), np.cumsum(values, axis=0)])
+        for name, values in totals.items()
+    }
+
+
+def _window_stats(prefix: dict, starts, stops, periods_per_year: int) -> dict:
+    """
+    CAGR (%), Sharpe and volatility (%) of every [start, stop) row window for every
+    column, with the same definitions as `metrics.compute_metrics`.
+
+    Output: dict of window x column arrays
+    """
+    totals = {name: values[stops] - values[starts] for name, values in prefix.items()}
+    count = totals["count"]
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        mean = totals["sum"] / count
+        # Sample variance (ddof=1) from the sums, clipped against rounding below zero.
+        variance = np.maximum(totals["sum_squares"] - count * mean**2, 0) / (count - 1)
+        std = np.sqrt(variance)
+        return {
+            "CAGR": np.expm1(totals["log_growth"] * periods_per_year / count) * 100,
+            "Sharpe": mean * np.sqrt(periods_per_year) / std,
+            "Volatility": std * np.sqrt(periods_per_year) * 100,
+        }
+
+
+def strategy_returns_grid(
+    historical_prices,
+    rsi_windows=(14,),
+    buy_thresholds=(30,),
+    momentum_windows=(1,),
+) -> pd.DataFrame:
+    """
+    Daily returns of the RSI strategy for every parameter combination.
+
+    Features and RSI are computed once per (momentum window, RSI window) pair on the
+    full history (see `sweep.strategy_daily_returns`); every buy threshold reuses them.
+
+    Output: date x combination DataFrame with (momentum_window, rsi_window,
+            buy_threshold) MultiIndex columns
+    """
+    if not isinstance(historical_prices, PriceMatrix):
+        historical_prices = PriceMatrix.from_frame(historical_prices, dtype="float64")
+    values = historical_prices.values.astype("float64", copy=False)
+
+    blocks, columns = [], []
+    for momentum_window, rsi_window in itertools.product(momentum_windows, rsi_windows):
+        blocks.append(
+            sweep.strategy_daily_returns(
+                values, momentum_window, rsi_window, buy_thresholds
+            )
+        )
+        columns += [
+            (momentum_window, rsi_window, threshold) for threshold in buy_thresholds
+        ]
+    return pd.DataFrame(
+        np.hstack(blocks),
+        index=historical_prices.dates,
+        columns=pd.MultiIndex.from_tuples(columns, names=PARAMETERS),
+    )
+
+
+def walk_forward(
+    historical_prices,
+    rsi_windows=(14,),
+    buy_thresholds=(30,),
+    momentum_windows=(1,),
+    train_days: int = 3 * metrics.TRADING_DAYS_PER_YEAR,
+    test_days: int = metrics.TRADING_DAYS_PER_YEAR,
+    step_days=None,
+    rank_by: str = "Sharpe",
+    periods_per_year: int = metrics.TRADING_DAYS_PER_YEAR,
+) -> WalkForwardResult:
+    """
+    Rolling in-sample / out-of-sample evaluation of the RSI strategy grid.
+
+    Each window trains on `train_days` rows, picks the combination with the best
+    in-sample `rank_by` metric and evaluates it on the following `test_days` rows;
+    windows advance by `step_days` (default `test_days`: back-to-back test periods).
+
+    The daily returns of every combination are computed once on the full history;
+    each window's statistics are then differences of prefix sums, so the cost of a
+    window does not depend on its length and hundreds of windows stay cheap.
+
+    Input:  date x ticker prices (DataFrame or PriceMatrix), the grid values, the window
+            lengths in rows and the ranking metric (CAGR, Sharpe or Volatility)
+    Output: WalkForwardResult
+    """
+    step_days = step_days or test_days
+    grid = strategy_returns_grid(
+        historical_prices, rsi_windows, buy_thresholds, momentum_windows
+    )
+    daily = grid.to_numpy()
+    prefix = _prefix_sums(daily)
+
+    train_starts = np.arange(0, len(daily) - train_days - test_days + 1, step_days)
+    if not len(train_starts):
+        raise ValueError(
+            f"{len(daily)} dates are too few for {train_days} + {test_days} days"
+        )
+    test_starts = train_starts + train_days
+    test_stops = test_starts + test_days
+
+    in_sample = _window_stats(prefix, train_starts, test_starts, periods_per_year)
+    out_of_sample = _window_stats(prefix, test_starts, test_stops, periods_per_year)
+
+    # Lower volatility is better; NaN scores (e.g. no trades) never win.
+    score = -in_sample[rank_by] if rank_by == "Volatility" else in_sample[rank_by]
+    chosen = np.nan_to_num(score, nan=-np.inf).argmax(axis=1)
+    rows = np.arange(len(chosen))
+
+    dates = grid.index
+    windows = pd.DataFrame(
+        {
+            "train_start": dates[train_starts],
+            "test_start": dates[test_starts],
+            "test_end": dates[test_stops - 1],
+        }
+    )
+    windows = windows.join(grid.columns[chosen].to_frame(index=False))
+    for name, values in in_sample.items():
+        windows[f"IS {name}"] = values[rows, chosen]
+    for name, values in out_of_sample.items():
+        windows[f"OOS {name}"] = values[rows, chosen]
+
+    # Chain the chosen combination's test-period returns; with overlapping test periods
+    # the later window takes over from its start.
+    selection = np.full(len(daily), -1)
+    for start, stop, column in zip(test_starts, test_stops, chosen):
+        selection[start:stop] = column
+    tested = np.nonzero(selection >= 0)[0]
+    daily_returns = pd.Series(
+        daily[tested, selection[tested]], index=dates[tested], name="Walk_Forward"
+    ).dropna()
+    return WalkForwardResult(
+        windows=windows,
+        daily_returns=daily_returns,
+        report=metrics.compute_metrics(daily_returns, periods_per_year),
+    )